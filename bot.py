@@ -1,47 +1,277 @@
-import os
-
-import discord
-from discord.ext import commands
-from dotenv import load_dotenv
-
-from config import logger
-from game.game import FNAFDiscordGame
-
-load_dotenv()
-
-TOKEN = os.environ["TOKEN"]
-
-intents = discord.Intents.default()
-intents.message_content = True
-
-bot = commands.Bot(command_prefix=">", intents=intents)
-
-active_games: dict[int, FNAFDiscordGame] = {}
-
-
-@bot.event
-async def on_ready() -> None:
-    assert bot.user is not None, "expected bot user to be ready"
-    logger.info(f"{bot.user} is online!")
-
-
-@bot.command()
-async def start(ctx: commands.Context[commands.Bot], /) -> None:
-    if ctx.author.id in active_games:
-        await ctx.send("⚠️You already have a running game!", delete_after=5)
-        return
-
-    assert isinstance(ctx.channel, discord.TextChannel), type(ctx.channel)
-    assert isinstance(ctx.author, discord.Member), type(ctx.author)
-    game = FNAFDiscordGame(ctx.channel, ctx.author, active_games)
-    active_games[ctx.author.id] = game
-    await game.start_game()
-
-    try:
-        await ctx.message.delete()
-    except Exception as exc:
-        logger.error(f"failed to delete game message: {exc}")
-
-
-if __name__ == "__main__":
-    bot.run(TOKEN)
+import os
+import time
+
+import discord
+from aiohttp import web
+from discord.ext import commands
+from dotenv import load_dotenv
+
+from config import logger, setup_logging
+from game import metrics
+from game.assets import AssetRegistry, channel_uploader
+from game.core.clock import MonotonicClock
+from game.core.images import referenced_images
+from game.game import FNAFDiscordGame
+from game.governor import LoadGovernor
+from game.outbound import EditQueue
+from game.persistence import SnapshotStore
+from game.scheduler import TickScheduler
+from game.stats import PlayerStats, StatsStore
+from game.view import GameRouter
+
+setup_logging()
+load_dotenv()
+
+TOKEN = os.environ["TOKEN"]
+ASSET_CHANNEL_ID = os.environ.get("ASSET_CHANNEL_ID")
+SNAPSHOT_DB = os.environ.get("SNAPSHOT_DB", "games.db")
+ASSET_DIR = os.environ.get("ASSET_DIR", "assets")
+# Set by launcher.py when the bot runs as one of several shard processes.
+SHARD_ID = int(os.environ.get("SHARD_ID", "0"))
+SHARD_COUNT = int(os.environ.get("SHARD_COUNT", "1"))
+# Prometheus endpoint; each shard listens on METRICS_PORT + SHARD_ID.
+METRICS_HOST = os.environ.get("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = os.environ.get("METRICS_PORT")
+# Runs every game faster than real time, e.g. 4 for a 15 minute night.
+GAME_SPEED = float(os.environ.get("GAME_SPEED", "1"))
+# Running games allowed at once in this process and in one guild; players
+# over the limit wait in line for >start.
+MAX_GAMES = int(os.environ.get("MAX_GAMES", "500"))
+MAX_GAMES_PER_GUILD = int(os.environ.get("MAX_GAMES_PER_GUILD", "25"))
+
+# Startup time after imports; ``python -m game.coldstart`` times those.
+STARTED = time.monotonic()
+
+intents = discord.Intents.default()
+intents.message_content = True
+
+
+class FNAFBot(commands.Bot):
+    metrics_runner: web.AppRunner | None = None
+
+    async def setup_hook(self) -> None:
+        self.add_dynamic_items(GameRouter)
+        if METRICS_PORT is not None:
+            self.metrics_runner = await metrics.serve(
+                METRICS_HOST, int(METRICS_PORT) + SHARD_ID
+            )
+
+    async def close(self) -> None:
+        await snapshots.flush()
+        snapshots.close()
+        await stats.flush()
+        stats.close()
+        if self.metrics_runner is not None:
+            await self.metrics_runner.cleanup()
+        await super().close()
+
+
+if SHARD_COUNT > 1:
+    bot = FNAFBot(
+        command_prefix=">",
+        intents=intents,
+        shard_id=SHARD_ID,
+        shard_count=SHARD_COUNT,
+    )
+else:
+    bot = FNAFBot(command_prefix=">", intents=intents)
+
+active_games: dict[int, FNAFDiscordGame] = {}
+scheduler = TickScheduler(MonotonicClock(GAME_SPEED))
+assets = AssetRegistry.from_directory(ASSET_DIR)
+assets.preload(referenced_images())
+outbox = EditQueue()
+governor = LoadGovernor(
+    active_games,
+    outbox,
+    max_games=MAX_GAMES,
+    max_per_guild=MAX_GAMES_PER_GUILD,
+)
+snapshots = SnapshotStore(
+    SNAPSHOT_DB,
+    active_games,
+    shard_id=SHARD_ID,
+    shard_count=SHARD_COUNT,
+)
+stats = StatsStore(SNAPSHOT_DB)
+GameRouter.bind(active_games)
+scheduler.on_lag = metrics.TICK_LAG.observe
+metrics.ACTIVE_GAMES.read = lambda: len(active_games)
+metrics.WAITING_PLAYERS.read = lambda: len(governor)
+metrics.SPECTATORS.read = lambda: sum(
+    len(game.spectators) for game in active_games.values()
+)
+resumed = False
+
+
+async def resume_games() -> None:
+    """Rebuild the games saved before the last shutdown and re-attach them
+    to their messages."""
+    for snapshot in snapshots.load():
+        channel = bot.get_channel(snapshot.channel_id)
+        if not isinstance(channel, discord.TextChannel):
+            logger.warning(f"cannot resume game in {snapshot.channel_id}")
+            continue
+        try:
+            member = channel.guild.get_member(
+                snapshot.user_id
+            ) or await channel.guild.fetch_member(snapshot.user_id)
+        except discord.HTTPException as exc:
+            logger.warning(f"cannot resume game of {snapshot.user_id}: {exc}")
+            continue
+
+        game = FNAFDiscordGame(
+            channel,
+            member,
+            active_games,
+            scheduler,
+            assets=assets,
+            outbox=outbox,
+            governor=governor,
+            stats=stats,
+        )
+        try:
+            game.restore(snapshot.state, game.clock.now() - snapshot.saved_at)
+        except (KeyError, ValueError, TypeError) as exc:
+            # Saved by a version of the bot with a different game state.
+            logger.warning(f"cannot resume game of {snapshot.user_id}: {exc}")
+            continue
+        active_games[snapshot.user_id] = game
+        await game.resume(channel.get_partial_message(snapshot.message_id))
+
+    logger.info(f"resumed {len(active_games)} games")
+
+
+@bot.event
+async def on_ready() -> None:
+    assert bot.user is not None, "expected bot user to be ready"
+    logger.info(f"{bot.user} is online!")
+
+    if ASSET_CHANNEL_ID is not None:
+        channel = bot.get_channel(int(ASSET_CHANNEL_ID))
+        assert isinstance(channel, discord.TextChannel), type(channel)
+        assets.uploader = channel_uploader(channel)
+        await assets.upload_missing()
+
+    global resumed
+    if not resumed:
+        resumed = True
+        await resume_games()
+        metrics.STARTUP_SECONDS.set(time.monotonic() - STARTED)
+        snapshots.start()
+        stats.start()
+
+
+@bot.command()
+async def start(ctx: commands.Context[commands.Bot], /) -> None:
+    if ctx.author.id in active_games:
+        await ctx.send("⚠️You already have a running game!", delete_after=5)
+        return
+    if (position := governor.position(ctx.author.id)) is not None:
+        await ctx.send(f"⏳You are #{position} in line.", delete_after=5)
+        return
+
+    assert isinstance(ctx.channel, discord.TextChannel), type(ctx.channel)
+    assert isinstance(ctx.author, discord.Member), type(ctx.author)
+    guild_id = ctx.guild.id if ctx.guild is not None else None
+    if not await governor.admit(ctx.channel, ctx.author.id, guild_id):
+        return
+
+    # Another shard may be running this player's game in another guild.
+    if not await snapshots.claim(ctx.author.id):
+        governor.cancel(ctx.author.id)
+        await ctx.send("⚠️You already have a running game!", delete_after=5)
+        return
+
+    game = FNAFDiscordGame(
+        ctx.channel,
+        ctx.author,
+        active_games,
+        scheduler,
+        assets=assets,
+        outbox=outbox,
+        governor=governor,
+        stats=stats,
+    )
+    active_games[ctx.author.id] = game
+    try:
+        await game.start_game()
+    except BaseException:
+        # Give the slot back instead of leaving a game that never showed.
+        if active_games.get(ctx.author.id) is game:
+            del active_games[ctx.author.id]
+        governor.cancel(ctx.author.id)
+        raise
+
+    try:
+        await ctx.message.delete()
+    except Exception as exc:
+        logger.error(f"failed to delete game message: {exc}")
+
+
+@bot.command()
+async def watch(
+    ctx: commands.Context[commands.Bot],
+    player: discord.Member,
+    /,
+) -> None:
+    game = active_games.get(player.id)
+    if game is None or game.game_message is None:
+        await ctx.send(
+            f"⚠️{player.display_name} is not playing right now.",
+            delete_after=5,
+        )
+        return
+    if ctx.channel.id == game.channel.id or ctx.channel.id in game.spectators:
+        await ctx.send("⚠️This game is already shown here.", delete_after=5)
+        return
+    if game.spectators.full:
+        await ctx.send(
+            "⚠️Too many channels are watching this game already.",
+            delete_after=5,
+        )
+        return
+    await game.add_spectator(ctx.channel)
+
+
+def describe(player: PlayerStats) -> str:
+    return (
+        f"{player.wins} wins, {player.nights_survived} nights survived, "
+        f"best streak {player.best_streak}"
+    )
+
+
+@bot.command()
+async def leaderboard(ctx: commands.Context[commands.Bot], /) -> None:
+    embed = discord.Embed(title="🏆 Leaderboard", color=0xFFD700)
+    lines = [
+        f"**{rank}.** <@{player.user_id}> — {describe(player)}"
+        for rank, player in enumerate(stats.leaderboard(), start=1)
+    ]
+    embed.description = "\n".join(lines) or "Nobody has finished a night yet."
+
+    player = await stats.player(ctx.author.id)
+    if player is not None:
+        deaths = ", ".join(
+            f"{count}× {cause.replace('_', ' ')}"
+            for cause, count in sorted(player.deaths.items())
+        )
+        embed.add_field(
+            name="Your stats",
+            value=(
+                f"{describe(player)}, {player.games} games played\n"
+                f"Best night {player.best_night}, "
+                f"{player.average_power_left:.0f}% power left on average\n"
+                f"Deaths: {deaths or 'none'}"
+            ),
+        )
+    await ctx.send(embed=embed)
+
+
+def main() -> None:
+    # Logging is set up above; discord.py's records go to the root logger.
+    bot.run(TOKEN, log_handler=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,33 @@
-import logging
-
-logging.basicConfig(
-    level=logging.DEBUG,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-)
-logger = logging.getLogger("FNAF_Bot")
-
-# ROOM_GRAPH: dict[Room, list[Room]] = {
-ROOM_GRAPH: dict[str, list[str]] = {
-    "main-stage": ["dining", "side-stage"],
-    "side-stage": ["main-stage", "dining"],
-    "kitchen": ["right-hall", "main-stage"],
-    "dining": ["left-hall", "main-stage", "side-stage"],
-    "left-hall": ["office", "dining", "kitchen"],
-    "right-hall": ["office", "kitchen"],
-    "office": [],
-}
+import logging
+
+logger = logging.getLogger("FNAF_Bot")
+
+
+def setup_logging(level: int = logging.DEBUG) -> None:
+    """Log to stderr. Only programs call this, never on import, so tools
+    that import the game get no log output they did not ask for."""
+    logging.basicConfig(
+        level=level,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+
+
+# ROOM_GRAPH: dict[Room, list[Room]] = {
+ROOM_GRAPH: dict[str, list[str]] = {
+    "main-stage": ["dining", "side-stage"],
+    "side-stage": ["main-stage", "dining"],
+    "kitchen": ["right-hall", "main-stage"],
+    "dining": ["left-hall", "main-stage", "side-stage"],
+    "left-hall": ["office", "dining", "kitchen"],
+    "right-hall": ["office", "kitchen"],
+    "office": [],
+}
+
+# The hatter's way to the office, round the back through the kitchen.
+KITCHEN_GRAPH: dict[str, list[str]] = {
+    "kitchen": ["right-hall", "dining"],
+    "dining": ["left-hall", "kitchen"],
+    "left-hall": ["office", "dining"],
+    "right-hall": ["office", "kitchen"],
+    "office": [],
+}
@@ -1,8 +1,36 @@
-# Instead of:
-from game.game import FNAFDiscordGame
-from game.view import FNAFGameView
-
-__all__ = (
-    "FNAFDiscordGame",
-    "FNAFGameView",
-)
+"""Five Nights at Alice's.
+
+The rules live in ``game.core``, which does not need discord.py. The
+Discord adapter below is only imported when one of its names is first
+used, so ``import game.core`` does not pay for it.
+"""
+
+from __future__ import annotations
+
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from game.game import FNAFDiscordGame
+    from game.view import FNAFGameView, GameRouter
+
+__all__ = (
+    "FNAFDiscordGame",
+    "FNAFGameView",
+    "GameRouter",
+)
+
+_LAZY = {
+    "FNAFDiscordGame": "game.game",
+    "FNAFGameView": "game.view",
+    "GameRouter": "game.view",
+}
+
+
+def __getattr__(name: str) -> object:
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import asyncio
+import re
+import time
+from collections.abc import Awaitable, Callable, Iterable
+from pathlib import Path
+from typing import TYPE_CHECKING, TypeAlias
+from urllib.parse import parse_qs, urlsplit
+
+import discord
+
+from config import logger
+
+from .metrics import ASSET_BYTES_HOSTED
+
+if TYPE_CHECKING:
+    from .bundle import AssetBundle
+
+# Takes the image file name and its path on disk, returns a hosted URL.
+Uploader: TypeAlias = Callable[[str, Path], Awaitable[str]]
+
+_LINK_RE = re.compile(r"^\s*_\w+\s*=\s*(?P<url>\S+)")
+
+# Discord signs attachment URLs and they stop working after about a day.
+DISCORD_CDN = frozenset({"cdn.discordapp.com", "media.discordapp.net"})
+CDN_LIFETIME = 24 * 3600.0
+# Seconds before a URL expires that it is no longer used.
+EXPIRY_MARGIN = 600.0
+
+
+def link_expiry(url: str) -> float | None:
+    """When ``url`` stops working (``time.time()``), or ``None`` if it
+    does not expire.
+
+    Discord CDN URLs carry their expiry as a hex ``ex`` parameter; one
+    without it is assumed to last ``CDN_LIFETIME`` from now.
+    """
+    parts = urlsplit(url)
+    if parts.hostname not in DISCORD_CDN:
+        return None
+    expires = parse_qs(parts.query).get("ex")
+    if expires:
+        try:
+            return float(int(expires[0], 16))
+        except ValueError:
+            pass
+    return time.time() + CDN_LIFETIME
+
+
+def parse_direct_links(text: str) -> dict[str, str]:
+    """Parse ``assets/_directlink.txt`` into ``{file name: url}``.
+
+    The hosted file names sometimes carry a dash the local ones do not
+    (``closing-Door.webp`` vs ``closingDoor.webp``), so dashes are dropped
+    when matching them up.
+    """
+    links: dict[str, str] = {}
+    for line in text.splitlines():
+        match = _LINK_RE.match(line)
+        if match is None:
+            continue
+        url = match["url"]
+        name = url.rsplit("/", 1)[-1].replace("-", "")
+        links[name] = url
+    return links
+
+
+class AssetRegistry:
+    """Maps image file names to URLs so each image is only uploaded once.
+
+    Images with a known URL are referenced straight from the embed. The
+    rest are either uploaded once through ``uploader``, and again whenever
+    the URL it got expires, or, if there is no uploader, sent as a message
+    attachment like before.
+    """
+
+    def __init__(
+        self,
+        directory: str | Path = "assets",
+        links: dict[str, str] | None = None,
+        uploader: Uploader | None = None,
+    ) -> None:
+        self.directory = Path(directory)
+        self.uploader = uploader
+        self._urls: dict[str, str] = {}
+        self._expires: dict[str, float] = {}
+        self._refreshes: set[asyncio.Task[str | None]] = set()
+        for name, url in (links or {}).items():
+            self.remember(name, url)
+        self._uploads: dict[str, asyncio.Task[str]] = {}
+        self._sizes: dict[str, int] = {}
+        self.bundle: AssetBundle | None = None
+
+    @classmethod
+    def from_directory(
+        cls,
+        directory: str | Path = "assets",
+        uploader: Uploader | None = None,
+    ) -> AssetRegistry:
+        link_file = Path(directory) / "_directlink.txt"
+        links = (
+            parse_direct_links(link_file.read_text(encoding="utf-8"))
+            if link_file.exists()
+            else {}
+        )
+        return cls(directory, links, uploader)
+
+    def path_for(self, name: str) -> Path:
+        return self.directory / name
+
+    def url_for(self, name: str) -> str | None:
+        expires = self._expires.get(name)
+        if expires is not None and time.time() >= expires - EXPIRY_MARGIN:
+            # Attach the image until it has been uploaded again.
+            self.forget(name)
+            self._refresh(name)
+        return self._urls.get(name)
+
+    def remember(self, name: str, url: str) -> None:
+        self._urls[name] = url
+        expires = link_expiry(url)
+        if expires is not None:
+            self._expires[name] = expires
+
+    def forget(self, name: str) -> None:
+        _ = self._urls.pop(name, None)
+        _ = self._expires.pop(name, None)
+
+    def _refresh(self, name: str) -> None:
+        if self.uploader is None:
+            return
+        try:
+            task = asyncio.get_running_loop().create_task(self.upload(name))
+        except RuntimeError:
+            return
+        self._refreshes.add(task)
+        task.add_done_callback(self._refreshes.discard)
+
+    def preload(self, names: Iterable[str]) -> None:
+        """Validate ``names`` and keep them in memory from now on.
+
+        Raises ``ValueError`` if any of them is missing or broken.
+        """
+        from .bundle import AssetBundle
+
+        self.bundle = AssetBundle.load(self.directory, names)
+        logger.info(
+            f"loaded {len(self.bundle)} images "
+            f"({self.bundle.nbytes / 1024:.0f} KiB)"
+        )
+
+    def size_of(self, name: str) -> int:
+        if self.bundle is not None and name in self.bundle:
+            return self.bundle.size_of(name)
+        size = self._sizes.get(name)
+        if size is None:
+            size = self._sizes[name] = self.path_for(name).stat().st_size
+        return size
+
+    def attachments_for(self, name: str) -> list[discord.File]:
+        """Files to attach for ``name``: none if it is already hosted."""
+        if self.url_for(name) is not None:
+            return []
+        if self.bundle is not None and name in self.bundle:
+            return [discord.File(self.bundle.open(name), filename=name)]
+        path = self.path_for(name)
+        if not path.exists():
+            return []
+        return [discord.File(path, filename=name)]
+
+    async def upload(self, name: str) -> str | None:
+        """Upload ``name`` through the uploader unless it is already known.
+
+        Concurrent calls for the same image share a single upload.
+        """
+        url = self.url_for(name)
+        if url is not None:
+            return url
+        if self.uploader is None:
+            return None
+
+        task = self._uploads.get(name)
+        if task is None:
+            task = asyncio.create_task(
+                self.uploader(name, self.path_for(name))
+            )
+            self._uploads[name] = task
+        try:
+            url = await task
+        except Exception:
+            logger.warning(f"Failed to upload asset {name}")
+            return None
+        finally:
+            _ = self._uploads.pop(name, None)
+
+        self.remember(name, url)
+        ASSET_BYTES_HOSTED.inc(self.size_of(name))
+        return url
+
+    async def upload_missing(self) -> None:
+        names = [
+            path.name
+            for path in sorted(self.directory.glob("*.webp"))
+            if self.url_for(path.name) is None
+        ]
+        _ = await asyncio.gather(*(self.upload(name) for name in names))
+
+
+def channel_uploader(channel: discord.abc.Messageable) -> Uploader:
+    """Upload assets by posting them to ``channel`` and keeping the URL.
+
+    These are signed attachment URLs that expire; ``AssetRegistry`` drops
+    them shortly before (see ``link_expiry``) and uploads the image again.
+    """
+
+    async def upload(name: str, path: Path) -> str:
+        message = await channel.send(file=discord.File(path, filename=name))
+        return message.attachments[0].url
+
+    return upload
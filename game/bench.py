@@ -0,0 +1,437 @@
+"""Load test for one bot process against a fake Discord backend.
+
+Drives the real ``start`` command, ``GameRouter`` button callbacks and
+``FNAFDiscordGame`` ticks for many concurrent games, with
+``TextChannel.send``, ``Message.edit`` and ``Interaction`` replaced by
+in-process fakes that add configurable latency and answer a fraction of
+edits with HTTP 429. Nothing leaves the process.
+
+``--spectators`` mirrors every game into that many more channels with
+``>watch``.
+
+Reports tick lag, edits per second, edit latency (from submitting an edit
+to the outbound queue until it was delivered) and resident memory per
+game. ``--json`` prints one JSON object so runs can be stored and compared
+between commits::
+
+    python -m game.bench --games 2000 --duration 60 --json > after.json
+
+Run it from the repository root so ``bot`` and ``assets`` can be found.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import resource
+import sys
+import time
+from collections.abc import Sequence
+from dataclasses import asdict, dataclass
+from typing import Any
+
+import discord
+
+from config import logger
+
+from .outbound import EditQueue, Priority
+from .view import CUSTOM_ID, FNAFGameView, GameRouter
+
+_ids = itertools.count(1 << 40)
+
+
+@dataclass(frozen=True, slots=True)
+class Backend:
+    """How the fake Discord API behaves."""
+
+    latency: float = 0.05
+    jitter: float = 0.02
+    rate_limit: float = 0.0
+    retry_after: float = 1.0
+
+    async def call(self, *, limited: bool = False) -> None:
+        """One API round trip; ``limited`` calls may answer 429."""
+        await asyncio.sleep(max(0.0, random.gauss(self.latency, self.jitter)))
+        if limited and random.random() < self.rate_limit:
+            raise discord.HTTPException(
+                _Response(429, {"Retry-After": str(self.retry_after)}),
+                "You are being rate limited.",
+            )
+
+
+class _Response:
+    """The parts of an aiohttp response ``HTTPException`` looks at."""
+
+    def __init__(self, status: int, headers: dict[str, str]) -> None:
+        self.status = status
+        self.reason = "Too Many Requests"
+        self.headers = headers
+
+
+class Recorder:
+    def __init__(self) -> None:
+        self.tick_lags: list[float] = []
+        self.edit_latencies: list[float] = []
+        self.edits = 0
+        self.failed = 0
+        self.sends = 0
+        self.presses = 0
+        self.clicks: list[float] = []
+
+    def lag(self, seconds: float) -> None:
+        self.tick_lags.append(seconds)
+
+
+class MeasuredEditQueue(EditQueue):
+    def __init__(self, recorder: Recorder, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.recorder = recorder
+
+    def submit(
+        self,
+        key: Any,
+        channel_id: int,
+        send: Any,
+        priority: Priority = Priority.HIGH,
+    ) -> asyncio.Future[bool]:
+        future = super().submit(key, channel_id, send, priority)
+        started = time.monotonic()
+
+        def done(future: asyncio.Future[bool]) -> None:
+            if (
+                not future.cancelled()
+                and future.exception() is None
+                and future.result()
+            ):
+                self.recorder.edit_latencies.append(time.monotonic() - started)
+
+        future.add_done_callback(done)
+        return future
+
+
+class FakeMessage:
+    def __init__(
+        self,
+        channel: FakeChannel,
+        backend: Backend,
+        recorder: Recorder,
+    ) -> None:
+        self.id = next(_ids)
+        self.channel = channel
+        self.backend = backend
+        self.recorder = recorder
+
+    async def edit(self, **fields: Any) -> FakeMessage:
+        _close_files(fields.get("attachments"))
+        try:
+            await self.backend.call(limited=True)
+        except discord.HTTPException:
+            self.recorder.failed += 1
+            raise
+        self.recorder.edits += 1
+        return self
+
+    async def delete(self) -> None:
+        await self.backend.call()
+
+
+class FakeChannel(discord.TextChannel):
+    def __init__(self, backend: Backend, recorder: Recorder) -> None:
+        self.id = next(_ids)
+        self.name = f"bench-{self.id}"
+        self.guild = discord.Object(next(_ids))  # type: ignore[assignment]
+        self.backend = backend
+        self.recorder = recorder
+
+    async def send(self, *args: Any, **kwargs: Any) -> Any:
+        _close_files(kwargs.get("files"))
+        await self.backend.call()
+        self.recorder.sends += 1
+        return FakeMessage(self, self.backend, self.recorder)
+
+
+class FakeMember(discord.Member):
+    def __init__(self, guild: discord.abc.Snowflake) -> None:
+        self._user = discord.Object(next(_ids))  # type: ignore[assignment]
+        self.guild = guild  # type: ignore[assignment]
+
+
+class FakeContext:
+    """Just enough of ``commands.Context`` for the ``start`` command."""
+
+    def __init__(self, channel: FakeChannel, author: FakeMember) -> None:
+        self.channel = channel
+        self.guild = channel.guild
+        self.author = author
+        self.message = FakeMessage(channel, channel.backend, channel.recorder)
+
+    async def send(self, *args: Any, **kwargs: Any) -> FakeMessage:
+        return await self.channel.send(*args, **kwargs)
+
+
+class FakeResponse:
+    def __init__(self, backend: Backend) -> None:
+        self.backend = backend
+        self.done = False
+
+    def is_done(self) -> bool:
+        return self.done
+
+    async def _respond(self) -> None:
+        if self.done:
+            raise RuntimeError("interaction already responded to")
+        self.done = True
+        await self.backend.call()
+
+    async def defer(self, **kwargs: Any) -> None:
+        await self._respond()
+
+    async def send_message(self, *args: Any, **kwargs: Any) -> None:
+        await self._respond()
+
+    async def edit_message(self, **fields: Any) -> None:
+        _close_files(fields.get("attachments"))
+        await self._respond()
+
+
+class FakeInteraction:
+    def __init__(self, user: FakeMember, message: Any, backend: Backend):
+        self.user = user
+        self.message = message
+        self.response = FakeResponse(backend)
+        self.created_at = discord.utils.utcnow()
+
+
+async def play(
+    user: FakeMember,
+    games: dict[int, Any],
+    backend: Backend,
+    recorder: Recorder,
+    interval: float,
+) -> None:
+    """Press a random button of the user's current layout every
+    ``interval`` seconds on average. Never quits."""
+    while True:
+        await asyncio.sleep(random.expovariate(1 / interval))
+        game = games.get(user.id)
+        if game is None or game.game_message is None:
+            continue
+        view = FNAFGameView.for_game(game)
+        ids = [
+            button["custom_id"]
+            for row in view.to_components()
+            for button in row["components"]
+            if not button["custom_id"].endswith(":quit")
+        ]
+        match = CUSTOM_ID.fullmatch(random.choice(ids))
+        assert match is not None
+        arg = match["arg"]
+        router = GameRouter(
+            discord.ui.Button(custom_id=match.string),
+            int(match["game_id"]),
+            match["action"],
+            int(arg) if arg is not None else None,
+        )
+        interaction = FakeInteraction(user, game.game_message, backend)
+        recorder.presses += 1
+        started = time.monotonic()
+        try:
+            await router.callback(interaction)  # type: ignore[arg-type]
+        except Exception:
+            logger.exception("Button press failed")
+        else:
+            recorder.clicks.append(time.monotonic() - started)
+
+
+def rss() -> int:
+    """Current resident set size in bytes."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        # Peak instead of current, in KiB on Linux and bytes on macOS.
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def _close_files(files: list[discord.File] | None) -> None:
+    for file in files or ():
+        file.close()
+
+
+async def run(
+    games: int,
+    duration: float,
+    *,
+    ramp: float = 10.0,
+    press_interval: float = 3.0,
+    spectators: int = 0,
+    backend: Backend | None = None,
+    queue_options: dict[str, Any] | None = None,
+) -> dict[str, Any]:
+    # Importing bot builds the real command and its globals; keep it away
+    # from the real token and snapshot database.
+    os.environ.setdefault("TOKEN", "bench")
+    os.environ["SNAPSHOT_DB"] = ":memory:"
+    import bot
+
+    if backend is None:
+        backend = Backend()
+    recorder = Recorder()
+    bot.scheduler.on_lag = recorder.lag
+    bot.outbox = MeasuredEditQueue(recorder, **(queue_options or {}))
+    bot.governor.outbox = bot.outbox
+    # Every game gets its own guild; only the process-wide cap applies,
+    # and it must not leave starts waiting in line.
+    bot.governor.max_games = max(bot.governor.max_games, games)
+
+    baseline = rss()
+    players: list[asyncio.Task[None]] = []
+    started = time.monotonic()
+    for i in range(games):
+        channel = FakeChannel(backend, recorder)
+        user = FakeMember(channel.guild)
+        await bot.start(FakeContext(channel, user))  # type: ignore[arg-type]
+        for _ in range(spectators):
+            watcher = FakeChannel(backend, recorder)
+            context = FakeContext(watcher, FakeMember(watcher.guild))
+            await bot.watch(context, user)  # type: ignore[arg-type]
+        players.append(
+            asyncio.create_task(
+                play(user, bot.active_games, backend, recorder, press_interval)
+            )
+        )
+        # Spread the starts so the games do not all tick in lockstep.
+        target = started + ramp * (i + 1) / games
+        await asyncio.sleep(max(0.0, target - time.monotonic()))
+    memory = rss() - baseline
+
+    # Measure only the steady state.
+    recorder.tick_lags.clear()
+    recorder.edit_latencies.clear()
+    recorder.clicks.clear()
+    edits_before = recorder.edits
+    measured = time.monotonic()
+    await asyncio.sleep(duration)
+    elapsed = time.monotonic() - measured
+
+    for task in players:
+        task.cancel()
+    stats = bot.outbox.stats()
+    return {
+        "games": games,
+        "duration": elapsed,
+        "backend": asdict(backend),
+        "press_interval": press_interval,
+        "spectators": sum(
+            len(game.spectators) for game in bot.active_games.values()
+        ),
+        "active_games": len(bot.active_games),
+        "scheduled_games": len(bot.scheduler),
+        "refresh_scale": bot.governor.refresh_scale(),
+        "presses": recorder.presses,
+        "tick_lag": {
+            "samples": len(recorder.tick_lags),
+            "p50": percentile(recorder.tick_lags, 0.5),
+            "p99": percentile(recorder.tick_lags, 0.99),
+            "max": max(recorder.tick_lags, default=0.0),
+        },
+        "edits": {
+            "per_second": (recorder.edits - edits_before) / elapsed,
+            "delivered": recorder.edits,
+            "failed": recorder.failed,
+            "rate_limited": stats.rate_limited,
+            "merged": stats.merged,
+            "dropped": stats.dropped,
+            "backlog": stats.depth,
+            "backlog_by_priority": {
+                "high": stats.high,
+                "periodic": stats.periodic,
+                "spectator": stats.spectator,
+            },
+            "latency_p50": percentile(recorder.edit_latencies, 0.5),
+            "latency_p99": percentile(recorder.edit_latencies, 0.99),
+        },
+        "click_to_frame": {
+            "p50": percentile(recorder.clicks, 0.5),
+            "p99": percentile(recorder.clicks, 0.99),
+        },
+        "rss_bytes": rss(),
+        "rss_per_game_bytes": memory / games if games else 0.0,
+    }
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m game.bench",
+        description="Load test the bot against a fake Discord backend.",
+    )
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--ramp", type=float, default=10.0)
+    parser.add_argument("--press-interval", type=float, default=3.0)
+    parser.add_argument("--spectators", type=int, default=0)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--rate-limit", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--global-rate", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args(argv)
+
+    random.seed(args.seed)
+    report = asyncio.run(
+        run(
+            args.games,
+            args.duration,
+            ramp=args.ramp,
+            press_interval=args.press_interval,
+            spectators=args.spectators,
+            backend=Backend(
+                args.latency, args.jitter, args.rate_limit, args.retry_after
+            ),
+            queue_options={"global_rate": args.global_rate},
+        )
+    )
+    if args.json:
+        print(json.dumps(report))
+        return
+
+    lag = report["tick_lag"]
+    edits = report["edits"]
+    print(
+        f"{report['games']} games for {report['duration']:.0f}s, "
+        f"{report['presses']} presses, {report['spectators']} spectators"
+    )
+    print(
+        f"  tick lag   p50 {lag['p50'] * 1000:7.1f}ms"
+        f"  p99 {lag['p99'] * 1000:7.1f}ms  max {lag['max'] * 1000:7.1f}ms"
+    )
+    print(
+        f"  edits      {edits['per_second']:7.1f}/s"
+        f"  p50 {edits['latency_p50'] * 1000:7.1f}ms"
+        f"  p99 {edits['latency_p99'] * 1000:7.1f}ms"
+        f"  429s {edits['rate_limited']}  dropped {edits['dropped']}"
+    )
+    clicks = report["click_to_frame"]
+    print(
+        f"  clicks     p50 {clicks['p50'] * 1000:7.1f}ms"
+        f"  p99 {clicks['p99'] * 1000:7.1f}ms"
+    )
+    print(f"  memory     {report['rss_per_game_bytes'] / 1024:7.1f} KiB/game")
+
+
+if __name__ == "__main__":
+    main()
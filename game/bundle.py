@@ -0,0 +1,216 @@
+"""All game images packed into one memory-mapped buffer.
+
+``AssetBundle.load`` reads every image the game can show once at start-up,
+checks that each one is a WebP file, and copies them back to back into a
+single anonymous ``mmap``. After that, sending an image does no file
+system calls: ``open`` returns a seekable reader over a ``memoryview``
+slice of the bundle, which ``discord.File`` accepts in place of a path.
+
+Run ``python -m game.bundle check`` to validate the assets directory, or
+``python -m game.bundle optimize`` to write smaller re-encoded copies of
+the images (this needs Pillow, ``pip install .[optimize]``). Point
+``ASSET_DIR`` at the optimized directory to use them; it has no
+``_directlink.txt``, so its images are attached or uploaded instead of
+linking to the hosted originals.
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import mmap
+from collections.abc import Iterable, Sequence
+from pathlib import Path
+
+from .core.images import referenced_images
+
+# name: (quality, longest side in pixels)
+PRESETS = {
+    "high": (85, 1280),
+    "medium": (75, 960),
+    "small": (60, 640),
+}
+
+
+def check_image(path: Path) -> str | None:
+    """Return what is wrong with the image at ``path``, if anything."""
+    try:
+        with path.open("rb") as file:
+            header = file.read(12)
+    except OSError as exc:
+        return f"{path.name}: {exc.strerror or exc}"
+    if len(header) < 12 or header[:4] != b"RIFF" or header[8:] != b"WEBP":
+        return f"{path.name}: not a WebP image"
+    return None
+
+
+class BundleReader(io.RawIOBase):
+    """A read-only, seekable file over a slice of the bundle."""
+
+    def __init__(self, data: memoryview) -> None:
+        self._data = data
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            pos = offset
+        elif whence == io.SEEK_CUR:
+            pos = self._pos + offset
+        elif whence == io.SEEK_END:
+            pos = len(self._data) + offset
+        else:
+            raise ValueError(f"invalid whence {whence}")
+        if pos < 0:
+            raise ValueError("negative seek position")
+        self._pos = pos
+        return pos
+
+    def readinto(self, buffer: bytearray | memoryview) -> int:  # type: ignore[override]
+        chunk = self._data[self._pos : self._pos + len(buffer)]
+        size = len(chunk)
+        memoryview(buffer).cast("B")[:size] = chunk
+        self._pos += size
+        return size
+
+    def readall(self) -> bytes:
+        data = bytes(self._data[self._pos :])
+        self._pos = len(self._data)
+        return data
+
+
+class AssetBundle:
+    def __init__(self, buffer: mmap.mmap, index: dict[str, slice]) -> None:
+        self._buffer = buffer
+        self._index = index
+
+    @classmethod
+    def load(cls, directory: str | Path, names: Iterable[str]) -> AssetBundle:
+        """Validate and pack ``names`` from ``directory``.
+
+        Raises ``ValueError`` listing every missing or broken image, so a
+        bad deploy fails at start-up instead of on some player's frame.
+        """
+        directory = Path(directory)
+        paths = [directory / name for name in sorted(set(names))]
+        problems = [
+            problem for path in paths if (problem := check_image(path))
+        ]
+        if problems:
+            raise ValueError("bad assets: " + "; ".join(problems))
+
+        sizes = [path.stat().st_size for path in paths]
+        buffer = mmap.mmap(-1, max(1, sum(sizes)))
+        index: dict[str, slice] = {}
+        offset = 0
+        for path, size in zip(paths, sizes):
+            buffer[offset : offset + size] = path.read_bytes()
+            index[path.name] = slice(offset, offset + size)
+            offset += size
+        return cls(buffer, index)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    @property
+    def names(self) -> list[str]:
+        return list(self._index)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(s.stop - s.start for s in self._index.values())
+
+    def size_of(self, name: str) -> int:
+        where = self._index[name]
+        return where.stop - where.start
+
+    def view(self, name: str) -> memoryview:
+        """The image's bytes, without copying them."""
+        return memoryview(self._buffer)[self._index[name]]
+
+    def open(self, name: str) -> BundleReader:
+        return BundleReader(self.view(name))
+
+
+def optimize(
+    source: Path,
+    target: Path,
+    *,
+    quality: int,
+    max_side: int,
+) -> list[tuple[str, int, int]]:
+    """Re-encode every WebP in ``source`` into ``target``.
+
+    Returns ``(name, old size, new size)`` per image. An image is copied
+    unchanged when re-encoding would not make it smaller.
+    """
+    try:
+        from PIL import Image
+    except ImportError:
+        raise SystemExit(
+            "optimizing assets needs Pillow: pip install .[optimize]"
+        ) from None
+
+    target.mkdir(parents=True, exist_ok=True)
+    results: list[tuple[str, int, int]] = []
+    for path in sorted(source.glob("*.webp")):
+        original = path.read_bytes()
+        with Image.open(path) as image:
+            image.thumbnail((max_side, max_side))
+            encoded = io.BytesIO()
+            image.save(encoded, "WEBP", quality=quality, method=6)
+        data = encoded.getvalue()
+        if len(data) >= len(original):
+            data = original
+        (target / path.name).write_bytes(data)
+        results.append((path.name, len(original), len(data)))
+    return results
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m game.bundle",
+        description="Validate or shrink the game's images.",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    check = commands.add_parser("check", help="validate every frame image")
+    check.add_argument("--dir", type=Path, default=Path("assets"))
+    shrink = commands.add_parser("optimize", help="re-encode smaller webps")
+    shrink.add_argument("--dir", type=Path, default=Path("assets"))
+    shrink.add_argument("--out", type=Path, default=Path("assets-optimized"))
+    shrink.add_argument("--preset", choices=sorted(PRESETS), default="medium")
+    args = parser.parse_args(argv)
+
+    if args.command == "check":
+        bundle = AssetBundle.load(args.dir, referenced_images())
+        print(f"{len(bundle)} images, {bundle.nbytes / 1024:.0f} KiB")
+        for name in bundle.names:
+            print(f"  {name:<20} {bundle.size_of(name) / 1024:>8.1f} KiB")
+        return
+
+    quality, max_side = PRESETS[args.preset]
+    results = optimize(args.dir, args.out, quality=quality, max_side=max_side)
+    before = sum(old for _, old, _ in results)
+    after = sum(new for _, _, new in results)
+    for name, old, new in results:
+        print(f"  {name:<20} {old / 1024:>8.1f} -> {new / 1024:>8.1f} KiB")
+    if before:
+        print(
+            f"{len(results)} images, {before / 1024:.0f} -> "
+            f"{after / 1024:.0f} KiB ({after / before:.0%}) in {args.out}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Import and cold start times of the game core and the Discord adapter.
+
+Each target is imported in a fresh interpreter, ``--runs`` times, after
+one untimed run that leaves its bytecode cached. Import time is taken in
+the child around the ``import`` statement alone; cold start is the whole
+child process, from spawning the interpreter until it has exited. The
+child also reports how many modules the import loaded and whether
+discord.py was among them. ``--json`` prints one JSON object so runs can
+be stored and compared between commits, like ``game.bench``::
+
+    python -m game.coldstart --runs 20 --json > after.json
+
+Run it from the repository root. It exits with status 1 if ``game.core``
+loads discord.py.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from collections.abc import Sequence
+from typing import Any
+
+TARGETS = {
+    "core": "game.core",
+    "discord": "game.game",
+}
+
+_PROBE = """\
+import sys, time
+before = len(sys.modules)
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+loaded = len(sys.modules) - before
+import json
+print(json.dumps({{
+    "seconds": elapsed,
+    "modules": loaded,
+    "discord": "discord" in sys.modules,
+}}))
+"""
+
+
+def probe(module: str) -> tuple[float, dict[str, Any]]:
+    """Import ``module`` in a new interpreter; returns the process's wall
+    time and what the child measured."""
+    started = time.perf_counter()
+    child = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(module=module)],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    return time.perf_counter() - started, json.loads(child.stdout)
+
+
+def measure(module: str, runs: int) -> dict[str, Any]:
+    probe(module)
+    cold: list[float] = []
+    imports: list[float] = []
+    for _ in range(runs):
+        wall, result = probe(module)
+        cold.append(wall)
+        imports.append(result["seconds"])
+    return {
+        "module": module,
+        "import_p50": statistics.median(imports),
+        "import_min": min(imports),
+        "cold_start_p50": statistics.median(cold),
+        "cold_start_min": min(cold),
+        "modules": result["modules"],
+        "discord": result["discord"],
+    }
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m game.coldstart",
+        description="Time importing the game core and the Discord adapter.",
+    )
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args(argv)
+    if args.runs < 1:
+        parser.error("--runs must be at least 1")
+
+    try:
+        report = {
+            name: measure(module, args.runs)
+            for name, module in TARGETS.items()
+        }
+    except subprocess.CalledProcessError as exc:
+        raise SystemExit(f"import failed:\n{exc.stderr}") from exc
+    # The interpreter's own start-up, for reference.
+    report["python"] = measure("sys", args.runs)
+
+    if args.json:
+        print(json.dumps(report))
+    else:
+        for name, result in report.items():
+            print(
+                f"{name:8} {result['module']:10}"
+                f"  import p50 {result['import_p50'] * 1000:7.1f}ms"
+                f"  cold start p50 {result['cold_start_p50'] * 1000:7.1f}ms"
+                f"  {result['modules']:4} modules"
+                + ("  (loads discord)" if result["discord"] else "")
+            )
+    if report["core"]["discord"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
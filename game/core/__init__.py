@@ -0,0 +1,33 @@
+"""The rules of the game, without Discord.
+
+Nothing under ``game.core`` imports discord.py or aiohttp, or configures
+logging, so simulators, replays and tests can load the rules on their own
+(``python -m game.coldstart`` checks this and times the import). The bot's
+Discord adapter, ``game.game`` and ``game.view``, is built on top.
+"""
+
+from .clock import MONOTONIC, Clock, MonotonicClock, OffsetClock, VirtualClock
+from .enemy import Animatronic, Animatronics, EnemyAI
+from .eventlog import EventLog, Input
+from .images import State, get_current_image
+from .power import PowerMeter
+from .rng import GameRandom
+from .rules import FNAFGame
+
+__all__ = (
+    "MONOTONIC",
+    "Animatronic",
+    "Animatronics",
+    "Clock",
+    "EnemyAI",
+    "EventLog",
+    "FNAFGame",
+    "GameRandom",
+    "Input",
+    "MonotonicClock",
+    "OffsetClock",
+    "PowerMeter",
+    "State",
+    "VirtualClock",
+    "get_current_image",
+)
@@ -0,0 +1,199 @@
+"""Where the game gets its time from.
+
+Everything in the game core reads time from a ``Clock`` in game seconds
+instead of calling ``time.time()``:
+
+* ``MonotonicClock`` follows ``time.monotonic``, so wall-clock jumps
+  (NTP, DST, a suspended VM) no longer skip hours or stall the enemy. Its
+  ``speed`` runs the game faster than real time, e.g. ``speed=4`` for a
+  15-minute night event.
+* ``VirtualClock`` only moves when told to. Tests and replays jump from
+  one timer to the next, so a full five-night run takes milliseconds.
+* ``OffsetClock`` counts another clock's time from an ``origin``. Each
+  game reads its clock through one, so every time it stores is relative
+  to its own start and moving the origin shifts the whole game.
+"""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Protocol
+
+# asyncio is imported where it is used: waiting on a clock needs a running
+# event loop anyway, and replays and simulations never wait, so they skip
+# its import, most of the cost of importing ``game.core``.
+if TYPE_CHECKING:
+    import asyncio
+
+# Event loop passes to let woken tasks finish before the virtual clock
+# moves on; a game reacting to a timer awaits a handful of futures.
+SETTLE_STEPS = 20
+
+
+class Cancellable(Protocol):
+    def cancel(self) -> None: ...
+
+
+class Clock(Protocol):
+    # Game seconds per real second.
+    speed: float
+
+    def now(self) -> float:
+        """Current time in game seconds."""
+        ...
+
+    def call_later(
+        self,
+        delay: float,
+        callback: Callable[[], object],
+    ) -> Cancellable:
+        """Call ``callback`` after ``delay`` game seconds."""
+        ...
+
+    async def sleep(self, delay: float) -> None:
+        """Sleep for ``delay`` game seconds."""
+        ...
+
+
+class MonotonicClock:
+    def __init__(self, speed: float = 1.0) -> None:
+        if speed <= 0:
+            raise ValueError("speed must be positive")
+        self.speed = speed
+        self._origin = time.monotonic()
+
+    def now(self) -> float:
+        return (time.monotonic() - self._origin) * self.speed
+
+    def call_later(
+        self,
+        delay: float,
+        callback: Callable[[], object],
+    ) -> asyncio.TimerHandle:
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        return loop.call_later(max(0.0, delay) / self.speed, callback)
+
+    async def sleep(self, delay: float) -> None:
+        import asyncio
+
+        await asyncio.sleep(max(0.0, delay) / self.speed)
+
+
+class OffsetClock:
+    def __init__(self, base: Clock, origin: float | None = None) -> None:
+        self.base = base
+        self.origin = base.now() if origin is None else origin
+
+    @property
+    def speed(self) -> float:
+        return self.base.speed
+
+    def now(self) -> float:
+        return self.base.now() - self.origin
+
+    def call_later(
+        self,
+        delay: float,
+        callback: Callable[[], object],
+    ) -> Cancellable:
+        return self.base.call_later(delay, callback)
+
+    async def sleep(self, delay: float) -> None:
+        await self.base.sleep(delay)
+
+
+@dataclass(order=True, slots=True)
+class _Timer:
+    when: float
+    seq: int
+    callback: Callable[[], object] = field(compare=False)
+    cancelled: bool = field(default=False, compare=False)
+
+    def cancel(self) -> None:
+        self.cancelled = True
+
+
+class VirtualClock:
+    """A clock that only advances through ``advance`` or ``run``."""
+
+    speed = 1.0
+
+    def __init__(self, start: float = 0.0) -> None:
+        self._now = start
+        self._timers: list[_Timer] = []
+        self._counter = itertools.count()
+
+    def now(self) -> float:
+        return self._now
+
+    def call_later(
+        self,
+        delay: float,
+        callback: Callable[[], object],
+    ) -> _Timer:
+        timer = _Timer(
+            self._now + max(0.0, delay), next(self._counter), callback
+        )
+        heapq.heappush(self._timers, timer)
+        return timer
+
+    async def sleep(self, delay: float) -> None:
+        import asyncio
+
+        future = asyncio.get_running_loop().create_future()
+        timer = self.call_later(
+            delay, lambda: future.done() or future.set_result(None)
+        )
+        try:
+            await future
+        finally:
+            timer.cancel()
+
+    def move_to(self, now: float) -> None:
+        """Set the time without firing timers, for code that never waits
+        on the clock (e.g. a replay applying events itself)."""
+        self._now = now
+
+    def next_timer(self) -> float | None:
+        """When the earliest pending timer fires, if there is one."""
+        while self._timers and self._timers[0].cancelled:
+            heapq.heappop(self._timers)
+        return self._timers[0].when if self._timers else None
+
+    async def advance(self, seconds: float) -> None:
+        """Move time forward by ``seconds``, firing every timer on the way
+        in order and letting the tasks it wakes run before the next."""
+        await self.run_until(self._now + seconds)
+
+    async def run_until(self, deadline: float) -> None:
+        await self._fire_until(deadline)
+        self._now = max(self._now, deadline)
+
+    async def run(self, limit: float = float("inf")) -> None:
+        """Jump from timer to timer until none are left or ``limit`` game
+        seconds have passed; time stops at the last timer fired."""
+        await self._fire_until(self._now + limit)
+
+    async def _fire_until(self, deadline: float) -> None:
+        await _settle()
+        while (when := self.next_timer()) is not None and when <= deadline:
+            timer = heapq.heappop(self._timers)
+            self._now = max(self._now, timer.when)
+            timer.callback()
+            await _settle()
+
+
+async def _settle() -> None:
+    import asyncio
+
+    for _ in range(SETTLE_STEPS):
+        await asyncio.sleep(0)
+
+
+MONOTONIC = MonotonicClock()
@@ -0,0 +1,272 @@
+from __future__ import annotations
+
+import math
+from collections.abc import Iterator, Mapping, Sequence
+from dataclasses import dataclass
+from typing import Any
+
+from config import KITCHEN_GRAPH, ROOM_GRAPH
+
+from .clock import MONOTONIC, Clock
+from .rng import GameRandom
+from .rooms import OFFICE, Occupancy
+
+# Game seconds between two move attempts.
+MOVE_INTERVAL = 4
+HALLS = frozenset({"left-hall", "right-hall"})
+
+
+@dataclass(frozen=True, slots=True)
+class Exits:
+    """Where ``move_enemy`` can go from one room."""
+
+    forward: tuple[str, ...]
+    retreat: tuple[str, ...]
+
+
+NO_EXITS = Exits((), ())
+
+
+def build_exits(graph: Mapping[str, Sequence[str]]) -> dict[str, Exits]:
+    exits: dict[str, Exits] = {}
+    for room, options in graph.items():
+        if not options:
+            exits[room] = NO_EXITS
+            continue
+        forward = tuple(r for r in options if r != "main-stage")
+        exits[room] = Exits(
+            forward=forward or tuple(options),
+            retreat=tuple(r for r in options if r != "office"),
+        )
+    return exits
+
+
+EXITS = build_exits(ROOM_GRAPH)
+
+
+@dataclass(frozen=True, slots=True)
+class Animatronic:
+    """One enemy of a roster: its route, where it starts each night, how
+    aggressive it is and the first night it plays."""
+
+    name: str
+    exits: Mapping[str, Exits]
+    start: str = "main-stage"
+    ai_level: int = 1
+    first_night: int = 1
+
+
+ALICE = Animatronic("alice", EXITS)
+# The single enemy of the first version of the game.
+CLASSIC = (ALICE,)
+ROSTER = (
+    ALICE,
+    Animatronic(
+        "hatter",
+        build_exits(KITCHEN_GRAPH),
+        start="kitchen",
+        ai_level=0,
+        first_night=3,
+    ),
+    Animatronic(
+        "cheshire",
+        EXITS,
+        start="side-stage",
+        ai_level=2,
+        first_night=5,
+    ),
+)
+
+
+class EnemyAI:
+    """Moves through ``ROOM_GRAPH`` towards the office.
+
+    A move attempt is due every ``MOVE_INTERVAL`` seconds, but only while
+    the current room has exits: ``next_move_time`` is infinite once the
+    enemy is in the office, so a game never wakes up just for the enemy.
+    """
+
+    def __init__(
+        self,
+        clock: Clock = MONOTONIC,
+        exits: Mapping[str, Exits] = EXITS,
+        rng: GameRandom | None = None,
+        *,
+        name: str = ALICE.name,
+        start: str = ALICE.start,
+        ai_level: int = ALICE.ai_level,
+    ) -> None:
+        self.clock = clock
+        self.exits = exits
+        self.rng = rng if rng is not None else GameRandom()
+        self.name = name
+        self.start = start
+        self.position = start
+        self.at_door = False
+        self.ai_level = ai_level
+        self.last_move_time = clock.now()
+
+    @classmethod
+    def play(
+        cls,
+        animatronic: Animatronic,
+        clock: Clock,
+        rng: GameRandom,
+    ) -> EnemyAI:
+        return cls(
+            clock,
+            animatronic.exits,
+            rng,
+            name=animatronic.name,
+            start=animatronic.start,
+            ai_level=animatronic.ai_level,
+        )
+
+    @property
+    def can_move(self) -> bool:
+        return self.exits.get(self.position, NO_EXITS) is not NO_EXITS
+
+    @property
+    def next_move_time(self) -> float:
+        if not self.can_move:
+            return math.inf
+        return self.last_move_time + MOVE_INTERVAL
+
+    def move_enemy(self, hour: int, at: float | None = None) -> None:
+        now = at if at is not None else self.clock.now()
+        if now < self.next_move_time:
+            return
+        self.last_move_time = now
+
+        ai_level = self.ai_level + hour
+        move_chance = min(0.1 * ai_level, 0.80)
+
+        if self.rng.random() > move_chance:
+            return
+
+        current = self.position
+        exits = self.exits[current]
+        if current in HALLS and self.rng.random() < 0.3:
+            self.position = self.rng.choice(exits.retreat)
+        elif current == "dining" and self.rng.random() < 0.2:
+            pass
+        else:
+            self.position = self.rng.choice(exits.forward)
+
+        if self.position == "office":
+            self.at_door = True
+
+    def reset(self, at: float | None = None) -> None:
+        self.position = self.start
+        self.at_door = False
+        self.last_move_time = at if at is not None else self.clock.now()
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "position": self.position,
+            "at_door": self.at_door,
+            "ai_level": self.ai_level,
+            "last_move_time": self.last_move_time,
+        }
+
+    def restore(self, state: dict[str, Any]) -> None:
+        self.position = state["position"]
+        self.at_door = state["at_door"]
+        self.ai_level = state["ai_level"]
+        self.last_move_time = state["last_move_time"]
+
+
+class Animatronics:
+    """The enemies of one night, in roster order.
+
+    They all start the night at the same time and try to move on the same
+    ``MOVE_INTERVAL`` grid, so one ``next_move_time`` covers all of them,
+    kept alongside a count of the ones that can still move. ``occupancy``
+    follows every move, so the rules and the display never have to look
+    at each enemy to know which rooms have one in them.
+    """
+
+    def __init__(
+        self,
+        clock: Clock,
+        rng: GameRandom,
+        roster: Sequence[Animatronic] = ROSTER,
+        night: int = 1,
+    ) -> None:
+        self.clock = clock
+        self.rng = rng
+        self.roster = roster
+        self.occupancy = Occupancy()
+        self._enemies: list[EnemyAI] = []
+        self._mobile = 0
+        self.last_move_time = clock.now()
+        self.reset(night)
+
+    def __iter__(self) -> Iterator[EnemyAI]:
+        return iter(self._enemies)
+
+    def __len__(self) -> int:
+        return len(self._enemies)
+
+    @property
+    def next_move_time(self) -> float:
+        if not self._mobile:
+            return math.inf
+        return self.last_move_time + MOVE_INTERVAL
+
+    @property
+    def at_door(self) -> bool:
+        return bool(self.occupancy.mask & OFFICE)
+
+    @property
+    def at_door_count(self) -> int:
+        return self.occupancy.count("office")
+
+    def move(self, hour: int, at: float) -> None:
+        """Give every enemy that can still move its move attempt."""
+        self.last_move_time = at
+        occupancy = self.occupancy
+        for enemy in self._enemies:
+            if not enemy.can_move:
+                continue
+            before = enemy.position
+            enemy.move_enemy(hour, at)
+            if enemy.position != before:
+                occupancy.leave(before)
+                occupancy.enter(enemy.position)
+                if not enemy.can_move:
+                    self._mobile -= 1
+
+    def reset(self, night: int, at: float | None = None) -> None:
+        """Start ``night`` with the roster's enemies that play it."""
+        now = at if at is not None else self.clock.now()
+        self._enemies = [
+            EnemyAI.play(animatronic, self.clock, self.rng)
+            for animatronic in self.roster
+            if animatronic.first_night <= night
+        ]
+        for enemy in self._enemies:
+            enemy.reset(now)
+        self.last_move_time = now
+        self._reindex()
+
+    def _reindex(self) -> None:
+        self.occupancy.clear()
+        self._mobile = 0
+        for enemy in self._enemies:
+            self.occupancy.enter(enemy.position)
+            self._mobile += enemy.can_move
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "last_move_time": self.last_move_time,
+            "enemies": [enemy.snapshot() for enemy in self._enemies],
+        }
+
+    def restore(self, state: dict[str, Any], night: int) -> None:
+        self.reset(night, state["last_move_time"])
+        for enemy, enemy_state in zip(
+            self._enemies, state["enemies"], strict=True
+        ):
+            enemy.restore(enemy_state)
+        self._reindex()
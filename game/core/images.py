@@ -0,0 +1,104 @@
+"""What the player sees: the display state and the image for it.
+
+Everything here depends only on the game, so simulators and replays can
+pick images without loading Discord; ``game.utils`` builds the embed.
+Images are picked from the rooms enemies are in, a bitset over
+``ROOM_GRAPH`` (see ``rooms``), so it takes the same few operations
+however many enemies there are.
+"""
+
+from __future__ import annotations
+
+import itertools
+from dataclasses import dataclass
+
+from .rooms import ROOM_BITS, room_mask
+
+
+@dataclass(frozen=True, slots=True)
+class State:
+    """Everything the display depends on.
+
+    Hashable and cheap to compare, so renders can be memoized on it.
+    """
+
+    game_over: bool
+    won: bool
+    night: int
+    max_nights: int
+    hour: int
+    power: float
+    camera_on: bool
+    current_camera: int
+    # ``ROOM_BITS`` of every room with an enemy in it.
+    occupancy: int
+    door_closed: bool
+    light_on: bool
+
+
+CAMERA_MAP: dict[int, tuple[str, str]] = {
+    1: ("1M.webp", "main-stage"),
+    2: ("2S.webp", "side-stage"),
+    3: ("3K.webp", "kitchen"),
+    4: ("4D.webp", "dining"),
+    5: ("5R.webp", "right-hall"),
+    6: ("6L.webp", "left-hall"),
+}
+# Per camera: the bit of the room it shows, and its image without and
+# with an enemy in view.
+CAMERAS: dict[int, tuple[int, str, str]] = {
+    camera: (ROOM_BITS[room], image, image.replace(".webp", "E.webp"))
+    for camera, (image, room) in CAMERA_MAP.items()
+}
+# The light shows enemies in either hall.
+LIGHT_ROOMS = room_mask(("left-hall", "right-hall"))
+
+
+def get_current_image(game_state: State) -> str:
+    if game_state.game_over:
+        return "jumpscare.webp"
+    elif not game_state.camera_on:
+        if game_state.door_closed:
+            return "closedDoor.webp"
+        elif game_state.light_on:
+            if game_state.occupancy & LIGHT_ROOMS:
+                return "lightE.webp"
+            else:
+                return "light.webp"
+        else:
+            return "default.webp"
+    else:
+        room, image, image_with_enemy = CAMERAS.get(
+            game_state.current_camera,
+            CAMERAS[1],
+        )
+        return image_with_enemy if game_state.occupancy & room else image
+
+
+def referenced_images() -> frozenset[str]:
+    """Every image ``get_current_image`` can return."""
+    # Each image depends on at most one room test, so single rooms and
+    # no room at all cover every occupancy.
+    occupancies = [0, *ROOM_BITS.values()]
+    return frozenset(
+        get_current_image(
+            State(
+                game_over=game_over,
+                won=False,
+                night=1,
+                max_nights=1,
+                hour=0,
+                power=0.0,
+                camera_on=camera_on,
+                current_camera=camera,
+                occupancy=occupancy,
+                door_closed=door_closed,
+                light_on=light_on,
+            )
+        )
+        for game_over, camera_on, door_closed, light_on in itertools.product(
+            (False, True), repeat=4
+        )
+        for camera in CAMERA_MAP
+        for occupancy in occupancies
+    )
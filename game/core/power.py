@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import math
+from typing import Any
+
+from .clock import Clock
+
+# Power per game second: the office always draws a little, each system
+# on top of that draws more. Same totals as the old 5-second drain of
+# 0.5 + 1 (door) + 0.5 (light) + 0.5 (camera).
+BASE_RATE = 0.1
+DOOR_RATE = 0.2
+LIGHT_RATE = 0.1
+CAMERA_RATE = 0.1
+
+
+def drain_rate(door: bool, light: bool, camera: bool) -> float:
+    return (
+        BASE_RATE
+        + (DOOR_RATE if door else 0.0)
+        + (LIGHT_RATE if light else 0.0)
+        + (CAMERA_RATE if camera else 0.0)
+    )
+
+
+class PowerMeter:
+    """Remaining power as a function of time.
+
+    Only the level at the start of the current interval and the rate
+    since then are stored. Changing the rate closes the interval; reading
+    ``level`` computes the value on demand, so nothing has to tick while
+    the rate stays the same and the moment power runs out is known ahead
+    of time.
+
+    Every change can be made ``at`` an explicit game time instead of now,
+    which is how the game applies its rules at the exact times they were
+    due. A change dated in the future (the start of the next night, say)
+    holds the level until then.
+    """
+
+    def __init__(self, clock: Clock, level: float = 100.0) -> None:
+        self.clock = clock
+        self._level = level
+        self._since = clock.now()
+        self._rate = BASE_RATE
+
+    @property
+    def rate(self) -> float:
+        return self._rate
+
+    @property
+    def level(self) -> float:
+        return self.level_at(self.clock.now())
+
+    def level_at(self, at: float) -> float:
+        elapsed = max(0.0, at - self._since)
+        return max(0.0, self._level - self._rate * elapsed)
+
+    @property
+    def empty_at(self) -> float:
+        """Game time at which power reaches zero at the current rate."""
+        if self._level <= 0:
+            return self._since
+        if self._rate <= 0:
+            return math.inf
+        return self._since + self._level / self._rate
+
+    def _close(self, at: float | None) -> None:
+        if at is None:
+            at = self.clock.now()
+        self._level = self.level_at(at)
+        self._since = max(self._since, at)
+
+    def set_rate(self, rate: float, at: float | None = None) -> None:
+        if rate != self._rate:
+            self._close(at)
+            self._rate = rate
+
+    def spend(self, amount: float, at: float | None = None) -> None:
+        self._close(at)
+        self._level = max(0.0, self._level - amount)
+
+    def reset(self, level: float, at: float | None = None) -> None:
+        self._level = level
+        self._since = at if at is not None else self.clock.now()
+
+    def snapshot(self) -> dict[str, Any]:
+        return {"level": self._level, "since": self._since, "rate": self._rate}
+
+    def restore(self, state: dict[str, Any]) -> None:
+        self._level = state["level"]
+        self._since = state["since"]
+        self._rate = state["rate"]
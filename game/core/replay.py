@@ -0,0 +1,199 @@
+"""Rebuild games from their seed and event log.
+
+``replay`` runs a fresh ``FNAFGame`` with the log's seed on a
+``VirtualClock`` and applies each logged press at its time, with every
+rule due in between applied by ``advance`` exactly as in the live game.
+Nothing sleeps and nothing talks to Discord, so a whole game replays in
+about a millisecond.
+
+Run ``python -m game.core.replay --user <id>`` to walk through a player's last
+finished game, optionally stopping ``--at`` some game time, or without
+``--user`` to replay every archived game and check that each one ends the
+way it was recorded.
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import sqlite3
+import time
+from collections.abc import Sequence
+from dataclasses import dataclass
+
+from .clock import Clock, VirtualClock
+from .eventlog import ACTIONS, VERSION, EventLog, Input
+from .rules import FNAFGame
+
+_ACTION_NAMES = {kind: action for action, kind in ACTIONS.items()}
+
+
+@dataclass(frozen=True, slots=True)
+class NightResult:
+    time: float
+    night: int
+    outcome: str
+    power: float
+
+
+class ReplayedGame(FNAFGame):
+    """A game that keeps what happened to each night."""
+
+    def __init__(
+        self,
+        clock: Clock,
+        *,
+        seed: int | None = None,
+        version: int = VERSION,
+    ) -> None:
+        super().__init__(clock, seed=seed, version=version)
+        self.nights: list[NightResult] = []
+
+    def night_finished(self, outcome: str, at: float, power: float) -> None:
+        self.nights.append(NightResult(at, self.night, outcome, power))
+
+    @property
+    def result(self) -> str:
+        if self.won or self.game_over:
+            return self.nights[-1].outcome
+        if self.stopped_at is not None:
+            return "quit"
+        return "running"
+
+
+def replay(log: EventLog, until: float = math.inf) -> ReplayedGame:
+    """The game recorded in ``log`` as of game time ``until``, or once it
+    ended."""
+    clock = VirtualClock()
+    game = ReplayedGame(clock, seed=log.seed, version=log.version)
+    game.events = log
+    game.game_active = True
+    end = 0.0
+    for event in log:
+        if event.time > until:
+            break
+        game.advance(event.time)
+        if not game.game_active:
+            break
+        game.apply(event.input, event.arg, event.time)
+        end = event.time
+    game.advance(until)
+    if game.stopped_at is not None:
+        end = game.stopped_at
+    elif math.isfinite(until):
+        end = until
+    clock.move_to(end)
+    return game
+
+
+def describe_input(kind: Input, arg: int) -> str:
+    action = _ACTION_NAMES[kind]
+    return f"{action} {arg}" if kind is Input.CAMERA else action
+
+
+def describe_state(game: FNAFGame) -> str:
+    enemies = ", ".join(
+        f"{enemy.name} in {enemy.position}" for enemy in game.enemies
+    )
+    return (
+        f"night {game.night}, hour {game.hour}, power {game.power:.1f}%, "
+        f"enemies ({enemies}), "
+        f"door {'closed' if game.door_closed else 'open'}, "
+        f"light {'on' if game.light_on else 'off'}, "
+        f"camera {game.current_camera if game.camera_on else 'off'}"
+    )
+
+
+def timeline(game: ReplayedGame) -> list[tuple[float, str]]:
+    entries = [
+        (event.time, describe_input(event.input, event.arg))
+        for event in game.events
+    ]
+    entries += [
+        (result.time, f"night {result.night}: {result.outcome}")
+        for result in game.nights
+    ]
+    return sorted(entries, key=lambda entry: entry[0])
+
+
+def load(
+    path: str,
+    user_id: int | None = None,
+    limit: int | None = None,
+) -> list[tuple[int, int, str, EventLog]]:
+    """Archived logs as ``(id, user_id, outcome, log)``, newest first."""
+    db = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        query = "SELECT id, user_id, outcome, log FROM game_logs"
+        params: tuple[int, ...] = ()
+        if user_id is not None:
+            query += " WHERE user_id = ?"
+            params = (user_id,)
+        query += " ORDER BY finished_at DESC"
+        if limit is not None:
+            query += f" LIMIT {int(limit)}"
+        return [
+            (row_id, user, outcome, EventLog.from_bytes(log))
+            for row_id, user, outcome, log in db.execute(query, params)
+        ]
+    finally:
+        db.close()
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m game.core.replay",
+        description="Replay archived games from their event logs.",
+    )
+    parser.add_argument("--db", default="games.db")
+    parser.add_argument("--user", type=int, help="replay this player's game")
+    parser.add_argument(
+        "--at",
+        type=float,
+        default=math.inf,
+        help="stop at this many game seconds in",
+    )
+    parser.add_argument("--limit", type=int, help="replay at most N games")
+    args = parser.parse_args(argv)
+
+    if args.user is not None:
+        games = load(args.db, args.user, args.limit or 1)
+        if not games:
+            raise SystemExit(f"no archived games for user {args.user}")
+        for row_id, user_id, outcome, log in games:
+            game = replay(log, args.at)
+            print(
+                f"game {row_id} of user {user_id}: recorded {outcome}, "
+                f"seed {log.seed}, {len(log)} inputs in {log.nbytes} bytes"
+            )
+            for at, what in timeline(game):
+                if at <= args.at:
+                    print(f"  {at:9.3f}s  {what}")
+            print(f"  {game.result}: {describe_state(game)}")
+        return
+
+    games = load(args.db, limit=args.limit)
+    started = time.perf_counter()
+    played = 0.0
+    mismatches: list[str] = []
+    for row_id, user_id, outcome, log in games:
+        game = replay(log, args.at)
+        played += game.clock.now()
+        if math.isinf(args.at) and game.result != outcome:
+            mismatches.append(
+                f"game {row_id} of user {user_id}: recorded {outcome}, "
+                f"replayed {game.result}"
+            )
+    elapsed = time.perf_counter() - started
+    print(
+        f"{len(games)} games, {played / 3600:.1f} game hours replayed in "
+        f"{elapsed:.3f}s ({played / max(elapsed, 1e-9):,.0f}x real time)"
+    )
+    for mismatch in mismatches:
+        print(f"  {mismatch}")
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
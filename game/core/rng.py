@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+import random
+from collections.abc import Sequence
+from typing import TypeVar
+
+T = TypeVar("T")
+
+
+class GameRandom:
+    """One game's random numbers, reproducible from ``seed``.
+
+    Every value comes from exactly one ``random()`` call, so the
+    generator's whole state is the seed plus the number of ``draws`` so
+    far. A snapshot stores those two numbers instead of the Mersenne
+    Twister's 2.5 KB of state.
+    """
+
+    def __init__(self, seed: int | None = None, draws: int = 0) -> None:
+        self.seed = seed if seed is not None else random.getrandbits(63)
+        self._random = random.Random(self.seed)
+        for _ in range(draws):
+            self._random.random()
+        self.draws = draws
+
+    def random(self) -> float:
+        self.draws += 1
+        return self._random.random()
+
+    def choice(self, seq: Sequence[T]) -> T:
+        return seq[int(self.random() * len(seq))]
@@ -0,0 +1,53 @@
+"""Rooms as bits, so any set of rooms is one ``int``.
+
+Room ``ROOMS[i]`` is bit ``1 << i``. ``Occupancy`` keeps the set of rooms
+with at least one enemy in them up to date as enemies move, so whether a
+camera or the light shows an enemy is one ``&`` however many there are.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+
+from config import ROOM_GRAPH
+
+ROOMS: tuple[str, ...] = tuple(ROOM_GRAPH)
+ROOM_INDEX: dict[str, int] = {room: i for i, room in enumerate(ROOMS)}
+ROOM_BITS: dict[str, int] = {room: 1 << i for room, i in ROOM_INDEX.items()}
+
+
+def room_mask(rooms: Iterable[str]) -> int:
+    """The bits of ``rooms``; rooms not in ``ROOM_GRAPH`` have none."""
+    mask = 0
+    for room in rooms:
+        mask |= ROOM_BITS.get(room, 0)
+    return mask
+
+
+OFFICE = ROOM_BITS["office"]
+
+
+class Occupancy:
+    """How many enemies are in each room, and ``mask``, the rooms with
+    any. Every update is constant time."""
+
+    def __init__(self) -> None:
+        self.mask = 0
+        self._counts = [0] * len(ROOMS)
+
+    def count(self, room: str) -> int:
+        return self._counts[ROOM_INDEX[room]]
+
+    def enter(self, room: str) -> None:
+        self._counts[ROOM_INDEX[room]] += 1
+        self.mask |= ROOM_BITS[room]
+
+    def leave(self, room: str) -> None:
+        index = ROOM_INDEX[room]
+        self._counts[index] -= 1
+        if not self._counts[index]:
+            self.mask &= ~ROOM_BITS[room]
+
+    def clear(self) -> None:
+        self.mask = 0
+        self._counts = [0] * len(ROOMS)
@@ -0,0 +1,355 @@
+"""The game itself, without Discord.
+
+``FNAFGame`` holds one game's state and applies its rules. Each rule is
+due at a time that follows from the state alone: enemy moves on a
+``MOVE_INTERVAL`` grid, door attack rolls every ``DOOR_ATTACK_INTERVAL``
+from the first enemy's arrival, and the end of the night, the power outage and
+the death that follows it at fixed times. ``advance`` applies every rule
+due up to a time, in order and at the time it was due, however late it
+is called.
+
+Each night's enemies come from the roster of the game's rules version
+(``ROSTERS``) and move as one ``Animatronics`` group, whose room
+occupancy bitset is all the door attacks and the display look at.
+
+Player input goes through ``press``, which first catches the rules up to
+the time of the press and logs the press in ``events``. With every random
+number taken from the game's seeded ``rng``, a game is fully determined
+by its seed and its event log; ``replay`` rebuilds one from them.
+"""
+
+from __future__ import annotations
+
+import base64
+import math
+from collections.abc import Callable
+from typing import Any
+
+from .clock import Clock
+from .enemy import CLASSIC, ROSTER, Animatronic, Animatronics
+from .eventlog import ACTIONS, VERSION, EventLog, Input, to_ms
+from .images import State
+from .power import PowerMeter, drain_rate
+from .rng import GameRandom
+
+MAX_NIGHTS = 5
+HOURS_PER_NIGHT = 6
+# Game seconds per hour.
+HOUR_LENGTH = 60
+# Game seconds between door attack rolls while enemies are at the door.
+DOOR_ATTACK_INTERVAL = 1
+DOOR_ATTACK_CHANCE = 0.2
+# Game seconds between two nights, and from a power outage to the end.
+NIGHT_BREAK = 5
+OUTAGE_DELAY = 1
+
+# The enemies of each version of the rules (see ``eventlog.VERSION``).
+ROSTERS: dict[int, tuple[Animatronic, ...]] = {
+    1: CLASSIC,
+    2: ROSTER,
+}
+
+
+class FNAFGame:
+    def __init__(
+        self,
+        clock: Clock,
+        *,
+        seed: int | None = None,
+        version: int = VERSION,
+    ) -> None:
+        self.clock = clock
+        self.rng = GameRandom(seed)
+        self.events = EventLog(self.rng.seed, version)
+
+        self.night = 1
+        self.max_nights = MAX_NIGHTS
+        self.game_over = False
+        self.won = False
+        self.game_active = False
+        self.hour_length = HOUR_LENGTH
+        # Hour and power are computed from these when read. Once the game
+        # ends ``stopped_at`` freezes them.
+        self.night_started = self.clock.now()
+        self.stopped_at: float | None = None
+        self.meter = PowerMeter(self.clock)
+
+        self._camera_on = False
+        self.current_camera = 1
+
+        self.enemies = Animatronics(self.clock, self.rng, ROSTERS[version])
+        self._door_closed = False
+        self._light_on = False
+
+        self.next_attack_at = math.inf
+        self.outage_at: float | None = None
+
+    def hour_at(self, at: float) -> int:
+        elapsed = at - self.night_started
+        return min(HOURS_PER_NIGHT, max(0, int(elapsed // self.hour_length)))
+
+    @property
+    def hour(self) -> int:
+        now = (
+            self.stopped_at
+            if self.stopped_at is not None
+            else self.clock.now()
+        )
+        return self.hour_at(now)
+
+    @property
+    def night_ends_at(self) -> float:
+        return self.night_started + HOURS_PER_NIGHT * self.hour_length
+
+    @property
+    def power(self) -> float:
+        return self.meter.level
+
+    @power.setter
+    def power(self, level: float) -> None:
+        self.meter.reset(level)
+
+    # Every toggle closes the current power interval at the old rate.
+    @property
+    def door_closed(self) -> bool:
+        return self._door_closed
+
+    @door_closed.setter
+    def door_closed(self, value: bool) -> None:
+        self._door_closed = value
+        self._update_drain()
+
+    @property
+    def light_on(self) -> bool:
+        return self._light_on
+
+    @light_on.setter
+    def light_on(self, value: bool) -> None:
+        self._light_on = value
+        self._update_drain()
+
+    @property
+    def camera_on(self) -> bool:
+        return self._camera_on
+
+    @camera_on.setter
+    def camera_on(self, value: bool) -> None:
+        self._camera_on = value
+        self._update_drain()
+
+    def _update_drain(self, at: float | None = None) -> None:
+        if self.stopped_at is None:
+            self.meter.set_rate(
+                drain_rate(self._door_closed, self._light_on, self._camera_on),
+                at,
+            )
+
+    def stop(self, at: float | None = None) -> None:
+        """Freeze the hour and power, e.g. once the game is over."""
+        if self.stopped_at is None:
+            self.stopped_at = at if at is not None else self.clock.now()
+            self.meter.set_rate(0.0, self.stopped_at)
+
+    @property
+    def enemy_at_door(self) -> bool:
+        return self.enemies.at_door
+
+    # Called as things happen, for subclasses to show or record them.
+    def night_finished(self, outcome: str, at: float, power: float) -> None:
+        """A night ended: ``survived``, ``won``, ``quit`` or the cause of
+        death."""
+
+    def power_ran_out(self, at: float) -> None:
+        """The power just ran out; the game ends ``OUTAGE_DELAY`` later."""
+
+    def next_rule(self) -> tuple[float, Callable[[float], None]]:
+        """The earliest rule due and when; ties go to the first listed."""
+        if self.outage_at is not None:
+            # Nothing else happens in the dark.
+            return self.outage_at + OUTAGE_DELAY, self._outage_death
+        return min(
+            (
+                (self.night_ends_at, self._end_night),
+                (self.meter.empty_at, self._power_out),
+                (self.next_attack_at, self._roll_attack),
+                (self.enemies.next_move_time, self._move_enemies),
+            ),
+            key=lambda rule: rule[0],
+        )
+
+    def advance(self, until: float) -> None:
+        """Apply every rule due by game time ``until``, in time order."""
+        while self.game_active:
+            when, rule = self.next_rule()
+            if when > until:
+                return
+            rule(when)
+
+    def _end_night(self, at: float) -> None:
+        power = self.meter.level_at(at)
+        if self.night >= self.max_nights:
+            self.stop(at)
+            self.won = True
+            self.game_active = False
+            self.night_finished("won", at, power)
+            return
+
+        self.night_finished("survived", at, power)
+        self.night += 1
+        # Hour 0 and full power hold through the break between nights.
+        self.night_started = at + NIGHT_BREAK
+        self._door_closed = False
+        self._light_on = False
+        self.meter.reset(100, self.night_started)
+        self._update_drain(self.night_started)
+        self.enemies.reset(self.night, self.night_started)
+        self.next_attack_at = math.inf
+
+    def _power_out(self, at: float) -> None:
+        self.outage_at = at
+        self._door_closed = False
+        self._light_on = False
+        self._camera_on = False
+        self._update_drain(at)
+        self.power_ran_out(at)
+
+    def _outage_death(self, at: float) -> None:
+        self._end_game(at, "power_outage")
+
+    def _roll_attack(self, at: float) -> None:
+        self.next_attack_at = at + DOOR_ATTACK_INTERVAL
+        if self._door_closed:
+            return
+        # One draw for every enemy at the door: the game ends if any of
+        # them attacks.
+        at_door = self.enemies.at_door_count
+        chance = (
+            DOOR_ATTACK_CHANCE
+            if at_door == 1
+            else 1 - (1 - DOOR_ATTACK_CHANCE) ** at_door
+        )
+        if self.rng.random() < chance:
+            self._end_game(at, "door_attack")
+
+    def _move_enemies(self, at: float) -> None:
+        self.enemies.move(self.hour_at(at), at)
+        if self.enemies.at_door and self.next_attack_at == math.inf:
+            # The first roll comes right as it arrives.
+            self.next_attack_at = at
+
+    def _end_game(self, at: float, reason: str) -> None:
+        power = self.meter.level_at(at)
+        self.stop(at)
+        self.game_over = True
+        self.game_active = False
+        self.night_finished(reason, at, power)
+
+    def press(self, action: str, arg: int | None = None) -> None:
+        """Apply and log a button press (see ``eventlog.ACTIONS``)."""
+        if not self.game_active:
+            return
+        # Logged to the millisecond, so the press is applied at that time
+        # too, and rounded up so it never lands before rules already
+        # applied.
+        ms = max(to_ms(self.clock.now()), self.events.last_ms)
+        at = ms / 1000
+        self.advance(at)
+        if not self.game_active:
+            return
+        kind = ACTIONS[action]
+        self.events.append(ms, kind, arg or 0)
+        self.apply(kind, arg or 0, at)
+
+    def apply(self, kind: Input, arg: int, at: float) -> None:
+        """Apply one logged input at game time ``at``."""
+        has_power = self.meter.level_at(at) > 0
+        if kind is Input.LIGHT:
+            if has_power and not self._door_closed:
+                self._light_on = not self._light_on
+        elif kind is Input.DOOR:
+            if has_power:
+                self._door_closed = not self._door_closed
+        elif kind is Input.CAMERAS:
+            if has_power:
+                self._camera_on = True
+        elif kind is Input.CAMERA:
+            self.current_camera = arg
+            self.meter.spend(1, at)
+        elif kind is Input.EXIT:
+            self._camera_on = False
+        elif kind is Input.QUIT:
+            power = self.meter.level_at(at)
+            self.stop(at)
+            self.game_active = False
+            self.night_finished("quit", at, power)
+        self._update_drain(at)
+
+    def get_game_state(self) -> State:
+        return State(
+            game_over=self.game_over,
+            won=self.won,
+            night=self.night,
+            max_nights=self.max_nights,
+            hour=self.hour,
+            # Shown in half percent steps, rounded up so it reads 0 only
+            # once the power is really out.
+            power=math.ceil(self.power * 2 - 1e-9) / 2,
+            camera_on=self.camera_on,
+            current_camera=self.current_camera,
+            occupancy=self.enemies.occupancy.mask,
+            door_closed=self.door_closed,
+            light_on=self.light_on,
+        )
+
+    def snapshot(self) -> dict[str, Any]:
+        """Everything needed to rebuild this game after a restart."""
+        return {
+            "seed": self.rng.seed,
+            "draws": self.rng.draws,
+            "events": base64.b64encode(self.events.to_bytes()).decode(),
+            "night": self.night,
+            "max_nights": self.max_nights,
+            "power": self.meter.snapshot(),
+            "game_over": self.game_over,
+            "won": self.won,
+            "hour_length": self.hour_length,
+            "camera_on": self._camera_on,
+            "current_camera": self.current_camera,
+            "door_closed": self._door_closed,
+            "light_on": self._light_on,
+            "enemies": self.enemies.snapshot(),
+            "night_started": self.night_started,
+            "stopped_at": self.stopped_at,
+            "next_attack_at": (
+                self.next_attack_at
+                if self.next_attack_at != math.inf
+                else None
+            ),
+            "outage_at": self.outage_at,
+        }
+
+    def restore(self, state: dict[str, Any]) -> None:
+        """Load a snapshot. Its times are game times, so the clock must
+        read what it did when the snapshot was taken."""
+        self.rng = GameRandom(state["seed"], state["draws"])
+        self.events = EventLog.from_bytes(base64.b64decode(state["events"]))
+        self.night = state["night"]
+        self.max_nights = state["max_nights"]
+        self.meter.restore(state["power"])
+        self.game_over = state["game_over"]
+        self.won = state["won"]
+        self.hour_length = state["hour_length"]
+        self._camera_on = state["camera_on"]
+        self.current_camera = state["current_camera"]
+        self._door_closed = state["door_closed"]
+        self._light_on = state["light_on"]
+        self.enemies.rng = self.rng
+        self.enemies.roster = ROSTERS[self.events.version]
+        self.enemies.restore(state["enemies"], self.night)
+        self.night_started = state["night_started"]
+        self.stopped_at = state["stopped_at"]
+        next_attack_at = state["next_attack_at"]
+        self.next_attack_at = (
+            next_attack_at if next_attack_at is not None else math.inf
+        )
+        self.outage_at = state["outage_at"]
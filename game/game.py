@@ -1,221 +1,379 @@
-from __future__ import annotations
-
-import asyncio
-import os
-import random
-import time
-from typing import Any, MutableMapping
-
-import discord
-
-from config import logger
-
-from .enemy import EnemyAI
-from .utils import create_embed
-from .view import FNAFGameView
-
-
-class FNAFDiscordGame:
-    def __init__(
-        self,
-        channel: discord.TextChannel,
-        user: discord.Member,
-        active_games: MutableMapping[int, FNAFDiscordGame],
-    ) -> None:
-        self.channel = channel
-        self.user = user
-        self.active_games = active_games
-        self.game_message: discord.Message | None = None
-        self.view: FNAFGameView | None = None
-
-        self.night = 1
-        self.max_nights = 5
-        self.hour = 0
-        self.power = 100.0
-        self.game_over = False
-        self.won = False
-        self.game_active = False
-        self.hour_length = 60
-
-        self.camera_on = False
-        self.current_camera = 1
-
-        self.enemy = EnemyAI()
-        self.door_closed = False
-        self.light_on = False
-
-        self.last_power_drain = time.time()
-        self.last_hour_update = time.time()
-        self.last_update_time = 0.0
-        self.game_task: asyncio.Task[None] | None = None
-
-    @property
-    def enemy_position(self) -> str:
-        return self.enemy.position
-
-    @property
-    def enemy_at_door(self) -> bool:
-        return self.enemy.at_door
-
-    def get_game_state(self) -> dict[str, Any]:
-        return {
-            "game_over": self.game_over,
-            "won": self.won,
-            "night": self.night,
-            "max_nights": self.max_nights,
-            "hour": self.hour,
-            "power": self.power,
-            "camera_on": self.camera_on,
-            "current_camera": self.current_camera,
-            "enemy_position": self.enemy_position,
-            "door_closed": self.door_closed,
-            "light_on": self.light_on,
-        }
-
-    async def update_game_display(self, force: bool = False) -> None:
-        now = time.time()
-        if not force and now - self.last_update_time < 6:
-            return
-        self.last_update_time = now
-
-        if not self.game_message:
-            return
-
-        embed, image_file = create_embed(self.get_game_state())
-        assert self.view is not None
-        self.view.update_buttons()
-        file_path = f"assets/{image_file}"
-        file = (
-            discord.File(file_path, filename=image_file)
-            if os.path.exists(file_path)
-            else None
-        )
-
-        try:
-            await self.game_message.edit(
-                embed=embed, view=self.view, attachments=[file] if file else []
-            )
-        except Exception:
-            logger.warning("Failed to update game message")
-
-    def drain_power(self) -> None:
-        now = time.time()
-        if now - self.last_power_drain >= 5:
-            self.last_power_drain = now
-            drain = (
-                0.5
-                + (1 if self.door_closed else 0)
-                + (0.5 if self.light_on else 0)
-                + (0.5 if self.camera_on else 0)
-            )
-            self.power = max(0.0, self.power - drain)
-            if self.power == 0:
-                asyncio.create_task(self.power_outage())
-
-    async def power_outage(self) -> None:
-        self.door_closed = False
-        self.light_on = False
-        self.camera_on = False
-        await self.update_game_display(force=True)
-        await asyncio.sleep(1)
-        await self.handle_game_over("power_outage")
-
-    async def handle_game_over(self, reason: str) -> None:
-        self.game_over = True
-        self.game_active = False
-        self.enemy.at_door = True
-        await self.update_game_display(force=True)
-
-    async def game_loop(self) -> None:
-        while self.game_active and not self.game_over and not self.won:
-            now = time.time()
-
-            if now - self.last_hour_update >= self.hour_length:
-                self.hour += 1
-                self.last_hour_update = now
-                if self.hour >= 6:
-                    await self.next_night()
-                    continue
-
-            self.enemy.move_enemy(self.hour)
-            self.drain_power()
-
-            if (
-                self.enemy_at_door
-                and not self.door_closed
-                and random.random() < 0.2
-            ):
-                await self.handle_game_over("door_attack")
-                break
-
-            await self.update_game_display()
-            await asyncio.sleep(1)
-
-        await self.update_game_display(force=True)
-
-    async def next_night(self) -> None:
-        if self.night >= self.max_nights:
-            self.won = True
-            self.game_active = False
-            await self.update_game_display(force=True)
-            return
-
-        self.night += 1
-        self.hour = 0
-        self.power = 100
-        self.enemy.reset()
-        self.door_closed = False
-        self.light_on = False
-
-        assert self.game_message is not None
-        await self.game_message.edit(
-            embed=discord.Embed(
-                title=f"🌙 Night {self.night - 1} Complete!",
-                description="Prepare for the next night...",
-                color=0xFFD700,
-            ),
-            view=None,
-        )
-        await asyncio.sleep(5)
-
-        self.last_hour_update = time.time()
-        await self.update_game_display(force=True)
-
-    async def open_camera(self) -> None:
-        self.camera_on = True
-
-    async def switch_camera(self, n: int) -> None:
-        self.current_camera = n
-        self.power = max(0, self.power - 1)
-
-    async def exit_camera(self) -> None:
-        self.camera_on = False
-
-    async def restart_game(self, interaction: discord.Interaction) -> None:
-        assert self.game_message is not None
-        await self.game_message.edit(embed=None, view=None)
-        new_game = FNAFDiscordGame(self.channel, self.user, self.active_games)
-        self.active_games[self.user.id] = new_game
-        await new_game.start_game()
-
-    async def quit_game(self, interaction: discord.Interaction) -> None:
-        self.game_active = False
-        assert self.game_message is not None
-        await self.game_message.edit(
-            embed=discord.Embed(title="👋 Thanks for playing!"),
-            view=None,
-        )
-        _ = self.active_games.pop(self.user.id, None)
-
-    async def start_game(
-        self,
-        existing_message: discord.Message | None = None,
-    ) -> None:
-        self.game_active = True
-        embed, img = create_embed(self.get_game_state())
-        self.view = FNAFGameView(self)
-        file = discord.File(f"assets/{img}", filename=img)
-        self.game_message = await self.channel.send(
-            embed=embed, view=self.view, file=file
-        )
-        self.game_task = asyncio.create_task(self.game_loop())
+from __future__ import annotations
+
+import asyncio
+import datetime
+import time
+from collections.abc import Coroutine, MutableMapping
+from typing import Any
+
+import discord
+
+from config import logger
+
+from .assets import AssetRegistry
+from .core.clock import OffsetClock
+from .core.rules import FNAFGame
+from .governor import LoadGovernor
+from .metrics import (
+    ASSET_BYTES_ATTACHED,
+    CLICK_TO_FRAME,
+    INTERACTION_FALLBACKS,
+    NIGHTS,
+)
+from .outbound import EditQueue, Priority
+from .render import Frame, RenderPipeline
+from .scheduler import TickScheduler
+from .spectate import Spectators
+from .stats import StatsStore
+from .utils import create_embed
+from .view import FNAFGameView
+
+# Real seconds between periodic display refreshes. Discord's rate limits
+# do not speed up with the clock, so this one is scaled by its speed.
+REFRESH_INTERVAL = 6
+# Discord drops interaction responses after 3 seconds; leave some slack
+# for clock skew and the round trip itself.
+INTERACTION_DEADLINE = datetime.timedelta(seconds=2.5)
+
+
+class FNAFDiscordGame(FNAFGame):
+    clock: OffsetClock
+
+    def __init__(
+        self,
+        channel: discord.TextChannel,
+        user: discord.Member,
+        active_games: MutableMapping[int, FNAFDiscordGame],
+        scheduler: TickScheduler,
+        *,
+        assets: AssetRegistry | None = None,
+        outbox: EditQueue | None = None,
+        governor: LoadGovernor | None = None,
+        stats: StatsStore | None = None,
+        seed: int | None = None,
+    ) -> None:
+        # Games run on their scheduler's clock so deadlines line up, but
+        # count game time from their own start.
+        super().__init__(OffsetClock(scheduler.clock), seed=seed)
+        self.channel = channel
+        self.user = user
+        self.active_games = active_games
+        self.scheduler = scheduler
+        self.assets = assets if assets is not None else AssetRegistry()
+        self.outbox = outbox if outbox is not None else EditQueue()
+        self.governor = governor
+        self.stats = stats
+        self.game_message: discord.Message | discord.PartialMessage | None = (
+            None
+        )
+
+        self.last_update_time = 0.0
+        self.display = RenderPipeline(self.render_frame, self.send_frame)
+        self.spectators = Spectators(
+            self.outbox, self.assets, governor=governor
+        )
+        self.background_tasks: set[asyncio.Task[None]] = set()
+        self._restarting = False
+
+    def restore(self, state: dict[str, Any], shift: float) -> None:
+        """Load a snapshot, moving the game ``shift`` seconds forward so
+        the time the bot was down does not count."""
+        super().restore(state)
+        self.clock.origin += shift
+
+    @property
+    def refresh_interval(self) -> float:
+        interval = REFRESH_INTERVAL * self.clock.speed
+        if self.governor is not None:
+            interval *= self.governor.refresh_scale()
+        return interval
+
+    async def update_game_display(self, force: bool = False) -> None:
+        now = self.clock.now()
+        if not force and now - self.last_update_time < self.refresh_interval:
+            return
+        self.last_update_time = now
+        self.request_display(Priority.HIGH if force else Priority.PERIODIC)
+        await self.display.flush()
+
+    def request_display(self, priority: Priority = Priority.HIGH) -> None:
+        if self.game_message:
+            self.display.request(priority)
+
+    def render_frame(self) -> Frame:
+        state = self.get_game_state()
+        embed, image_file = create_embed(state, self.assets)
+        return Frame(embed, image_file, FNAFGameView.for_game(self), state)
+
+    async def add_spectator(
+        self,
+        channel: discord.abc.Messageable,
+    ) -> discord.Message:
+        """Mirror this game into ``channel`` from now on."""
+        frame = self.render_frame()
+        return await self.spectators.watch(channel, frame.embed, frame.image)
+
+    async def respond(
+        self,
+        interaction: discord.Interaction,
+        received: float | None = None,
+    ) -> None:
+        """Show the current state as the response to ``interaction``.
+
+        The frame is rendered right away and sent as the interaction
+        response itself, so a button press costs one round trip. If the
+        response deadline has already passed or the response fails, the
+        press is deferred and the frame goes through the pipeline instead.
+
+        ``received`` is the ``time.perf_counter()`` reading when the press
+        arrived, for the click-to-frame metric.
+        """
+        started = received if received is not None else time.perf_counter()
+        frame = self.render_frame()
+        if self.display.is_current(frame):
+            await interaction.response.defer()
+            return
+
+        late = (
+            discord.utils.utcnow() - interaction.created_at
+            > INTERACTION_DEADLINE
+        )
+        if not late:
+            attachments = self.assets.attachments_for(frame.image)
+            try:
+                await interaction.response.edit_message(
+                    embed=frame.embed,
+                    view=frame.view,
+                    attachments=attachments,
+                )
+            except discord.HTTPException as exc:
+                logger.warning(f"Failed to answer button press: {exc}")
+            else:
+                self.display.mark_sent(frame)
+                self.spectators.show(frame.embed, frame.image)
+                if attachments:
+                    ASSET_BYTES_ATTACHED.inc(self.assets.size_of(frame.image))
+                CLICK_TO_FRAME.observe(time.perf_counter() - started)
+                return
+
+        INTERACTION_FALLBACKS.inc()
+        if not interaction.response.is_done():
+            try:
+                await interaction.response.defer()
+            except discord.HTTPException:
+                pass
+        self.request_display()
+        await self.display.flush()
+        CLICK_TO_FRAME.observe(time.perf_counter() - started)
+
+    async def send_frame(self, frame: Frame, priority: Priority) -> bool:
+        attachments = self.assets.attachments_for(frame.image)
+        delivered = await self.edit_message(
+            priority,
+            embed=frame.embed,
+            view=frame.view,
+            attachments=attachments,
+        )
+        if delivered and attachments:
+            ASSET_BYTES_ATTACHED.inc(self.assets.size_of(frame.image))
+        if delivered:
+            self.spectators.show(frame.embed, frame.image)
+        return delivered
+
+    async def edit_message(
+        self,
+        priority: Priority = Priority.HIGH,
+        **fields: Any,
+    ) -> bool:
+        """Edit the game message through the shared outbound queue."""
+        message = self.game_message
+        assert message is not None
+        return await self.outbox.submit(
+            message.id,
+            self.channel.id,
+            lambda: message.edit(**fields),
+            priority,
+        )
+
+    def night_finished(self, outcome: str, at: float, power: float) -> None:
+        NIGHTS.labels(self.night, outcome).inc()
+        if self.stats is not None:
+            self.stats.record(self.user.id, outcome, self.night, power)
+        if outcome == "survived":
+            self.spawn(self.show_night_break())
+            return
+        self.archive(outcome)
+        if outcome == "quit":
+            # quit_game replaces the frame and frees the slot itself.
+            return
+        self.release_slot()
+        self.spawn(self.update_game_display(force=True))
+
+    def power_ran_out(self, at: float) -> None:
+        self.spawn(self.update_game_display(force=True))
+
+    def archive(self, outcome: str) -> None:
+        """Keep the finished game's event log for replays."""
+        if self.stats is not None:
+            self.stats.archive(self.user.id, outcome, self.events)
+
+    def release_slot(self) -> None:
+        """Let a player waiting for a free game slot know one opened."""
+        if self.governor is not None:
+            self.governor.wake()
+
+    def spawn(self, coro: Coroutine[Any, Any, None]) -> None:
+        task = asyncio.create_task(coro)
+        self.background_tasks.add(task)
+        task.add_done_callback(self.background_tasks.discard)
+
+    def next_deadline(self, now: float) -> float:
+        """The next game time ``tick`` has work to do."""
+        deadline, _ = self.next_rule()
+        if self.game_message:
+            deadline = min(
+                deadline, self.last_update_time + self.refresh_interval
+            )
+        # Nothing to show during the break before a night either.
+        return max(deadline, now, self.night_started)
+
+    def reschedule(self) -> None:
+        self.scheduler.schedule(
+            self,
+            self.clock.origin + self.next_deadline(self.clock.now()),
+        )
+
+    def tick(self, now: float) -> float | None:
+        if not self.game_active:
+            return None
+        # The scheduler works in its clock's time, the game in its own.
+        now -= self.clock.origin
+        self.advance(now)
+        if not self.game_active:
+            return None
+
+        if now - self.last_update_time >= self.refresh_interval:
+            self.last_update_time = now
+            # Most refreshes land between power steps and hour changes;
+            # comparing states is far cheaper than rendering the frame.
+            if not self.display.shows(self.get_game_state()):
+                self.request_display(Priority.PERIODIC)
+        return self.clock.origin + self.next_deadline(now)
+
+    def press(self, action: str, arg: int | None = None) -> None:
+        super().press(action, arg)
+        # The press may have moved a deadline, e.g. when power runs out.
+        if self.game_active:
+            self.reschedule()
+
+    async def show_night_break(self) -> None:
+        assert self.game_message is not None
+        await self.display.flush()
+        embed = discord.Embed(
+            title=f"🌙 Night {self.night - 1} Complete!",
+            description="Prepare for the next night...",
+            color=0xFFD700,
+        )
+        await self.edit_message(embed=embed, view=None)
+        self.spectators.show(embed)
+        self.display.invalidate()
+        await self.clock.sleep(self.night_started - self.clock.now())
+        await self.update_game_display(force=True)
+
+    async def restart_game(self, interaction: discord.Interaction) -> None:
+        assert self.game_message is not None
+        # A second press while the first is still waiting for a slot or
+        # editing the message would start two games.
+        if self._restarting:
+            return
+        self._restarting = True
+        try:
+            await self._restart()
+        finally:
+            self._restarting = False
+
+    async def _restart(self) -> None:
+        if self.governor is not None:
+            # The new game needs a slot like any other; a player already
+            # in line keeps their place.
+            if self.governor.position(self.user.id) is not None:
+                return
+            guild = self.channel.guild
+            guild_id = guild.id if guild is not None else None
+            if not await self.governor.admit(
+                self.channel, self.user.id, guild_id
+            ):
+                return
+        if self.active_games.get(self.user.id) is not self:
+            # Quit while waiting for the slot.
+            if self.governor is not None:
+                self.governor.cancel(self.user.id)
+            return
+        await self.display.flush()
+        # Hosted images leave no attachment behind, so the old message
+        # cannot be left empty; Discord rejects that edit.
+        await self.edit_message(
+            embed=discord.Embed(title="🔄 Restarted, the new game is below."),
+            view=None,
+            attachments=[],
+        )
+        if self.active_games.get(self.user.id) is not self:
+            # Quit or replaced while the message was being edited.
+            if self.governor is not None:
+                self.governor.cancel(self.user.id)
+            return
+        new_game = FNAFDiscordGame(
+            self.channel,
+            self.user,
+            self.active_games,
+            self.scheduler,
+            assets=self.assets,
+            outbox=self.outbox,
+            governor=self.governor,
+            stats=self.stats,
+        )
+        # Spectators keep watching the new game.
+        new_game.spectators = self.spectators
+        self.active_games[self.user.id] = new_game
+        await new_game.start_game()
+
+    async def quit_game(self, interaction: discord.Interaction) -> None:
+        if self.game_active:
+            self.press("quit")
+        self.scheduler.discard(self)
+        assert self.game_message is not None
+        await self.display.flush()
+        embed = discord.Embed(title="👋 Thanks for playing!")
+        await self.edit_message(embed=embed, view=None)
+        self.spawn(self.spectators.close(embed))
+        _ = self.active_games.pop(self.user.id, None)
+        self.release_slot()
+
+    async def resume(
+        self,
+        message: discord.Message | discord.PartialMessage,
+    ) -> None:
+        """Re-attach a restored game to its existing message."""
+        self.game_message = message
+        self.game_active = not (self.game_over or self.won)
+        self.display.invalidate()
+        self.request_display()
+        if self.game_active:
+            self.reschedule()
+
+    async def start_game(
+        self,
+        existing_message: discord.Message | None = None,
+    ) -> None:
+        self.game_active = True
+        embed, img = create_embed(self.get_game_state(), self.assets)
+        files = self.assets.attachments_for(img)
+        self.game_message = await self.channel.send(
+            embed=embed,
+            view=FNAFGameView.for_game(self),
+            files=files,
+        )
+        if files:
+            ASSET_BYTES_ATTACHED.inc(self.assets.size_of(img))
+        self.spectators.show(embed, img)
+        self.reschedule()
@@ -0,0 +1,266 @@
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+from .outbound import EditQueue, Priority
+from .scheduler import sleep_or_wake
+
+if TYPE_CHECKING:
+    import discord
+
+    from .game import FNAFDiscordGame
+
+_MISSING = object()
+
+
+@dataclass(frozen=True, slots=True)
+class Usage:
+    running: int
+    max_games: int
+    in_guild: int
+    max_per_guild: int
+
+
+@dataclass(eq=False, slots=True)
+class _Waiter:
+    user_id: int
+    guild_id: int | None
+    on_position: Callable[[int, Usage], object]
+    future: asyncio.Future[bool] = field(
+        default_factory=lambda: asyncio.get_running_loop().create_future()
+    )
+    position: int = 0
+
+
+class LoadGovernor:
+    """Keeps edit traffic bounded when the bot is busy.
+
+    * Periodic refreshes are stretched by ``refresh_scale`` as the
+      backlog of game edits grows, up to ``max_stretch`` times the
+      normal interval. Spectator mirrors are sent last and dropped
+      first, so their backlog alone does not slow the games down.
+    * At most ``max_games`` games run at once, and ``max_per_guild`` in
+      one guild. Players over the limit wait in line and their game
+      starts as soon as a slot frees up; ``on_position`` is called with
+      their place in line whenever it changes.
+
+    Only running games count: finished games waiting for a restart or
+    quit do not tick or refresh, so they do not hold a slot. Restarting
+    one is starting a new game and goes through ``admit`` like ``>start``.
+    """
+
+    def __init__(
+        self,
+        games: Mapping[int, FNAFDiscordGame],
+        outbox: EditQueue,
+        *,
+        max_games: int = 500,
+        max_per_guild: int = 25,
+        max_waiting: int = 200,
+        max_stretch: float = 5.0,
+        stretch_backlog: int = 50,
+    ) -> None:
+        self.games = games
+        self.outbox = outbox
+        self.max_games = max_games
+        self.max_per_guild = max_per_guild
+        self.max_waiting = max_waiting
+        self.max_stretch = max_stretch
+        self.stretch_backlog = stretch_backlog
+
+        self._waiting: list[_Waiter] = []
+        # Admitted players whose new game is not in ``games`` yet: their
+        # guild, and the game they had then (a finished one, when
+        # restarting).
+        self._admitted: dict[
+            int, tuple[int | None, FNAFDiscordGame | None]
+        ] = {}
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task[None] | None = None
+
+    def __len__(self) -> int:
+        return len(self._waiting)
+
+    def refresh_scale(self) -> float:
+        """How much to stretch the periodic refresh interval."""
+        backlog = self.outbox.queued(Priority.HIGH, Priority.PERIODIC)
+        return min(self.max_stretch, 1.0 + backlog / self.stretch_backlog)
+
+    def usage(self, guild_id: int | None) -> Usage:
+        # A slot is held until the player's game changes: their new game
+        # shows up, or the finished one they were restarting goes away.
+        stale = [
+            user_id
+            for user_id, (_, old) in self._admitted.items()
+            if self.games.get(user_id) is not old
+        ]
+        for user_id in stale:
+            del self._admitted[user_id]
+        running = len(self._admitted)
+        in_guild = sum(g == guild_id for g, _ in self._admitted.values())
+        for game in self.games.values():
+            if game.game_over or game.won:
+                continue
+            running += 1
+            if _guild_id(game) == guild_id:
+                in_guild += 1
+        return Usage(running, self.max_games, in_guild, self.max_per_guild)
+
+    def has_room(self, guild_id: int | None) -> bool:
+        usage = self.usage(guild_id)
+        return (
+            usage.running < self.max_games
+            and usage.in_guild < self.max_per_guild
+        )
+
+    def try_admit(self, user_id: int, guild_id: int | None) -> bool:
+        """Hold a slot for the player if one is free.
+
+        Players already in line get first pick of any slot that opened.
+        """
+        self._admit()
+        if not self.has_room(guild_id):
+            return False
+        self._hold(user_id, guild_id)
+        return True
+
+    async def admit(
+        self,
+        channel: discord.abc.Messageable,
+        user_id: int,
+        guild_id: int | None,
+    ) -> bool:
+        """Hold a slot for the player, waiting in line for one if needed.
+
+        While the player waits, a message in ``channel`` keeps their place
+        in line up to date. Returns ``False`` if the line is full.
+        """
+        if self.try_admit(user_id, guild_id):
+            return True
+        notice: discord.Message | None = None
+        shown = ""
+
+        def moved(position: int, usage: Usage) -> None:
+            nonlocal shown
+            text = queue_notice(position, usage)
+            if notice is None or text == shown:
+                return
+            shown = text
+            message = notice
+            # Place-in-line updates can wait behind game frames.
+            self.outbox.submit(
+                message.id,
+                message.channel.id,
+                lambda: message.edit(content=text),
+                Priority.PERIODIC,
+            )
+
+        shown = queue_notice(len(self) + 1, self.usage(guild_id))
+        notice = await channel.send(shown)
+        try:
+            admitted = await self.wait_turn(user_id, guild_id, moved)
+        finally:
+            await self.outbox.submit(
+                notice.id, notice.channel.id, notice.delete
+            )
+        if not admitted:
+            await channel.send(
+                "⚠️Too many players are waiting, try again later.",
+                delete_after=5,
+            )
+        return admitted
+
+    def position(self, user_id: int) -> int | None:
+        for i, waiter in enumerate(self._waiting, start=1):
+            if waiter.user_id == user_id:
+                return i
+        return None
+
+    async def wait_turn(
+        self,
+        user_id: int,
+        guild_id: int | None,
+        on_position: Callable[[int, Usage], object],
+    ) -> bool:
+        """Wait until the player may start a game.
+
+        Returns ``False`` straight away if the line is full. Once it
+        returns ``True`` the slot is held for the player until their game
+        shows up in ``games`` or ``cancel`` is called.
+        """
+        if len(self._waiting) >= self.max_waiting:
+            return False
+        waiter = _Waiter(user_id, guild_id, on_position)
+        self._waiting.append(waiter)
+        self._update_positions()
+        self._ensure_running()
+        try:
+            return await waiter.future
+        except asyncio.CancelledError:
+            self.cancel(user_id)
+            raise
+
+    def cancel(self, user_id: int) -> None:
+        """Leave the line, or give back a slot that was not used."""
+        if self._admitted.pop(user_id, _MISSING) is not _MISSING:
+            self.wake()
+        for waiter in self._waiting:
+            if waiter.user_id == user_id:
+                self._waiting.remove(waiter)
+                self._update_positions()
+                break
+
+    def wake(self) -> None:
+        """A game finished; see whether someone can take its slot."""
+        self._wakeup.set()
+
+    def _ensure_running(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        while self._waiting:
+            self._wakeup.clear()
+            self._admit()
+            if not self._waiting:
+                break
+            # Games can also end without telling us (e.g. a deleted
+            # channel), so look again every few seconds regardless.
+            await sleep_or_wake(self._wakeup, 5.0)
+
+    def _hold(self, user_id: int, guild_id: int | None) -> None:
+        self._admitted[user_id] = (guild_id, self.games.get(user_id))
+
+    def _admit(self) -> None:
+        admitted = False
+        for waiter in list(self._waiting):
+            if not self.has_room(waiter.guild_id):
+                continue
+            self._waiting.remove(waiter)
+            self._hold(waiter.user_id, waiter.guild_id)
+            waiter.future.set_result(True)
+            admitted = True
+        if admitted:
+            self._update_positions()
+
+    def _update_positions(self) -> None:
+        for i, waiter in enumerate(self._waiting, start=1):
+            if waiter.position != i:
+                waiter.position = i
+                waiter.on_position(i, self.usage(waiter.guild_id))
+
+
+def queue_notice(position: int, usage: Usage) -> str:
+    return (
+        f"⏳All game slots are taken ({usage.running}/{usage.max_games} "
+        f"running, {usage.in_guild}/{usage.max_per_guild} in this server). "
+        f"You are #{position} in line; your game starts automatically."
+    )
+
+
+def _guild_id(game: FNAFDiscordGame) -> int | None:
+    guild = game.channel.guild
+    return guild.id if guild is not None else None
@@ -0,0 +1,308 @@
+"""Exact Markov-chain analysis of enemy movement.
+
+``EnemyAI.move_enemy`` only depends on the current room, the hour and
+``ai_level``, so each enemy is a small time-inhomogeneous Markov chain
+over the rooms of its route with one step per ``MOVE_INTERVAL`` move
+attempt. This module builds the per-hour transition matrices from the
+same rules and computes, exactly:
+
+* the distribution of the move attempt at which the enemy first reaches
+  the office, and
+* the average probability of finding the enemy in each room per hour.
+
+The enemies of a night move independently of each other, so
+``analyze_night`` combines their chains into the chance that any of them
+has reached the door by each hour.
+
+Results are memoized per (route, start, ai_level), so tuning loops and
+graph edits only pay for a handful of 7x7 matrix products.
+
+Run ``python -m game.markov`` for a summary of the current roster.
+"""
+
+from __future__ import annotations
+
+import argparse
+import functools
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass
+from typing import TypeAlias
+
+import numpy as np
+import numpy.typing as npt
+
+from .core.enemy import (
+    EXITS,
+    HALLS,
+    MOVE_INTERVAL,
+    NO_EXITS,
+    ROSTER,
+    Animatronic,
+    Exits,
+)
+from .core.eventlog import VERSION
+from .core.rules import HOUR_LENGTH, HOURS_PER_NIGHT, MAX_NIGHTS, ROSTERS
+
+FloatArray: TypeAlias = npt.NDArray[np.float64]
+FrozenExits: TypeAlias = tuple[tuple[str, Exits], ...]
+
+START = "main-stage"
+OFFICE = "office"
+
+
+def moves_per_hour() -> tuple[int, ...]:
+    """Move attempts that happen during each hour of a night.
+
+    The hour advances before the enemy moves in the same tick, and the
+    night ends at the start of hour 6 before anything moves.
+    """
+    night = HOURS_PER_NIGHT * HOUR_LENGTH
+    counts = [0] * HOURS_PER_NIGHT
+    for t in range(MOVE_INTERVAL, night, MOVE_INTERVAL):
+        counts[t // HOUR_LENGTH] += 1
+    return tuple(counts)
+
+
+def check_route(exits: Mapping[str, Exits], start: str = START) -> list[str]:
+    """Return human readable problems with a route (see
+    ``enemy.build_exits``) from ``start``; empty if it is fine."""
+    problems: list[str] = []
+    for room in (start, OFFICE):
+        if room not in exits:
+            problems.append(f"missing room {room!r}")
+    for room, options in exits.items():
+        for target in {*options.forward, *options.retreat}:
+            if target not in exits:
+                problems.append(f"{room!r} leads to unknown room {target!r}")
+        if room != OFFICE and options is NO_EXITS:
+            problems.append(f"{room!r} has no exits, the enemy gets stuck")
+        if room in HALLS and options is not NO_EXITS and not options.retreat:
+            problems.append(
+                f"{room!r} has nowhere to retreat to, move_enemy would fail"
+            )
+    if problems:
+        return problems
+
+    seen = {start}
+    frontier = [start]
+    while frontier:
+        options = exits[frontier.pop()]
+        for target in {*options.forward, *options.retreat}:
+            if target not in seen:
+                seen.add(target)
+                frontier.append(target)
+    if OFFICE not in seen:
+        problems.append(f"{OFFICE!r} is unreachable from {start!r}")
+    for room in exits:
+        if room not in seen:
+            problems.append(f"{room!r} is unreachable from {start!r}")
+    return problems
+
+
+def transition_matrix(
+    exits: Mapping[str, Exits],
+    hour: int,
+    ai_level: int = 1,
+) -> FloatArray:
+    """One move attempt of ``EnemyAI.move_enemy`` as a row-stochastic
+    matrix over ``tuple(exits)``."""
+    rooms = tuple(exits)
+    index = {room: i for i, room in enumerate(rooms)}
+    move_chance = min(0.1 * (ai_level + hour), 0.80)
+    matrix = np.zeros((len(rooms), len(rooms)))
+
+    for room, options in exits.items():
+        i = index[room]
+        if options is NO_EXITS:
+            matrix[i, i] = 1.0
+            continue
+
+        forward = options.forward
+        retreat = options.retreat
+        move = np.zeros(len(rooms))
+        if room in HALLS and retreat:
+            for target in retreat:
+                move[index[target]] += 0.3 / len(retreat)
+            for target in forward:
+                move[index[target]] += 0.7 / len(forward)
+        elif room == "dining":
+            move[i] += 0.2
+            for target in forward:
+                move[index[target]] += 0.8 / len(forward)
+        else:
+            for target in forward:
+                move[index[target]] += 1.0 / len(forward)
+
+        matrix[i] = move_chance * move
+        matrix[i, i] += 1.0 - move_chance
+
+    return matrix
+
+
+@dataclass(frozen=True, slots=True)
+class ChainAnalysis:
+    rooms: tuple[str, ...]
+    # hitting[n] = P(enemy first reaches the office at move attempt n + 1)
+    hitting: FloatArray
+    # occupancy[h, r] = mean P(enemy in room r) over the attempts of hour h
+    occupancy: FloatArray
+    # reached_by_hour[h] = P(enemy reached the office by the end of hour h)
+    reached_by_hour: FloatArray
+
+    @property
+    def reach_probability(self) -> float:
+        """Probability the enemy reaches the office at all during a night."""
+        return float(self.hitting.sum())
+
+    def expected_hitting_time(self) -> float:
+        """Expected seconds until the office is reached, given it is."""
+        total = self.hitting.sum()
+        if total == 0:
+            return float("inf")
+        steps = np.arange(1, len(self.hitting) + 1) * MOVE_INTERVAL
+        return float((steps * self.hitting).sum() / total)
+
+
+def analyze(
+    exits: Mapping[str, Exits] = EXITS,
+    ai_level: int = 1,
+    start: str = START,
+) -> ChainAnalysis:
+    """The chain of one enemy on route ``exits``."""
+    return _analyze(tuple(exits.items()), start, ai_level)
+
+
+def analyze_enemy(
+    animatronic: Animatronic, ai_bonus: int = 0
+) -> ChainAnalysis:
+    return analyze(
+        animatronic.exits, animatronic.ai_level + ai_bonus, animatronic.start
+    )
+
+
+@functools.lru_cache(maxsize=256)
+def _analyze(
+    frozen: FrozenExits, start_room: str, ai_level: int
+) -> ChainAnalysis:
+    exits = dict(frozen)
+    rooms = tuple(exits)
+    start = rooms.index(start_room)
+    office = rooms.index(OFFICE)
+
+    # The office has no exits in any route, but make it absorbing anyway:
+    # once there the enemy is at the door for the rest of the night.
+    distribution = np.zeros(len(rooms))
+    distribution[start] = 1.0
+    hitting: list[float] = []
+    occupancy = np.zeros((HOURS_PER_NIGHT, len(rooms)))
+    reached_by_hour = np.zeros(HOURS_PER_NIGHT)
+
+    for hour, moves in enumerate(moves_per_hour()):
+        matrix = transition_matrix(exits, hour, ai_level)
+        matrix[office] = 0.0
+        matrix[office, office] = 1.0
+        for _ in range(moves):
+            before = distribution[office]
+            distribution = distribution @ matrix
+            hitting.append(distribution[office] - before)
+            occupancy[hour] += distribution
+        if moves:
+            occupancy[hour] /= moves
+        reached_by_hour[hour] = distribution[office]
+
+    return ChainAnalysis(
+        rooms=rooms,
+        hitting=np.array(hitting),
+        occupancy=occupancy,
+        reached_by_hour=reached_by_hour,
+    )
+
+
+@dataclass(frozen=True, slots=True)
+class NightAnalysis:
+    enemies: dict[str, ChainAnalysis]
+    # reached_by_hour[h] = P(any enemy reached the office by the end of
+    # hour h)
+    reached_by_hour: FloatArray
+
+    @property
+    def reach_probability(self) -> float:
+        """Probability any enemy reaches the office during a night."""
+        return float(self.reached_by_hour[-1])
+
+
+def analyze_night(
+    night: int = 1,
+    roster: Sequence[Animatronic] = ROSTER,
+    ai_bonus: int = 0,
+) -> NightAnalysis:
+    """The chains of the enemies of ``roster`` that play ``night``."""
+    enemies = {
+        animatronic.name: analyze_enemy(animatronic, ai_bonus)
+        for animatronic in roster
+        if animatronic.first_night <= night
+    }
+    missed = np.ones(HOURS_PER_NIGHT)
+    for chain in enemies.values():
+        missed *= 1 - chain.reached_by_hour
+    return NightAnalysis(enemies, 1 - missed)
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m game.markov",
+        description="Exact enemy movement statistics for each night.",
+    )
+    parser.add_argument(
+        "--rules",
+        type=int,
+        choices=sorted(ROSTERS),
+        default=VERSION,
+        help="rules version whose roster plays",
+    )
+    parser.add_argument("--night", type=int, default=None)
+    parser.add_argument(
+        "--ai-bonus",
+        type=int,
+        default=0,
+        help="added to every enemy's ai_level",
+    )
+    args = parser.parse_args(argv)
+    roster = ROSTERS[args.rules]
+
+    problems = [
+        f"{animatronic.name}: {problem}"
+        for animatronic in roster
+        for problem in check_route(animatronic.exits, animatronic.start)
+    ]
+    if problems:
+        for problem in problems:
+            print(f"problem: {problem}")
+        return
+
+    nights = (
+        [args.night] if args.night is not None else range(1, MAX_NIGHTS + 1)
+    )
+    for night in nights:
+        result = analyze_night(night, roster, args.ai_bonus)
+        reached = "  ".join(f"{p:6.1%}" for p in result.reached_by_hour)
+        print(
+            f"night {night}: an enemy at the door in "
+            f"{result.reach_probability:.1%} of nights; by hour: {reached}"
+        )
+
+    for animatronic in roster:
+        chain = analyze_enemy(animatronic, args.ai_bonus)
+        print(
+            f"\n{animatronic.name} (from night {animatronic.first_night}): "
+            f"office reached in {chain.reach_probability:.1%} of nights, "
+            f"after {chain.expected_hitting_time():.0f}s on average"
+        )
+        print("hour  reached  " + "  ".join(f"{r:>10}" for r in chain.rooms))
+        for hour in range(HOURS_PER_NIGHT):
+            cells = "  ".join(f"{p:>10.1%}" for p in chain.occupancy[hour])
+            print(f"{hour:>4}  {chain.reached_by_hour[hour]:>7.1%}  {cells}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+"""Process metrics in the Prometheus text format.
+
+Metrics are plain Python objects: updating one is an attribute increment
+or, for histograms, a bisect and two increments, so they are safe to use
+on the per-tick path. Labelled metrics hand out a child per label value;
+look it up once and keep it where the update is hot.
+
+``serve`` exposes every registered metric on ``/metrics``.
+"""
+
+from __future__ import annotations
+
+import abc
+import bisect
+from collections.abc import Callable, Iterator, Sequence
+from typing import TypeVar
+
+from aiohttp import web
+
+from config import logger
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; covers a fast tick up to a badly stalled event loop.
+LATENCY_BUCKETS = (
+    0.001,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(
+        f'{name}="{_escape(value)}"' for name, value in zip(names, values)
+    )
+    return "{" + pairs + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+class Metric(abc.ABC):
+    kind = "untyped"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: Sequence[str] = (),
+    ) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labels)
+
+    @abc.abstractmethod
+    def samples(self) -> Iterator[tuple[str, str, float]]:
+        """Yield ``(suffix, labels, value)`` for every sample."""
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.help}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        for suffix, labels, value in self.samples():
+            lines.append(f"{self.name}{suffix}{labels} {_number(value)}")
+        return "\n".join(lines)
+
+
+class _CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: Sequence[str] = (),
+    ) -> None:
+        super().__init__(name, help, labels)
+        self._children: dict[tuple[str, ...], _CounterChild] = {}
+        if not self.labelnames:
+            self._default = self.labels()
+
+    def labels(self, *values: object) -> _CounterChild:
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects {self.labelnames}")
+            child = self._children[key] = _CounterChild()
+        return child
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._default.value += amount
+
+    def samples(self) -> Iterator[tuple[str, str, float]]:
+        for key, child in self._children.items():
+            yield "", _format_labels(self.labelnames, key), child.value
+
+
+class Gauge(Metric):
+    """A value read when the metrics are scraped."""
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        read: Callable[[], float] | None = None,
+    ) -> None:
+        super().__init__(name, help)
+        self.read = read
+        self.value = 0.0
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def samples(self) -> Iterator[tuple[str, str, float]]:
+        yield "", "", self.read() if self.read is not None else self.value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, help)
+        self.bounds = tuple(sorted(buckets))
+        # One count per bucket plus +Inf; made cumulative when rendered.
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def samples(self) -> Iterator[tuple[str, str, float]]:
+        total = 0
+        for bound, count in zip((*self.bounds, float("inf")), self.counts):
+            total += count
+            yield "_bucket", f'{{le="{_number(bound)}"}}', total
+        yield "_sum", "", self.sum
+        yield "_count", "", self.count
+
+
+M = TypeVar("M", bound=Metric)
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: dict[str, Metric] = {}
+
+    def register(self, metric: M) -> M:
+        if metric.name in self._metrics:
+            raise ValueError(f"metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def get(self, name: str) -> Metric | None:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        return (
+            "\n".join(metric.render() for metric in self._metrics.values())
+            + "\n"
+        )
+
+
+REGISTRY = Registry()
+
+TICK_LAG = REGISTRY.register(
+    Histogram(
+        "fnaf_tick_lag_seconds",
+        "How late games were ticked after their deadline.",
+    )
+)
+DISPLAY_SECONDS = REGISTRY.register(
+    Histogram(
+        "fnaf_display_update_seconds",
+        "Time from rendering a frame until its edit finished.",
+    )
+)
+CLICK_TO_FRAME = REGISTRY.register(
+    Histogram(
+        "fnaf_click_to_frame_seconds",
+        "Time from receiving a button press until its frame was shown.",
+    )
+)
+INTERACTION_FALLBACKS = REGISTRY.register(
+    Counter(
+        "fnaf_interaction_fallbacks_total",
+        "Button presses answered with a deferral and a queued edit.",
+    )
+)
+EDITS = REGISTRY.register(
+    Counter(
+        "fnaf_edits_total",
+        "Message edits by result.",
+        labels=("result",),
+    )
+)
+EDITS_SENT = EDITS.labels("sent")
+EDITS_FAILED = EDITS.labels("failed")
+EDITS_RATE_LIMITED = EDITS.labels("rate_limited")
+ACTIVE_GAMES = REGISTRY.register(
+    Gauge("fnaf_active_games", "Games currently in memory.")
+)
+WAITING_PLAYERS = REGISTRY.register(
+    Gauge("fnaf_waiting_players", "Players waiting for a free game slot.")
+)
+SPECTATORS = REGISTRY.register(
+    Gauge("fnaf_spectators", "Spectator messages mirroring a game.")
+)
+STARTUP_SECONDS = REGISTRY.register(
+    Gauge(
+        "fnaf_startup_seconds",
+        "Seconds from loading the bot until it resumed its games.",
+    )
+)
+NIGHTS = REGISTRY.register(
+    Counter(
+        "fnaf_nights_total",
+        "Finished nights by night number and outcome.",
+        labels=("night", "outcome"),
+    )
+)
+ASSET_BYTES = REGISTRY.register(
+    Counter(
+        "fnaf_asset_upload_bytes_total",
+        "Image bytes sent to Discord, as hosted uploads or attachments.",
+        labels=("kind",),
+    )
+)
+ASSET_BYTES_HOSTED = ASSET_BYTES.labels("hosted")
+ASSET_BYTES_ATTACHED = ASSET_BYTES.labels("attachment")
+
+
+async def serve(
+    host: str = "127.0.0.1",
+    port: int = 9100,
+    registry: Registry = REGISTRY,
+) -> web.AppRunner:
+    """Serve ``registry`` on ``http://host:port/metrics``.
+
+    Returns the runner; call ``cleanup()`` on it to stop serving.
+    """
+
+    async def metrics(request: web.Request) -> web.Response:
+        return web.Response(
+            body=registry.render().encode(),
+            headers={"Content-Type": CONTENT_TYPE},
+        )
+
+    app = web.Application()
+    app.router.add_get("/metrics", metrics)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logger.info(f"serving metrics on http://{host}:{port}/metrics")
+    return runner
@@ -0,0 +1,299 @@
+from __future__ import annotations
+
+import asyncio
+import enum
+import heapq
+import itertools
+import statistics
+import time
+from collections import Counter, deque
+from collections.abc import Awaitable, Callable, Hashable
+from dataclasses import dataclass
+from typing import Any
+
+import discord
+
+from config import logger
+
+from .metrics import EDITS_FAILED, EDITS_RATE_LIMITED, EDITS_SENT
+from .scheduler import sleep_or_wake
+
+
+class Priority(enum.IntEnum):
+    # Player input and game-over frames.
+    HIGH = 0
+    # Periodic refreshes; merged or dropped when the queue backs up.
+    PERIODIC = 1
+    # Spectator mirrors (see ``spectate``): after everything else, and
+    # dropped like periodic refreshes.
+    SPECTATOR = 2
+
+
+class TokenBucket:
+    def __init__(self, capacity: int, per: float) -> None:
+        self.capacity = capacity
+        self.rate = capacity / per
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated) * self.rate
+        )
+        self.updated = now
+
+    def delay(self, now: float) -> float:
+        """Seconds until a token is available."""
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self, now: float) -> None:
+        self._refill(now)
+        self.tokens -= 1
+
+    def block(self, now: float, retry_after: float) -> None:
+        self.blocked_until = max(self.blocked_until, now + retry_after)
+        self.tokens = 0.0
+
+
+@dataclass(slots=True)
+class _Job:
+    key: Hashable
+    channel_id: int
+    send: Callable[[], Awaitable[Any]]
+    priority: Priority
+    queued_at: float
+    future: asyncio.Future[bool]
+    seq: int = 0
+
+
+@dataclass(frozen=True, slots=True)
+class QueueStats:
+    depth: int
+    high: int
+    periodic: int
+    spectator: int
+    in_flight: int
+    sent: int
+    merged: int
+    dropped: int
+    rate_limited: int
+    wait_p50: float
+    wait_p99: float
+    wait_max: float
+
+
+class EditQueue:
+    """Process-wide outbound queue for message edits.
+
+    Edits are sent in priority order while respecting a per-channel and a
+    global token bucket. Edits for the same key (normally the message id)
+    are merged so only the newest one is sent, periodic edits are dropped
+    once ``max_periodic_backlog`` edits are waiting, and a 429 blocks the
+    offending bucket for ``retry_after`` and puts the edit back in line.
+    """
+
+    def __init__(
+        self,
+        *,
+        channel_rate: int = 5,
+        channel_per: float = 5.0,
+        global_rate: int = 50,
+        global_per: float = 1.0,
+        max_periodic_backlog: int = 500,
+    ) -> None:
+        self.channel_rate = channel_rate
+        self.channel_per = channel_per
+        self.global_bucket = TokenBucket(global_rate, global_per)
+        self.max_periodic_backlog = max_periodic_backlog
+
+        self._buckets: dict[int, TokenBucket] = {}
+        self._heap: list[tuple[int, int, _Job]] = []
+        self._pending: dict[Hashable, _Job] = {}
+        self._queued: Counter[Priority] = Counter()
+        self._counter = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task[None] | None = None
+        self._in_flight: set[asyncio.Task[None]] = set()
+
+        self._waits: deque[float] = deque(maxlen=1000)
+        self._sent = 0
+        self._merged = 0
+        self._dropped = 0
+        self._rate_limited = 0
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def queued(self, *priorities: Priority) -> int:
+        """How many edits are waiting at any of ``priorities``."""
+        return sum(self._queued[priority] for priority in priorities)
+
+    def submit(
+        self,
+        key: Hashable,
+        channel_id: int,
+        send: Callable[[], Awaitable[Any]],
+        priority: Priority = Priority.HIGH,
+    ) -> asyncio.Future[bool]:
+        """Queue ``send`` and return a future that resolves to whether it
+        was delivered (``False`` if it was merged away or dropped)."""
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[bool] = loop.create_future()
+
+        job = self._pending.get(key)
+        if job is not None:
+            # Keep the older place in line, but send the newer edit.
+            self._merged += 1
+            _resolve(job.future, False)
+            job.send = send
+            job.future = future
+            if priority < job.priority:
+                self._queued[job.priority] -= 1
+                self._queued[priority] += 1
+                job.priority = priority
+                heapq.heappush(self._heap, (job.priority, job.seq, job))
+            return future
+
+        if (
+            priority >= Priority.PERIODIC
+            and len(self._pending) >= self.max_periodic_backlog
+        ):
+            self._dropped += 1
+            future.set_result(False)
+            return future
+
+        job = _Job(key, channel_id, send, priority, time.monotonic(), future)
+        self._push(job)
+        return future
+
+    def stats(self) -> QueueStats:
+        waits = sorted(self._waits)
+        return QueueStats(
+            depth=len(self._pending),
+            high=self._queued[Priority.HIGH],
+            periodic=self._queued[Priority.PERIODIC],
+            spectator=self._queued[Priority.SPECTATOR],
+            in_flight=len(self._in_flight),
+            sent=self._sent,
+            merged=self._merged,
+            dropped=self._dropped,
+            rate_limited=self._rate_limited,
+            wait_p50=statistics.median(waits) if waits else 0.0,
+            wait_p99=waits[int(len(waits) * 0.99)] if waits else 0.0,
+            wait_max=waits[-1] if waits else 0.0,
+        )
+
+    def _push(self, job: _Job) -> None:
+        job.seq = next(self._counter)
+        self._pending[job.key] = job
+        self._queued[job.priority] += 1
+        heapq.heappush(self._heap, (job.priority, job.seq, job))
+        self._wakeup.set()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def _bucket(self, channel_id: int) -> TokenBucket:
+        bucket = self._buckets.get(channel_id)
+        if bucket is None:
+            bucket = TokenBucket(self.channel_rate, self.channel_per)
+            self._buckets[channel_id] = bucket
+        return bucket
+
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            delay = self._dispatch(time.monotonic())
+            if delay is None:
+                await self._wakeup.wait()
+                continue
+            if delay > 0:
+                await sleep_or_wake(self._wakeup, delay)
+            await asyncio.sleep(0)
+
+    def _dispatch(self, now: float) -> float | None:
+        """Start every edit that can go out now and return how long to wait
+        before trying again, or ``None`` if the queue is empty."""
+        waiting: list[tuple[int, int, _Job]] = []
+        delay: float | None = None
+        while self._heap:
+            entry = heapq.heappop(self._heap)
+            job = entry[2]
+            if (
+                self._pending.get(job.key) is not job
+                or entry[0] != job.priority
+            ):
+                # Superseded by a merge or a priority bump.
+                continue
+
+            global_delay = self.global_bucket.delay(now)
+            if global_delay > 0:
+                waiting.append(entry)
+                delay = global_delay
+                break
+
+            bucket = self._bucket(job.channel_id)
+            channel_delay = bucket.delay(now)
+            if channel_delay > 0:
+                waiting.append(entry)
+                delay = (
+                    channel_delay
+                    if delay is None
+                    else min(delay, channel_delay)
+                )
+                continue
+
+            self.global_bucket.take(now)
+            bucket.take(now)
+            del self._pending[job.key]
+            self._queued[job.priority] -= 1
+            self._waits.append(now - job.queued_at)
+            task = asyncio.create_task(self._send(job))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+        for entry in waiting:
+            heapq.heappush(self._heap, entry)
+        return delay
+
+    async def _send(self, job: _Job) -> None:
+        try:
+            await job.send()
+        except discord.RateLimited as exc:
+            self._retry(job, exc.retry_after)
+        except discord.HTTPException as exc:
+            if exc.status != 429:
+                logger.warning(f"Failed to edit message {job.key}: {exc}")
+                EDITS_FAILED.inc()
+                _resolve(job.future, False)
+                return
+            retry_after = float(exc.response.headers.get("Retry-After", 1))
+            self._retry(job, retry_after)
+        except Exception as exc:
+            EDITS_FAILED.inc()
+            if not job.future.done():
+                job.future.set_exception(exc)
+        else:
+            self._sent += 1
+            EDITS_SENT.inc()
+            _resolve(job.future, True)
+
+    def _retry(self, job: _Job, retry_after: float) -> None:
+        self._rate_limited += 1
+        EDITS_RATE_LIMITED.inc()
+        self._bucket(job.channel_id).block(time.monotonic(), retry_after)
+        if job.key in self._pending:
+            # A newer edit for the same message is already waiting.
+            _resolve(job.future, False)
+            return
+        self._push(job)
+
+
+def _resolve(future: asyncio.Future[bool], value: bool) -> None:
+    if not future.done():
+        future.set_result(value)
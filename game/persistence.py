@@ -0,0 +1,256 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Mapping
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, ClassVar
+
+from config import logger
+
+if TYPE_CHECKING:
+    from .game import FNAFDiscordGame
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    user_id    INTEGER PRIMARY KEY,
+    guild_id   INTEGER,
+    channel_id INTEGER NOT NULL,
+    message_id INTEGER NOT NULL,
+    saved_at   REAL NOT NULL,
+    state      TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS claims (
+    user_id    INTEGER PRIMARY KEY,
+    shard_id   INTEGER NOT NULL,
+    claimed_at REAL NOT NULL
+);
+"""
+
+
+def shard_for(guild_id: int | None, shard_count: int) -> int:
+    """The shard Discord routes ``guild_id`` to; DMs go to shard 0."""
+    if guild_id is None:
+        return 0
+    return (guild_id >> 22) % shard_count
+
+
+@dataclass(frozen=True, slots=True)
+class Snapshot:
+    user_id: int
+    guild_id: int | None
+    channel_id: int
+    message_id: int
+    # The game's clock reading when the snapshot was taken. Clocks restart
+    # with the process, so restore with ``clock.now() - saved_at`` as the
+    # shift to keep every timer's age.
+    saved_at: float
+    state: dict[str, Any]
+
+
+class SQLiteStore(ABC):
+    """A SQLite database written in batches off the event loop.
+
+    The database runs in WAL mode so a write never blocks a reader. Once
+    started, the store calls ``flush`` every ``interval`` seconds.
+    """
+
+    schema: ClassVar[str]
+    # What ``flush`` saves, for the log.
+    contents: ClassVar[str]
+
+    def __init__(self, path: str | Path, interval: float = 5.0) -> None:
+        self.path = Path(path)
+        self.interval = interval
+        self._db = sqlite3.connect(
+            self.path, timeout=10.0, check_same_thread=False
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(self.schema)
+        self._db.commit()
+        self._lock = asyncio.Lock()
+        self._task: asyncio.Task[None] | None = None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception(f"Failed to save {self.contents}")
+
+    @abstractmethod
+    async def flush(self) -> None:
+        """Write everything that changed since the last flush."""
+
+    def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+        self._db.close()
+
+
+class SnapshotStore(SQLiteStore):
+    """Periodically saves every active game to SQLite so they survive a
+    restart.
+
+    Every ``interval`` seconds the store snapshots ``games``, keeps only
+    the games whose snapshot changed since the last write plus the ones
+    that are gone, and writes them all in one transaction.
+
+    When the bot is sharded every shard process shares the database. Each
+    store only loads the games of its own guilds, and ``claim`` records
+    which shard runs a player's game so a player cannot start a second one
+    on another shard.
+    """
+
+    schema = SCHEMA
+    contents = "game snapshots"
+
+    def __init__(
+        self,
+        path: str | Path,
+        games: Mapping[int, FNAFDiscordGame],
+        interval: float = 5.0,
+        *,
+        shard_id: int = 0,
+        shard_count: int = 1,
+    ) -> None:
+        super().__init__(path, interval)
+        self.games = games
+        self.shard_id = shard_id
+        self.shard_count = shard_count
+        self._written: dict[int, str] = {}
+        self._claimed: set[int] = set()
+
+    async def flush(self) -> None:
+        async with self._lock:
+            rows: list[tuple[int, int | None, int, int, float, str]] = []
+            current: dict[int, str] = {}
+            for user_id, game in list(self.games.items()):
+                if game.game_message is None:
+                    continue
+                state = json.dumps(game.snapshot(), separators=(",", ":"))
+                current[user_id] = state
+                if self._written.get(user_id) == state:
+                    continue
+                guild = game.channel.guild
+                rows.append(
+                    (
+                        user_id,
+                        guild.id if guild is not None else None,
+                        game.channel.id,
+                        game.game_message.id,
+                        game.clock.now(),
+                        state,
+                    )
+                )
+            removed = [
+                (user_id,)
+                for user_id in self._written
+                if user_id not in current
+            ]
+            released = [
+                (user_id, self.shard_id)
+                for user_id in self._claimed
+                if user_id not in self.games
+            ]
+            if not rows and not removed and not released:
+                return
+
+            await asyncio.to_thread(self._write, rows, removed, released)
+            self._written = current
+            self._claimed.difference_update(user_id for user_id, _ in released)
+            logger.debug(
+                f"Saved {len(rows)} game snapshots, removed {len(removed)}"
+            )
+
+    def _write(
+        self,
+        rows: list[tuple[int, int | None, int, int, float, str]],
+        removed: list[tuple[int]],
+        released: list[tuple[int, int]],
+    ) -> None:
+        with self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO games VALUES (?, ?, ?, ?, ?, ?)", rows
+            )
+            self._db.executemany(
+                "DELETE FROM games WHERE user_id = ?", removed
+            )
+            self._db.executemany(
+                "DELETE FROM claims WHERE user_id = ? AND shard_id = ?",
+                released,
+            )
+
+    async def claim(self, user_id: int) -> bool:
+        """Record that this shard runs ``user_id``'s game.
+
+        Returns ``False`` if another shard already does. Claims are
+        released by the next flush after the game leaves ``games``.
+        """
+        if user_id in self._claimed:
+            return True
+        claimed = await asyncio.to_thread(self._claim, user_id)
+        if claimed:
+            self._claimed.add(user_id)
+        return claimed
+
+    def _claim(self, user_id: int) -> bool:
+        with self._db:
+            cursor = self._db.execute(
+                "INSERT OR IGNORE INTO claims VALUES (?, ?, ?)",
+                (user_id, self.shard_id, time.time()),
+            )
+        return cursor.rowcount == 1
+
+    def load(self) -> list[Snapshot]:
+        """Load this shard's saved games.
+
+        Claims left behind by a previous run of this shard are replaced by
+        claims for the loaded games.
+        """
+        cursor = self._db.execute(
+            "SELECT user_id, guild_id, channel_id, message_id, saved_at, "
+            "state FROM games"
+        )
+        snapshots: list[Snapshot] = []
+        self._written = {}
+        for *ids, saved_at, state in cursor:
+            user_id, guild_id, channel_id, message_id = ids
+            if shard_for(guild_id, self.shard_count) != self.shard_id:
+                continue
+            snapshots.append(
+                Snapshot(
+                    user_id,
+                    guild_id,
+                    channel_id,
+                    message_id,
+                    saved_at,
+                    json.loads(state),
+                )
+            )
+            self._written[user_id] = state
+
+        now = time.time()
+        with self._db:
+            # Also drop claims of shards that no longer exist after the
+            # shard count went down.
+            self._db.execute(
+                "DELETE FROM claims WHERE shard_id = ? OR shard_id >= ?",
+                (self.shard_id, self.shard_count),
+            )
+            self._db.executemany(
+                "INSERT OR REPLACE INTO claims VALUES (?, ?, ?)",
+                [(user_id, self.shard_id, now) for user_id in self._written],
+            )
+        self._claimed = set(self._written)
+        return snapshots
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import Awaitable, Callable, Hashable
+from dataclasses import dataclass, field
+from typing import Any
+
+import discord
+
+from config import logger
+
+from .metrics import DISPLAY_SECONDS
+from .outbound import Priority
+
+
+def layout_key(view: discord.ui.View | None) -> tuple[Any, ...]:
+    if view is None:
+        return ()
+    # FNAFGameView already knows which precomputed layout it is showing.
+    known = getattr(view, "layout", None)
+    if known is not None:
+        return (type(view).__name__, known)
+    # Buttons without an explicit custom_id get a random one, so it is left
+    # out: two views that look the same compare equal.
+    return tuple(
+        (
+            type(item).__name__,
+            getattr(item, "label", None),
+            getattr(item, "style", None),
+            getattr(item, "disabled", None),
+            item.row,
+        )
+        for item in view.children
+    )
+
+
+@dataclass(slots=True)
+class Frame:
+    embed: discord.Embed
+    image: str
+    view: discord.ui.View | None
+    # Hashable value the embed was rendered from. When given it stands in
+    # for the embed when comparing frames, which saves serialising it.
+    state: Hashable | None = None
+    key: tuple[Any, ...] = field(init=False)
+
+    def __post_init__(self) -> None:
+        content = self.embed.to_dict() if self.state is None else self.state
+        self.key = (content, self.image, layout_key(self.view))
+
+
+class RenderPipeline:
+    """Coalesces display updates so a game has one message edit in flight.
+
+    ``request`` only marks the display dirty. A single pump task renders
+    the newest state once the previous edit has finished and skips the
+    edit entirely when the frame matches the last one sent. The frame is
+    sent with the most urgent priority requested since the last send.
+    """
+
+    def __init__(
+        self,
+        render: Callable[[], Frame],
+        send: Callable[[Frame, Priority], Awaitable[bool]],
+    ) -> None:
+        self._render = render
+        self._send = send
+        self._dirty = False
+        self._priority = Priority.PERIODIC
+        self._task: asyncio.Task[None] | None = None
+        self._last_key: tuple[Any, ...] | None = None
+
+    @property
+    def busy(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def request(self, priority: Priority = Priority.HIGH) -> None:
+        self._dirty = True
+        self._priority = min(self._priority, priority)
+        if not self.busy:
+            self._task = asyncio.create_task(self._pump())
+
+    def is_current(self, frame: Frame) -> bool:
+        """Whether ``frame`` is what the message already shows."""
+        return frame.key == self._last_key
+
+    def shows(self, state: Hashable) -> bool:
+        """Whether the last frame sent was rendered from ``state``."""
+        return self._last_key is not None and self._last_key[0] == state
+
+    def mark_sent(self, frame: Frame) -> None:
+        """Record ``frame`` as shown after it was sent outside the pump.
+
+        If an older frame is still in flight it may land afterwards, so
+        the pump renders once more when it finishes.
+        """
+        self._last_key = frame.key
+        if self.busy:
+            self._dirty = True
+
+    def invalidate(self) -> None:
+        """Forget the last frame, e.g. after the message was edited
+        outside the pipeline."""
+        self._last_key = None
+
+    async def flush(self) -> None:
+        if self._task is not None:
+            await asyncio.shield(self._task)
+
+    async def _pump(self) -> None:
+        while self._dirty:
+            self._dirty = False
+            priority, self._priority = self._priority, Priority.PERIODIC
+            started = time.perf_counter()
+            frame = self._render()
+            if frame.key == self._last_key:
+                continue
+            try:
+                delivered = await self._send(frame, priority)
+            except Exception:
+                logger.warning("Failed to update game message")
+                continue
+            finally:
+                DISPLAY_SECONDS.observe(time.perf_counter() - started)
+            if delivered:
+                self._last_key = frame.key
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+from collections.abc import Callable
+from typing import Protocol
+
+from config import logger
+
+from .core.clock import MONOTONIC, Clock
+
+
+async def sleep_or_wake(
+    wakeup: asyncio.Event, delay: float, clock: Clock = MONOTONIC
+) -> None:
+    """Sleep for ``delay`` seconds of ``clock`` or until ``wakeup`` is set.
+
+    Unlike ``asyncio.wait_for`` on Python 3.11, a cancellation is never
+    swallowed.
+    """
+    handle = clock.call_later(delay, wakeup.set)
+    try:
+        await wakeup.wait()
+    finally:
+        handle.cancel()
+
+
+class Tickable(Protocol):
+    def tick(self, now: float) -> float | None:
+        """Run any due work and return the next deadline, or ``None`` to
+        stop being scheduled."""
+        ...
+
+
+class TickScheduler:
+    """Runs every active game from a single asyncio task.
+
+    Games are kept in a heap keyed by their next deadline, so the task only
+    wakes up when some game actually has work due and then ticks every due
+    game in one batch. Rescheduling a game leaves its old heap entry behind;
+    stale entries are recognised by their sequence number and skipped.
+
+    Deadlines are in game seconds of ``clock``, which every scheduled game
+    shares. ``on_lag``, if set, is called with how many seconds late each
+    game was ticked.
+    """
+
+    def __init__(self, clock: Clock = MONOTONIC) -> None:
+        self.clock = clock
+        self.on_lag: Callable[[float], None] | None = None
+        self._heap: list[tuple[float, int, Tickable]] = []
+        self._entries: dict[Tickable, int] = {}
+        self._counter = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task[None] | None = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, item: object) -> bool:
+        return item in self._entries
+
+    def schedule(self, item: Tickable, deadline: float) -> None:
+        seq = next(self._counter)
+        self._entries[item] = seq
+        heapq.heappush(self._heap, (deadline, seq, item))
+        if self._heap[0][1] == seq:
+            self._wakeup.set()
+        self._ensure_running()
+
+    def discard(self, item: Tickable) -> None:
+        _ = self._entries.pop(item, None)
+
+    def _ensure_running(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            if not self._heap:
+                await self._wakeup.wait()
+                continue
+
+            delay = self._heap[0][0] - self.clock.now()
+            if delay > 0:
+                await sleep_or_wake(self._wakeup, delay, self.clock)
+                continue
+
+            self._run_due(self.clock.now())
+            await asyncio.sleep(0)
+
+    def _run_due(self, now: float) -> None:
+        due: list[Tickable] = []
+        while self._heap and self._heap[0][0] <= now:
+            due_at, seq, item = heapq.heappop(self._heap)
+            if self._entries.get(item) != seq:
+                continue
+            del self._entries[item]
+            due.append(item)
+            if self.on_lag is not None:
+                self.on_lag(now - due_at)
+
+        for item in due:
+            try:
+                deadline = item.tick(now)
+            except Exception:
+                logger.exception("Game tick failed, unscheduling it")
+                continue
+            if deadline is not None and item not in self._entries:
+                self.schedule(item, deadline)
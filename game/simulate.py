@@ -0,0 +1,448 @@
+"""Headless Monte Carlo simulator for difficulty tuning.
+
+Reproduces one night of ``FNAFGame`` at one-second resolution for many
+independent nights at once: the enemies of a rules version's roster
+(``rules.ROSTERS``) that play that night, each on its own route and at its
+own ``ai_level`` with the rules of ``EnemyAI.move_enemy``, the
+``PowerMeter`` drain, camera switching costs, the power outage and the
+door attack roll, one draw for all the enemies at the door. Every
+simulated night is a row in a set of NumPy arrays, so a batch of 100k
+nights costs about as much as one Python-level night.
+
+Run ``python -m game.simulate --help`` for the command line interface.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+from typing import TypeAlias
+
+import numpy as np
+import numpy.typing as npt
+
+from .core.enemy import HALLS, MOVE_INTERVAL, ROSTER, Animatronic
+from .core.eventlog import VERSION
+from .core.power import BASE_RATE, CAMERA_RATE, DOOR_RATE, LIGHT_RATE
+from .core.rooms import ROOM_INDEX, ROOMS
+from .core.rules import (
+    DOOR_ATTACK_CHANCE,
+    HOUR_LENGTH,
+    HOURS_PER_NIGHT,
+    MAX_NIGHTS,
+    OUTAGE_DELAY,
+    ROSTERS,
+)
+
+BoolArray: TypeAlias = npt.NDArray[np.bool_]
+IntArray: TypeAlias = npt.NDArray[np.int64]
+FloatArray: TypeAlias = npt.NDArray[np.float64]
+
+# Room indices are those of ``rooms.ROOMS``, shared by every route.
+HALL_ROOMS = np.array([room in HALLS for room in ROOMS])
+DINING = ROOM_INDEX["dining"]
+OFFICE = ROOM_INDEX["office"]
+
+SURVIVED = 0
+DOOR_ATTACK = 1
+POWER_OUTAGE = 2
+OUTCOMES = {
+    SURVIVED: "survived",
+    DOOR_ATTACK: "door_attack",
+    POWER_OUTAGE: "power_outage",
+}
+
+
+@dataclass(frozen=True, slots=True)
+class MoveTable:
+    """One enemy's route flattened into padded index tables.
+
+    ``forward[r, :n_forward[r]]`` are the rooms ``move_enemy`` advances to
+    from room ``r`` (``Exits.forward``), and likewise for ``retreat``.
+    Rooms off the route have no exits.
+    """
+
+    forward: IntArray
+    n_forward: IntArray
+    retreat: IntArray
+    n_retreat: IntArray
+    start: int
+    ai_level: int
+
+    @classmethod
+    def for_enemy(cls, animatronic: Animatronic) -> MoveTable:
+        width = max(
+            1,
+            max(
+                max(len(exits.forward), len(exits.retreat))
+                for exits in animatronic.exits.values()
+            ),
+        )
+        forward = np.zeros((len(ROOMS), width), dtype=np.int64)
+        retreat = np.zeros((len(ROOMS), width), dtype=np.int64)
+        n_forward = np.zeros(len(ROOMS), dtype=np.int64)
+        n_retreat = np.zeros(len(ROOMS), dtype=np.int64)
+
+        for room, exits in animatronic.exits.items():
+            i = ROOM_INDEX[room]
+            ahead = [ROOM_INDEX[r] for r in exits.forward]
+            back = [ROOM_INDEX[r] for r in exits.retreat]
+            forward[i, : len(ahead)] = ahead
+            retreat[i, : len(back)] = back
+            n_forward[i] = len(ahead)
+            n_retreat[i] = len(back)
+
+        return cls(
+            forward=forward,
+            n_forward=n_forward,
+            retreat=retreat,
+            n_retreat=n_retreat,
+            start=ROOM_INDEX[animatronic.start],
+            ai_level=animatronic.ai_level,
+        )
+
+
+@dataclass(slots=True)
+class Nights:
+    """State of a batch of simulated nights, one row per night and, in
+    ``position``, one column per enemy.
+
+    Policies may read anything here but should only act on what a player
+    could see: ``light_sees_enemy`` and ``camera_sees_enemy``.
+    """
+
+    tables: tuple[MoveTable, ...]
+    t: int
+    hour: int
+    position: IntArray
+    power: FloatArray
+    door: BoolArray
+    light: BoolArray
+    camera: BoolArray
+    current_camera: IntArray
+    alive: BoolArray
+
+    @property
+    def at_door(self) -> BoolArray:
+        return (self.position == OFFICE).any(axis=1)
+
+    @property
+    def at_door_count(self) -> IntArray:
+        return np.count_nonzero(self.position == OFFICE, axis=1)
+
+    @property
+    def light_sees_enemy(self) -> BoolArray:
+        in_hall = HALL_ROOMS[self.position].any(axis=1)
+        return self.light & ~self.camera & in_hall
+
+    def camera_sees_enemy(self, rooms: IntArray) -> BoolArray:
+        """Whether the camera currently watching ``rooms`` shows an
+        enemy."""
+        watched = rooms[self.current_camera][:, None]
+        return self.camera & (self.position == watched).any(axis=1)
+
+
+@dataclass(frozen=True, slots=True)
+class Controls:
+    door: BoolArray
+    light: BoolArray
+    camera: BoolArray
+    # Camera each night is switched to; a change costs 1 power.
+    current_camera: IntArray | None = None
+
+
+Policy: TypeAlias = Callable[[Nights], Controls]
+
+
+def passive(nights: Nights) -> Controls:
+    """Never touch anything."""
+    off = np.zeros_like(nights.door)
+    return Controls(door=off, light=off, camera=off)
+
+
+def always_closed(nights: Nights) -> Controls:
+    """Keep the door shut for the whole night."""
+    off = np.zeros_like(nights.door)
+    return Controls(door=~off, light=off, camera=off)
+
+
+def peek(every: int = 5, hold: int = 20) -> Policy:
+    """Flash the light every ``every`` seconds and shut the door for
+    ``hold`` seconds whenever the enemy shows up in a hall."""
+    closed_until: IntArray | None = None
+
+    def policy(nights: Nights) -> Controls:
+        nonlocal closed_until
+        if closed_until is None:
+            closed_until = np.zeros(nights.door.shape, dtype=np.int64)
+
+        closed_until = np.where(
+            nights.light_sees_enemy, nights.t + hold, closed_until
+        )
+        door = nights.t < closed_until
+        light = np.full_like(door, nights.t % every == 0) & ~door
+        off = np.zeros_like(door)
+        return Controls(door=door, light=light, camera=off)
+
+    return policy
+
+
+POLICIES: dict[str, Callable[[], Policy]] = {
+    "passive": lambda: passive,
+    "always-closed": lambda: always_closed,
+    "peek": peek,
+}
+
+
+@dataclass(frozen=True, slots=True)
+class NightResult:
+    outcome: IntArray
+    time_of_death: IntArray
+    power_left: FloatArray
+
+    @property
+    def size(self) -> int:
+        return len(self.outcome)
+
+    def rate(self, outcome: int) -> float:
+        return float(np.mean(self.outcome == outcome)) if self.size else 0.0
+
+    def summary(self) -> dict[str, float]:
+        summary = {name: self.rate(code) for code, name in OUTCOMES.items()}
+        survived = self.outcome == SURVIVED
+        summary["mean_power_left"] = (
+            float(self.power_left[survived].mean()) if survived.any() else 0.0
+        )
+        return summary
+
+
+def simulate_night(
+    policy: Policy,
+    size: int,
+    *,
+    rng: np.random.Generator,
+    night: int = 1,
+    roster: Sequence[Animatronic] = ROSTER,
+    ai_bonus: int = 0,
+) -> NightResult:
+    """Simulate ``size`` independent plays of night ``night`` under
+    ``policy``, with ``ai_bonus`` added to every enemy's ``ai_level``."""
+    tables = tuple(
+        MoveTable.for_enemy(animatronic)
+        for animatronic in roster
+        if animatronic.first_night <= night
+    )
+    nights = Nights(
+        tables=tables,
+        t=0,
+        hour=0,
+        position=np.tile(
+            np.array([table.start for table in tables], dtype=np.int64),
+            (size, 1),
+        ),
+        power=np.full(size, 100.0),
+        door=np.zeros(size, dtype=np.bool_),
+        light=np.zeros(size, dtype=np.bool_),
+        camera=np.zeros(size, dtype=np.bool_),
+        current_camera=np.zeros(size, dtype=np.int64),
+        alive=np.ones(size, dtype=np.bool_),
+    )
+    outcome = np.full(size, SURVIVED, dtype=np.int64)
+    time_of_death = np.full(size, -1, dtype=np.int64)
+    outage_at = np.full(size, -1, dtype=np.int64)
+
+    for t in range(1, HOURS_PER_NIGHT * HOUR_LENGTH + 1):
+        nights.t = t
+        if t % HOUR_LENGTH == 0:
+            nights.hour += 1
+            if nights.hour >= HOURS_PER_NIGHT:
+                break
+
+        out = outage_at >= 0
+        controls = policy(nights)
+        if controls.current_camera is not None:
+            changed = (
+                nights.alive
+                & controls.camera
+                & (controls.current_camera != nights.current_camera)
+            )
+            nights.power = np.where(
+                changed, np.maximum(nights.power - 1, 0), nights.power
+            )
+            nights.current_camera = controls.current_camera
+        nights.door = controls.door & ~out
+        nights.light = controls.light & ~out & ~nights.door
+        nights.camera = controls.camera & ~out
+
+        if t % MOVE_INTERVAL == 0:
+            _move(nights, rng, ai_bonus)
+
+        # The game drains power continuously; this is one second of it.
+        drain = (
+            BASE_RATE
+            + nights.door * DOOR_RATE
+            + nights.light * LIGHT_RATE
+            + nights.camera * CAMERA_RATE
+        )
+        nights.power = np.where(
+            nights.alive, np.maximum(nights.power - drain, 0), nights.power
+        )
+        outage_at = np.where(
+            nights.alive & ~out & (nights.power == 0), t, outage_at
+        )
+
+        # Nothing but the outage death happens in the dark. Otherwise one
+        # draw for every enemy at the door, as in ``_roll_attack``.
+        dark = outage_at >= 0
+        chance = 1 - (1 - DOOR_ATTACK_CHANCE) ** nights.at_door_count
+        attacked = (
+            nights.alive & ~dark & ~nights.door & (rng.random(size) < chance)
+        )
+        dark &= nights.alive & (t >= outage_at + OUTAGE_DELAY)
+        outcome[attacked] = DOOR_ATTACK
+        outcome[dark] = POWER_OUTAGE
+        time_of_death[attacked | dark] = t
+        nights.alive &= ~(attacked | dark)
+
+        if not nights.alive.any():
+            break
+
+    return NightResult(outcome, time_of_death, nights.power)
+
+
+def _move(nights: Nights, rng: np.random.Generator, ai_bonus: int) -> None:
+    size = len(nights.alive)
+    for column, table in enumerate(nights.tables):
+        position = nights.position[:, column]
+
+        ai_level = table.ai_level + ai_bonus + nights.hour
+        move_chance = min(0.1 * ai_level, 0.80)
+        moving = (rng.random(size) <= move_chance) & (
+            table.n_forward[position] > 0
+        )
+        retreating = (
+            HALL_ROOMS[position]
+            & (rng.random(size) < 0.3)
+            & (table.n_retreat[position] > 0)
+        )
+        stalling = (position == DINING) & (rng.random(size) < 0.2)
+
+        pick = rng.random(size)
+        ahead = table.forward[
+            position,
+            (pick * table.n_forward[position]).astype(np.int64),
+        ]
+        back = table.retreat[
+            position,
+            (pick * table.n_retreat[position]).astype(np.int64),
+        ]
+        target = np.where(
+            retreating, back, np.where(stalling, position, ahead)
+        )
+        nights.position[:, column] = np.where(
+            moving & nights.alive, target, position
+        )
+
+
+def simulate_run(
+    policy_factory: Callable[[], Policy],
+    size: int,
+    *,
+    seed: int | None = None,
+    nights: int = MAX_NIGHTS,
+    roster: Sequence[Animatronic] = ROSTER,
+    ai_bonus: int = 0,
+) -> list[NightResult]:
+    """Play ``size`` full runs, carrying only survivors into the next
+    night. Returns one result per night that anyone reached."""
+    rng = np.random.default_rng(seed)
+    results: list[NightResult] = []
+    alive = size
+    for night in range(1, nights + 1):
+        if alive == 0:
+            break
+        result = simulate_night(
+            policy_factory(),
+            alive,
+            rng=rng,
+            night=night,
+            roster=roster,
+            ai_bonus=ai_bonus,
+        )
+        results.append(result)
+        alive = int(np.count_nonzero(result.outcome == SURVIVED))
+    return results
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m game.simulate",
+        description="Estimate survival rates per night.",
+    )
+    parser.add_argument("--runs", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="peek")
+    parser.add_argument("--nights", type=int, default=MAX_NIGHTS)
+    parser.add_argument(
+        "--rules",
+        type=int,
+        choices=sorted(ROSTERS),
+        default=VERSION,
+        help="rules version whose roster plays",
+    )
+    parser.add_argument(
+        "--ai-bonus",
+        type=int,
+        default=0,
+        help="added to every enemy's ai_level",
+    )
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    results = simulate_run(
+        POLICIES[args.policy],
+        args.runs,
+        seed=args.seed,
+        nights=args.nights,
+        roster=ROSTERS[args.rules],
+        ai_bonus=args.ai_bonus,
+    )
+    elapsed = time.perf_counter() - start
+    simulated = sum(result.size for result in results)
+
+    report = {
+        "policy": args.policy,
+        "rules": args.rules,
+        "runs": args.runs,
+        "seed": args.seed,
+        "seconds": elapsed,
+        "nights_per_minute": simulated / elapsed * 60 if elapsed else 0.0,
+        "nights": [
+            {"night": i, "played": result.size, **result.summary()}
+            for i, result in enumerate(results, start=1)
+        ],
+    }
+    if args.json:
+        print(json.dumps(report))
+        return
+
+    print(
+        f"{args.policy}: {simulated} nights in {elapsed:.2f}s "
+        f"({report['nights_per_minute']:,.0f} nights/min)"
+    )
+    for night in report["nights"]:
+        print(
+            f"  night {night['night']}: played {night['played']:>8}"
+            f"  survived {night['survived']:6.1%}"
+            f"  door {night['door_attack']:6.1%}"
+            f"  power {night['power_outage']:6.1%}"
+            f"  power left {night['mean_power_left']:5.1f}%"
+        )
+
+
+if __name__ == "__main__":
+    main()
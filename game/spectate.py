@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import TYPE_CHECKING
+
+import discord
+
+from config import logger
+
+from .assets import AssetRegistry
+from .metrics import ASSET_BYTES_ATTACHED
+from .outbound import EditQueue, Priority
+
+if TYPE_CHECKING:
+    from .governor import LoadGovernor
+
+# Real seconds between two updates of the spectator messages, however
+# often the player's own message changes.
+SPECTATOR_INTERVAL = 10.0
+# Channels one game can be mirrored into.
+MAX_SPECTATORS = 10
+
+
+class Spectators:
+    """Mirrors of one game's display in other channels, for ``>watch``.
+
+    The game passes on every embed it has already rendered and sent to its
+    player; it is never rendered again for spectators, so the per-tick
+    cost of a game does not grow with its audience. The newest embed goes
+    to every mirror at most every ``interval`` seconds, which stretches
+    like the players' refreshes while the outbound queue backs up. Mirror
+    edits go through that queue at ``Priority.SPECTATOR``: after the
+    players' own edits, merged per message while they wait and shed first
+    under load.
+
+    Mirrors have no buttons. Images go by URL once hosted, uploading an
+    image once for all mirrors if needed, instead of being attached to
+    every spectator message.
+    """
+
+    def __init__(
+        self,
+        outbox: EditQueue,
+        assets: AssetRegistry,
+        *,
+        governor: LoadGovernor | None = None,
+        interval: float = SPECTATOR_INTERVAL,
+    ) -> None:
+        self.outbox = outbox
+        self.assets = assets
+        self.governor = governor
+        self.base_interval = interval
+        # Keyed by channel id: one mirror per channel.
+        self.messages: dict[int, discord.Message] = {}
+        self._pending: tuple[discord.Embed, str | None] | None = None
+        self._sent_at = -interval
+        self._task: asyncio.Task[None] | None = None
+
+    def __len__(self) -> int:
+        return len(self.messages)
+
+    def __contains__(self, channel_id: int) -> bool:
+        return channel_id in self.messages
+
+    @property
+    def interval(self) -> float:
+        if self.governor is None:
+            return self.base_interval
+        return self.base_interval * self.governor.refresh_scale()
+
+    @property
+    def full(self) -> bool:
+        return len(self.messages) >= MAX_SPECTATORS
+
+    async def watch(
+        self,
+        channel: discord.abc.Messageable,
+        embed: discord.Embed,
+        image: str | None,
+    ) -> discord.Message:
+        """Start mirroring into ``channel``, showing ``embed`` for now."""
+        embed, attach = await self._prepare(embed, image)
+        files = self._files(image, attach)
+        message = await channel.send(embed=embed, files=files)
+        if files:
+            ASSET_BYTES_ATTACHED.inc(self.assets.size_of(files[0].filename))
+        self.messages[message.channel.id] = message
+        return message
+
+    def show(self, embed: discord.Embed, image: str | None = None) -> None:
+        """Mirror ``embed`` with the next update."""
+        if not self.messages:
+            return
+        self._pending = (embed, image)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._pump())
+
+    async def close(self, embed: discord.Embed) -> None:
+        """Mirror ``embed`` as the last update, then stop."""
+        self.show(embed)
+        await self.flush()
+        self.stop()
+
+    def stop(self) -> None:
+        """Stop mirroring; the last embed sent stays up."""
+        self.messages.clear()
+        self._pending = None
+
+    async def flush(self) -> None:
+        if self._task is not None:
+            await asyncio.shield(self._task)
+
+    async def _pump(self) -> None:
+        while self._pending is not None:
+            wait = self._sent_at + self.interval - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            if self._pending is None:
+                return
+            (embed, image), self._pending = self._pending, None
+            self._sent_at = time.monotonic()
+            try:
+                await self._fan_out(embed, image)
+            except Exception:
+                logger.warning("Failed to update spectators")
+
+    async def _fan_out(self, embed: discord.Embed, image: str | None) -> None:
+        embed, attach = await self._prepare(embed, image)
+        for message in list(self.messages.values()):
+            self.outbox.submit(
+                message.id,
+                message.channel.id,
+                lambda message=message: self._edit(
+                    message, embed, self._files(image, attach)
+                ),
+                Priority.SPECTATOR,
+            )
+
+    async def _prepare(
+        self,
+        embed: discord.Embed,
+        image: str | None,
+    ) -> tuple[discord.Embed, bool]:
+        """``embed`` with its image by URL if there is one, and whether
+        the image has to be attached instead."""
+        if image is None or self.assets.url_for(image) is not None:
+            return embed, False
+        url = await self.assets.upload(image)
+        if url is None:
+            return embed, True
+        # Rendered before the image was hosted; the shared embed must not
+        # be modified.
+        embed = embed.copy()
+        embed.set_image(url=url)
+        return embed, False
+
+    def _files(self, image: str | None, attach: bool) -> list[discord.File]:
+        # Each message needs its own file objects.
+        if image is None or not attach:
+            return []
+        return self.assets.attachments_for(image)
+
+    async def _edit(
+        self,
+        message: discord.Message,
+        embed: discord.Embed,
+        files: list[discord.File],
+    ) -> None:
+        try:
+            await message.edit(embed=embed, attachments=files)
+        except discord.NotFound:
+            # The mirror was deleted; stop updating it.
+            if self.messages.get(message.channel.id) is message:
+                del self.messages[message.channel.id]
+            return
+        if files:
+            ASSET_BYTES_ATTACHED.inc(self.assets.size_of(files[0].filename))
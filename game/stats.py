@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from config import logger
+
+from .core.eventlog import EventLog
+from .persistence import SQLiteStore
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS player_stats (
+    user_id         INTEGER PRIMARY KEY,
+    games           INTEGER NOT NULL,
+    wins            INTEGER NOT NULL,
+    nights_survived INTEGER NOT NULL,
+    power_left      REAL NOT NULL,
+    current_streak  INTEGER NOT NULL,
+    best_streak     INTEGER NOT NULL,
+    best_night      INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS player_stats_rank
+    ON player_stats (wins DESC, nights_survived DESC, user_id);
+CREATE TABLE IF NOT EXISTS player_deaths (
+    user_id INTEGER NOT NULL,
+    cause   TEXT NOT NULL,
+    count   INTEGER NOT NULL,
+    PRIMARY KEY (user_id, cause)
+);
+CREATE TABLE IF NOT EXISTS game_logs (
+    id          INTEGER PRIMARY KEY,
+    user_id     INTEGER NOT NULL,
+    finished_at REAL NOT NULL,
+    outcome     TEXT NOT NULL,
+    log         BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS game_logs_user
+    ON game_logs (user_id, finished_at);
+"""
+
+# One row per recorded night; every column but the user is a delta, except
+# best_night which is a maximum. Streaks count games won in a row: a
+# finished game either extends the streak or resets it, a survived night
+# leaves it alone.
+_RECORD = """
+INSERT INTO player_stats VALUES (?1, ?2, ?3, ?4, ?5, ?3, ?3, ?6)
+ON CONFLICT (user_id) DO UPDATE SET
+    games = games + excluded.games,
+    wins = wins + excluded.wins,
+    nights_survived = nights_survived + excluded.nights_survived,
+    power_left = power_left + excluded.power_left,
+    current_streak = CASE
+        WHEN excluded.games = 0 THEN current_streak
+        WHEN excluded.wins = 1 THEN current_streak + 1
+        ELSE 0
+    END,
+    best_streak = MAX(best_streak, current_streak + excluded.wins),
+    best_night = MAX(best_night, excluded.best_night)
+"""
+_RECORD_DEATH = """
+INSERT INTO player_deaths VALUES (?, ?, 1)
+ON CONFLICT (user_id, cause) DO UPDATE SET count = count + 1
+"""
+_COLUMNS = (
+    "user_id, games, wins, nights_survived, power_left, current_streak, "
+    "best_streak, best_night"
+)
+
+_Row = tuple[int, int, int, int, float, int]
+_LogRow = tuple[int, float, str, bytes]
+
+
+@dataclass(frozen=True, slots=True)
+class PlayerStats:
+    user_id: int
+    games: int
+    wins: int
+    nights_survived: int
+    # Total power left at the end of every survived night.
+    power_left: float
+    current_streak: int
+    best_streak: int
+    best_night: int
+    deaths: dict[str, int]
+
+    @property
+    def average_power_left(self) -> float:
+        if not self.nights_survived:
+            return 0.0
+        return self.power_left / self.nights_survived
+
+
+def _night_row(user_id: int, outcome: str, night: int, power: float) -> _Row:
+    """The ``_RECORD`` parameters for one finished night."""
+    survived = outcome in ("survived", "won")
+    return (
+        user_id,
+        int(outcome != "survived"),
+        int(outcome == "won"),
+        int(survived),
+        power if survived else 0.0,
+        night if survived else night - 1,
+    )
+
+
+class StatsStore(SQLiteStore):
+    """Per-player totals, kept up to date one night at a time.
+
+    Games ``record`` each night they finish; nothing is written from the
+    game loop. Every ``interval`` seconds the recorded nights are added to
+    the players' totals in one transaction off the event loop, so the
+    cost of a write does not depend on how many games were ever played.
+
+    The leaderboard ranks players by wins, then nights survived. Both
+    only ever grow, and the database keeps an index in that order, so the
+    top ``top`` players are one short index read after each write. The
+    result is cached, and ``leaderboard`` just returns it. Reading it
+    from the database also picks up the other shards' players.
+
+    Finished games' event logs are written in the same batches, to
+    ``game_logs``, for ``python -m game.core.replay``.
+    """
+
+    schema = SCHEMA
+    contents = "player stats"
+
+    def __init__(
+        self,
+        path: str | Path,
+        interval: float = 5.0,
+        *,
+        top: int = 10,
+    ) -> None:
+        super().__init__(path, interval)
+        self.top = top
+        self._nights: list[_Row] = []
+        self._deaths: list[tuple[int, str]] = []
+        self._logs: list[_LogRow] = []
+        self._leaders = self._read_leaders()
+
+    def record(
+        self, user_id: int, outcome: str, night: int, power: float
+    ) -> None:
+        """Queue one finished night.
+
+        ``outcome`` is ``survived`` or ``won`` for a night the player got
+        through, ``quit`` for a game they walked away from, otherwise the
+        cause of death. A quit ends the game as a loss but is not a death.
+        """
+        self._nights.append(_night_row(user_id, outcome, night, power))
+        if outcome not in ("survived", "won", "quit"):
+            self._deaths.append((user_id, outcome))
+
+    def archive(self, user_id: int, outcome: str, log: EventLog) -> None:
+        """Queue a finished game's event log."""
+        self._logs.append((user_id, time.time(), outcome, log.to_bytes()))
+
+    def leaderboard(self) -> list[PlayerStats]:
+        """The best players as of the last write, best first."""
+        return self._leaders
+
+    async def player(self, user_id: int) -> PlayerStats | None:
+        async with self._lock:
+            return await asyncio.to_thread(self._read_player, user_id)
+
+    async def flush(self) -> None:
+        async with self._lock:
+            nights, self._nights = self._nights, []
+            deaths, self._deaths = self._deaths, []
+            logs, self._logs = self._logs, []
+            # Even with nothing to write, other shards may have changed the
+            # leaderboard.
+            try:
+                self._leaders = await asyncio.to_thread(
+                    self._write, nights, deaths, logs
+                )
+            except Exception:
+                # Keep them for the next try, ahead of anything newer.
+                self._nights[:0] = nights
+                self._deaths[:0] = deaths
+                self._logs[:0] = logs
+                raise
+            if nights:
+                logger.debug(f"Recorded {len(nights)} nights")
+
+    def _write(
+        self,
+        nights: list[_Row],
+        deaths: list[tuple[int, str]],
+        logs: list[_LogRow],
+    ) -> list[PlayerStats]:
+        if nights or logs:
+            with self._db:
+                self._db.executemany(_RECORD, nights)
+                self._db.executemany(_RECORD_DEATH, deaths)
+                self._db.executemany(
+                    "INSERT INTO game_logs (user_id, finished_at, outcome, "
+                    "log) VALUES (?, ?, ?, ?)",
+                    logs,
+                )
+        return self._read_leaders()
+
+    def _read_leaders(self) -> list[PlayerStats]:
+        rows = self._db.execute(
+            f"SELECT {_COLUMNS} FROM player_stats "
+            "ORDER BY wins DESC, nights_survived DESC, user_id LIMIT ?",
+            (self.top,),
+        ).fetchall()
+        return [self._stats(row) for row in rows]
+
+    def _read_player(self, user_id: int) -> PlayerStats | None:
+        row = self._db.execute(
+            f"SELECT {_COLUMNS} FROM player_stats WHERE user_id = ?",
+            (user_id,),
+        ).fetchone()
+        return self._stats(row) if row is not None else None
+
+    def _stats(self, row: tuple[int, ...]) -> PlayerStats:
+        deaths = dict(
+            self._db.execute(
+                "SELECT cause, count FROM player_deaths WHERE user_id = ?",
+                (row[0],),
+            )
+        )
+        return PlayerStats(*row, deaths=deaths)  # type: ignore[arg-type]
@@ -1,195 +1,316 @@
-from __future__ import annotations
-
-import asyncio
-from typing import TYPE_CHECKING
-
-import discord
-
-if TYPE_CHECKING:
-    from typing import TypeAlias
-
-    from game import FNAFDiscordGame
-
-
-class FNAFGameView(discord.ui.View):
-    def __init__(self, game: FNAFDiscordGame) -> None:
-        super().__init__(timeout=None)
-        self.game = game
-        self.update_buttons()
-
-    def update_buttons(self) -> None:
-        Button: TypeAlias = discord.ui.Button[FNAFGameView]
-
-        self.clear_items()
-
-        if self.game.game_over or self.game.won:
-            restart_button: Button = discord.ui.Button(
-                label="🔄 Restart",
-                style=discord.ButtonStyle.green,
-            )
-            setattr(restart_button, "callback", self.restart_callback)
-            self.add_item(restart_button)
-
-            quit_button: Button = discord.ui.Button(
-                label="❌ Quit",
-                style=discord.ButtonStyle.red,
-            )
-            setattr(quit_button, "callback", self.quit_callback)
-            self.add_item(quit_button)
-        elif self.game.camera_on:
-            for i in range(1, 7):
-                button: Button = discord.ui.Button(
-                    label=f"Cam {i}",
-                    style=(
-                        discord.ButtonStyle.primary
-                        if self.game.current_camera == i
-                        else discord.ButtonStyle.secondary
-                    ),
-                    custom_id=f"cam_{i}",
-                    row=0 if i <= 3 else 1,
-                )
-                setattr(button, "callback", self.camera_callback)
-                self.add_item(button)
-
-            exit_button: Button = discord.ui.Button(
-                label="📱 Exit Cameras",
-                style=discord.ButtonStyle.danger,
-            )
-            setattr(exit_button, "callback", self.exit_camera_callback)
-            self.add_item(exit_button)
-        else:
-            light_button: Button = discord.ui.Button(
-                label="💡 Light",
-                style=(
-                    discord.ButtonStyle.success
-                    if self.game.light_on
-                    else discord.ButtonStyle.secondary
-                ),
-            )
-            setattr(light_button, "callback", self.light_callback)
-            self.add_item(light_button)
-
-            door_button: Button = discord.ui.Button(
-                label="🚪 Door",
-                style=(
-                    discord.ButtonStyle.danger
-                    if self.game.door_closed
-                    else discord.ButtonStyle.secondary
-                ),
-            )
-            setattr(door_button, "callback", self.door_callback)
-            self.add_item(door_button)
-
-            camera_button: Button = discord.ui.Button(
-                label="📹 Cameras",
-                style=discord.ButtonStyle.primary,
-            )
-            setattr(camera_button, "callback", self.camera_open_callback)
-            self.add_item(camera_button)
-
-            quit_button = discord.ui.Button(
-                label="❌ Quit",
-                style=discord.ButtonStyle.red,
-            )
-            setattr(quit_button, "callback", self.quit_callback)
-            self.add_item(quit_button)
-
-    async def light_callback(self, interaction: discord.Interaction) -> None:
-        if interaction.user.id != self.game.user.id:
-            await interaction.response.send_message(
-                "❌ This is not your game!",
-                ephemeral=True,
-            )
-            return
-
-        await interaction.response.defer(thinking=False)
-
-        if self.game.power > 0 and not self.game.door_closed:
-            self.game.light_on = not self.game.light_on
-
-        asyncio.create_task(self.game.update_game_display(force=True))
-
-    async def door_callback(self, interaction: discord.Interaction) -> None:
-        if interaction.user.id != self.game.user.id:
-            await interaction.response.send_message(
-                "❌ This is not your game!",
-                ephemeral=True,
-            )
-            return
-        await interaction.response.defer(thinking=False)
-        if self.game.power <= 0:
-            return
-        self.game.door_closed = not self.game.door_closed
-        asyncio.create_task(self.game.update_game_display(force=True))
-
-    async def camera_open_callback(
-        self,
-        interaction: discord.Interaction,
-    ) -> None:
-        if interaction.user.id != self.game.user.id:
-            await interaction.response.send_message(
-                "❌ This is not your game!",
-                ephemeral=True,
-            )
-            return
-        await interaction.response.defer(thinking=False)
-        if self.game.power <= 0:
-            return
-        await self.game.open_camera()
-        asyncio.create_task(self.game.update_game_display(force=True))
-
-    async def camera_callback(self, interaction: discord.Interaction) -> None:
-        if interaction.user.id != self.game.user.id:
-            await interaction.response.send_message(
-                "❌ This is not your game!",
-                ephemeral=True,
-            )
-            return
-
-        await interaction.response.defer(thinking=False)
-
-        assert interaction.data is not None
-        assert "custom_id" in interaction.data, interaction.data.keys()
-        custom_id = interaction.data["custom_id"]  # type: ignore[typeddict-item]  # noqa: E501
-        custom_id_parts = custom_id.split("_")
-        assert len(custom_id_parts) > 0, len(custom_id_parts)
-        camera_number = int(custom_id_parts[1])
-
-        await self.game.switch_camera(camera_number)
-        asyncio.create_task(self.game.update_game_display(force=True))
-
-    async def exit_camera_callback(
-        self, interaction: discord.Interaction
-    ) -> None:
-        if interaction.user.id != self.game.user.id:
-            await interaction.response.send_message(
-                "❌ This is not your game!",
-                ephemeral=True,
-            )
-            return
-
-        await interaction.response.defer(thinking=False)
-        await self.game.exit_camera()
-        asyncio.create_task(self.game.update_game_display(force=True))
-
-    async def restart_callback(self, interaction: discord.Interaction) -> None:
-        if interaction.user.id != self.game.user.id:
-            await interaction.response.send_message(
-                "❌ This is not your game!",
-                ephemeral=True,
-            )
-            return
-
-        await interaction.response.defer(thinking=False)
-        await self.game.restart_game(interaction)
-
-    async def quit_callback(self, interaction: discord.Interaction) -> None:
-        if interaction.user.id != self.game.user.id:
-            await interaction.response.send_message(
-                "❌ This is not your game!",
-                ephemeral=True,
-            )
-            return
-
-        await interaction.response.defer(thinking=False)
-        await self.game.quit_game(interaction)
+from __future__ import annotations
+
+import re
+import time
+from collections.abc import Mapping
+from typing import TYPE_CHECKING, Any, ClassVar, TypeAlias
+
+import discord
+
+if TYPE_CHECKING:
+    from game import FNAFDiscordGame
+
+
+LayoutKey: TypeAlias = tuple[object, ...]
+Button: TypeAlias = discord.ui.Button[discord.ui.View]
+
+# Button ids carry the game they belong to and what they do, e.g.
+# ``g:<user id>:cam:3``, so one router can serve every message.
+CUSTOM_ID = re.compile(
+    r"g:(?P<game_id>\d+):(?P<action>[a-z]+)(?::(?P<arg>\d+))?"
+)
+
+
+def custom_id(game_id: int, action: str, arg: int | None = None) -> str:
+    return f"g:{game_id}:{action_id(action, arg)}"
+
+
+def action_id(action: str, arg: int | None = None) -> str:
+    """The part of a custom id after the game id."""
+    if arg is None:
+        return action
+    return f"{action}:{arg}"
+
+
+def layout_key(game: FNAFDiscordGame) -> LayoutKey:
+    if game.game_over or game.won:
+        return ("game_over",)
+    elif game.camera_on:
+        return ("cameras", game.current_camera)
+    else:
+        return ("office", game.light_on, game.door_closed)
+
+
+class FNAFGameView(discord.ui.View):
+    """The buttons for one layout of one game.
+
+    These views only describe components; clicks are dispatched by
+    ``GameRouter`` from the custom id. Each layout's components are built
+    once for every game, without the game id, and ``to_components``
+    stamps the game id in when the message is sent. A view holds no items
+    of its own, so one is made for each frame, and it is stopped right
+    away so discord.py never keeps it in its view store.
+    """
+
+    # Component payloads by layout, with only ``action_id`` in each
+    # custom id.
+    _components: ClassVar[dict[LayoutKey, list[dict[str, Any]]]] = {}
+
+    def __init__(self, game_id: int, layout: LayoutKey) -> None:
+        super().__init__(timeout=None)
+        self.game_id = game_id
+        self.layout = layout
+        self.stop()
+
+    @classmethod
+    def for_game(cls, game: FNAFDiscordGame) -> FNAFGameView:
+        return cls(game.user.id, layout_key(game))
+
+    def to_components(self) -> list[dict[str, Any]]:
+        rows = self._components.get(self.layout)
+        if rows is None:
+            template = discord.ui.View(timeout=None)
+            for item in self.build_layout(self.layout):
+                template.add_item(item)
+            template.stop()
+            rows = self._components[self.layout] = template.to_components()
+        return [
+            {
+                **row,
+                "components": [
+                    {
+                        **button,
+                        "custom_id": custom_id(
+                            self.game_id, button["custom_id"]
+                        ),
+                    }
+                    for button in row["components"]
+                ],
+            }
+            for row in rows
+        ]
+
+    @staticmethod
+    def button(
+        action: str,
+        arg: int | None = None,
+        *,
+        label: str,
+        style: discord.ButtonStyle,
+        row: int | None = None,
+    ) -> Button:
+        return discord.ui.Button(
+            label=label,
+            style=style,
+            custom_id=action_id(action, arg),
+            row=row,
+        )
+
+    @classmethod
+    def build_layout(cls, key: LayoutKey) -> list[Button]:
+        items: list[Button] = []
+
+        if key[0] == "game_over":
+            items.append(
+                cls.button(
+                    "restart",
+                    label="🔄 Restart",
+                    style=discord.ButtonStyle.green,
+                )
+            )
+            items.append(
+                cls.button(
+                    "quit",
+                    label="❌ Quit",
+                    style=discord.ButtonStyle.red,
+                )
+            )
+        elif key[0] == "cameras":
+            _, current_camera = key
+            for i in range(1, 7):
+                items.append(
+                    cls.button(
+                        "cam",
+                        i,
+                        label=f"Cam {i}",
+                        style=(
+                            discord.ButtonStyle.primary
+                            if current_camera == i
+                            else discord.ButtonStyle.secondary
+                        ),
+                        row=0 if i <= 3 else 1,
+                    )
+                )
+
+            items.append(
+                cls.button(
+                    "exit",
+                    label="📱 Exit Cameras",
+                    style=discord.ButtonStyle.danger,
+                )
+            )
+        else:
+            _, light_on, door_closed = key
+            items.append(
+                cls.button(
+                    "light",
+                    label="💡 Light",
+                    style=(
+                        discord.ButtonStyle.success
+                        if light_on
+                        else discord.ButtonStyle.secondary
+                    ),
+                )
+            )
+            items.append(
+                cls.button(
+                    "door",
+                    label="🚪 Door",
+                    style=(
+                        discord.ButtonStyle.danger
+                        if door_closed
+                        else discord.ButtonStyle.secondary
+                    ),
+                )
+            )
+            items.append(
+                cls.button(
+                    "cams",
+                    label="📹 Cameras",
+                    style=discord.ButtonStyle.primary,
+                )
+            )
+            items.append(
+                cls.button(
+                    "quit",
+                    label="❌ Quit",
+                    style=discord.ButtonStyle.red,
+                )
+            )
+
+        return items
+
+
+class GameRouter(discord.ui.DynamicItem[Button], template=CUSTOM_ID):
+    """Persistent dispatcher for every game button.
+
+    Registered once with ``bot.add_dynamic_items``; each click is resolved
+    against ``games`` from its custom id, so buttons keep answering after
+    a restart instead of failing silently. The press is answered with
+    the new frame as the interaction response (see ``respond``).
+    """
+
+    games: ClassVar[Mapping[int, FNAFDiscordGame]] = {}
+
+    def __init__(
+        self,
+        item: Button,
+        game_id: int,
+        action: str,
+        arg: int | None = None,
+    ) -> None:
+        super().__init__(item)
+        self.game_id = game_id
+        self.action = action
+        self.arg = arg
+
+    @classmethod
+    def bind(cls, games: Mapping[int, FNAFDiscordGame]) -> None:
+        cls.games = games
+
+    @classmethod
+    async def from_custom_id(
+        cls,
+        interaction: discord.Interaction,
+        item: Button,
+        match: re.Match[str],
+        /,
+    ) -> GameRouter:
+        arg = match["arg"]
+        return cls(
+            item,
+            int(match["game_id"]),
+            match["action"],
+            int(arg) if arg is not None else None,
+        )
+
+    async def callback(self, interaction: discord.Interaction) -> None:
+        received = time.perf_counter()
+        game = self.games.get(self.game_id)
+        if (
+            game is None
+            or game.game_message is None
+            or interaction.message is None
+            or interaction.message.id != game.game_message.id
+        ):
+            await interaction.response.send_message(
+                "⌛ This game has ended.",
+                ephemeral=True,
+            )
+            return
+
+        if interaction.user.id != game.user.id:
+            await interaction.response.send_message(
+                "❌ This is not your game!",
+                ephemeral=True,
+            )
+            return
+
+        # Handlers only change state; the new frame is the response.
+        handler = getattr(self, f"on_{self.action}", None)
+        if handler is not None:
+            await handler(game, interaction)
+        if not interaction.response.is_done():
+            await game.respond(interaction, received)
+
+    async def on_light(
+        self,
+        game: FNAFDiscordGame,
+        interaction: discord.Interaction,
+    ) -> None:
+        game.press("light")
+
+    async def on_door(
+        self,
+        game: FNAFDiscordGame,
+        interaction: discord.Interaction,
+    ) -> None:
+        game.press("door")
+
+    async def on_cams(
+        self,
+        game: FNAFDiscordGame,
+        interaction: discord.Interaction,
+    ) -> None:
+        game.press("cams")
+
+    async def on_cam(
+        self,
+        game: FNAFDiscordGame,
+        interaction: discord.Interaction,
+    ) -> None:
+        assert self.arg is not None
+        game.press("cam", self.arg)
+
+    async def on_exit(
+        self,
+        game: FNAFDiscordGame,
+        interaction: discord.Interaction,
+    ) -> None:
+        game.press("exit")
+
+    async def on_restart(
+        self,
+        game: FNAFDiscordGame,
+        interaction: discord.Interaction,
+    ) -> None:
+        await interaction.response.defer(thinking=False)
+        await game.restart_game(interaction)
+
+    async def on_quit(
+        self,
+        game: FNAFDiscordGame,
+        interaction: discord.Interaction,
+    ) -> None:
+        await interaction.response.defer(thinking=False)
+        await game.quit_game(interaction)
@@ -0,0 +1,148 @@
+"""Run the bot as several shard processes and keep them running.
+
+Each shard is a separate ``bot.py`` process with its own event loop, so
+games are spread over as many cores as there are shards. Discord routes
+every guild to exactly one shard, which then owns the games started there.
+Shards share the snapshot database, which is also how ``start`` finds out
+that a player already has a game on another shard.
+
+Usage::
+
+    python launcher.py --shards 4
+
+A shard that exits is restarted after a delay that doubles on every quick
+crash, up to ``MAX_BACKOFF`` seconds. SIGINT and SIGTERM stop every shard
+and wait for them to save their games.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import signal
+import sys
+import time
+from collections.abc import Sequence
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+from config import logger, setup_logging
+
+BOT = Path(__file__).with_name("bot.py")
+# Discord only accepts one IDENTIFY every 5 seconds per bot.
+IDENTIFY_DELAY = 5.0
+MIN_BACKOFF = 1.0
+MAX_BACKOFF = 60.0
+# A shard that ran at least this long crashed for a new reason; start it
+# again without waiting out the previous backoff.
+STABLE_AFTER = 300.0
+STOP_TIMEOUT = 30.0
+
+
+class Shard:
+    def __init__(self, shard_id: int, shard_count: int) -> None:
+        self.shard_id = shard_id
+        self.shard_count = shard_count
+        self.process: asyncio.subprocess.Process | None = None
+        self.backoff = MIN_BACKOFF
+
+    async def spawn(self) -> None:
+        env = dict(
+            os.environ,
+            SHARD_ID=str(self.shard_id),
+            SHARD_COUNT=str(self.shard_count),
+        )
+        self.process = await asyncio.create_subprocess_exec(
+            sys.executable,
+            str(BOT),
+            env=env,
+            # Keep terminal Ctrl-C away from the shards; stop() forwards it
+            # once so they shut down cleanly.
+            start_new_session=True,
+        )
+        logger.info(f"shard {self.shard_id} started (pid {self.process.pid})")
+
+    async def supervise(self, stopping: asyncio.Event) -> None:
+        while not stopping.is_set():
+            started = time.monotonic()
+            await self.spawn()
+            assert self.process is not None
+            if stopping.is_set():
+                # run() may have stopped the shards while this one spawned.
+                await self.stop()
+                break
+            code = await self.process.wait()
+            if stopping.is_set():
+                break
+
+            if time.monotonic() - started >= STABLE_AFTER:
+                self.backoff = MIN_BACKOFF
+            logger.error(
+                f"shard {self.shard_id} exited with {code}, "
+                f"restarting in {self.backoff:.0f}s"
+            )
+            try:
+                await asyncio.wait_for(stopping.wait(), self.backoff)
+            except TimeoutError:
+                pass
+            self.backoff = min(self.backoff * 2, MAX_BACKOFF)
+
+    async def stop(self) -> None:
+        process = self.process
+        if process is None or process.returncode is not None:
+            return
+        process.send_signal(signal.SIGINT)
+        try:
+            await asyncio.wait_for(process.wait(), STOP_TIMEOUT)
+        except TimeoutError:
+            logger.warning(f"shard {self.shard_id} did not stop, killing it")
+            process.kill()
+            await process.wait()
+
+
+async def run(shard_count: int) -> None:
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stopping.set)
+
+    shards = [Shard(shard_id, shard_count) for shard_id in range(shard_count)]
+    tasks: list[asyncio.Task[None]] = []
+    for shard in shards:
+        if stopping.is_set():
+            break
+        tasks.append(asyncio.create_task(shard.supervise(stopping)))
+        try:
+            await asyncio.wait_for(stopping.wait(), IDENTIFY_DELAY)
+        except TimeoutError:
+            pass
+
+    await stopping.wait()
+    logger.info("stopping shards")
+    await asyncio.gather(*(shard.stop() for shard in shards))
+    await asyncio.gather(*tasks)
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    setup_logging()
+    load_dotenv()
+    parser = argparse.ArgumentParser(
+        prog="python launcher.py",
+        description="Run and supervise the bot's shard processes.",
+    )
+    parser.add_argument(
+        "--shards",
+        type=int,
+        default=int(os.environ.get("SHARD_COUNT", os.cpu_count() or 1)),
+        help="number of shard processes (default: SHARD_COUNT or CPUs)",
+    )
+    args = parser.parse_args(argv)
+    if args.shards < 1:
+        parser.error("--shards must be at least 1")
+    asyncio.run(run(args.shards))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+import asyncio
+import time
+from pathlib import Path
+
+import pytest
+
+from game.assets import EXPIRY_MARGIN, AssetRegistry, link_expiry
+
+NAMES = ("light.webp", "default.webp")
+
+
+def cdn_url(name: str, expires: float) -> str:
+    return (
+        f"https://cdn.discordapp.com/attachments/1/2/{name}"
+        f"?ex={int(expires):x}"
+    )
+
+
+class FakeUploader:
+    """Hands out CDN URLs expiring ``lifetime`` seconds from now."""
+
+    def __init__(self, lifetime: float = 3600.0) -> None:
+        self.lifetime = lifetime
+        self.calls: list[str] = []
+
+    async def __call__(self, name: str, path: Path) -> str:
+        assert path.exists(), path
+        self.calls.append(name)
+        await asyncio.sleep(0)
+        return cdn_url(name, time.time() + self.lifetime)
+
+
+def webp(data: bytes) -> bytes:
+    return b"RIFF" + len(data).to_bytes(4, "little") + b"WEBP" + data
+
+
+@pytest.fixture
+def directory(tmp_path: Path) -> Path:
+    for name in NAMES:
+        data = name.encode()
+        (tmp_path / name).write_bytes(webp(data))
+    return tmp_path
+
+
+def test_identical_uploads_share_one_upload(directory: Path) -> None:
+    uploader = FakeUploader()
+    assets = AssetRegistry(directory, uploader=uploader)
+
+    async def main() -> list[str | None]:
+        urls = await asyncio.gather(
+            *(assets.upload("light.webp") for _ in range(5))
+        )
+        urls.append(await assets.upload("light.webp"))
+        return urls
+
+    urls = asyncio.run(main())
+    assert uploader.calls == ["light.webp"]
+    assert len(set(urls)) == 1
+    assert assets.url_for("light.webp") == urls[0]
+
+
+def test_upload_missing_skips_hosted_images(directory: Path) -> None:
+    uploader = FakeUploader()
+    hosted = "https://example.com/light.webp"
+    assets = AssetRegistry(
+        directory, {"light.webp": hosted}, uploader=uploader
+    )
+    asyncio.run(assets.upload_missing())
+    assert uploader.calls == ["default.webp"]
+    assert assets.url_for("light.webp") == hosted
+
+
+def test_link_expiry() -> None:
+    assert link_expiry("https://example.com/light.webp") is None
+    assert link_expiry(cdn_url("light.webp", 1_700_000_000)) == 1_700_000_000
+    unsigned = link_expiry("https://cdn.discordapp.com/a/light.webp")
+    assert unsigned is not None and unsigned > time.time()
+
+
+def test_expiring_cdn_url_is_uploaded_again(directory: Path) -> None:
+    uploader = FakeUploader()
+    stale = cdn_url("light.webp", time.time() + EXPIRY_MARGIN / 2)
+    assets = AssetRegistry(directory, {"light.webp": stale}, uploader)
+
+    async def main() -> tuple[str | None, str | None]:
+        # Close to expiry the URL is dropped and a new upload starts.
+        first = assets.url_for("light.webp")
+        await asyncio.sleep(0.01)
+        return first, assets.url_for("light.webp")
+
+    first, second = asyncio.run(main())
+    assert first is None
+    assert uploader.calls == ["light.webp"]
+    assert second is not None and second != stale
+
+
+def test_attachments_for(directory: Path) -> None:
+    stale = cdn_url("default.webp", time.time() - 1)
+    assets = AssetRegistry(
+        directory,
+        {
+            "light.webp": "https://example.com/light.webp",
+            "default.webp": stale,
+        },
+    )
+    # Hosted images are referenced by URL, with nothing to attach.
+    assert assets.attachments_for("light.webp") == []
+    # Without a usable URL the image on disk is attached instead.
+    files = assets.attachments_for("default.webp")
+    assert [file.filename for file in files] == ["default.webp"]
+    for file in files:
+        file.close()
+    assert assets.attachments_for("missing.webp") == []
+
+
+def test_attachments_come_from_the_bundle(directory: Path) -> None:
+    assets = AssetRegistry(directory)
+    assets.preload(NAMES)
+    # Once preloaded, the files on disk are no longer read.
+    (directory / "light.webp").unlink()
+
+    assert assets.size_of("light.webp") == len(webp(b"light.webp"))
+    [file] = assets.attachments_for("light.webp")
+    assert file.filename == "light.webp"
+    assert file.fp.read() == webp(b"light.webp")
+    file.close()
+
+
+def test_preload_rejects_broken_images(directory: Path) -> None:
+    (directory / "default.webp").write_bytes(b"not an image")
+    assets = AssetRegistry(directory)
+    with pytest.raises(ValueError, match="default.webp"):
+        assets.preload(NAMES)
+    assert assets.bundle is None
@@ -0,0 +1,160 @@
+import asyncio
+
+from game.bench import Backend, FakeChannel, FakeMember, Recorder
+from game.core.clock import VirtualClock
+from game.game import FNAFDiscordGame
+from game.governor import LoadGovernor
+from game.outbound import EditQueue, Priority
+from game.scheduler import TickScheduler
+
+
+class Bot:
+    """Games sharing one governor that lets a single game run."""
+
+    def __init__(self) -> None:
+        self.backend = Backend(latency=0, jitter=0)
+        self.recorder = Recorder()
+        self.scheduler = TickScheduler(VirtualClock())
+        self.outbox = EditQueue(global_rate=10**6, channel_rate=10**6)
+        self.games: dict[int, FNAFDiscordGame] = {}
+        self.governor = LoadGovernor(self.games, self.outbox, max_games=1)
+        self.most_running = 0
+
+    def running(self) -> int:
+        running = sum(
+            not (game.game_over or game.won) for game in self.games.values()
+        )
+        self.most_running = max(self.most_running, running)
+        return running
+
+    async def start(self) -> FNAFDiscordGame:
+        channel = FakeChannel(self.backend, self.recorder)
+        user = FakeMember(channel.guild)
+        assert self.governor.try_admit(user.id, channel.guild.id)
+        game = FNAFDiscordGame(
+            channel,
+            user,
+            self.games,
+            self.scheduler,
+            outbox=self.outbox,
+            governor=self.governor,
+        )
+        self.games[user.id] = game
+        await game.start_game()
+        return game
+
+    async def settle(self) -> None:
+        for _ in range(50):
+            self.running()
+            await asyncio.sleep(0)
+
+
+def lose(game: FNAFDiscordGame) -> None:
+    game._end_game(game.clock.now(), "door_attack")
+
+
+async def restart(game: FNAFDiscordGame) -> None:
+    # The interaction is only answered by the router.
+    await game.restart_game(None)  # type: ignore[arg-type]
+
+
+def test_restart_waits_for_a_free_slot() -> None:
+    async def main() -> None:
+        bot = Bot()
+        first = await bot.start()
+        lose(first)
+        second = await bot.start()
+
+        restarting = asyncio.create_task(restart(first))
+        await bot.settle()
+        assert not restarting.done()
+        assert bot.games[first.user.id] is first
+        assert bot.governor.position(first.user.id) == 1
+
+        lose(second)
+        await bot.settle()
+        await restarting
+        assert bot.games[first.user.id] is not first
+        assert bot.running() == 1
+        assert bot.most_running == 1
+
+    asyncio.run(main())
+
+
+def test_restart_queues_behind_waiting_players() -> None:
+    async def main() -> None:
+        bot = Bot()
+        first = await bot.start()
+        lose(first)
+        second = await bot.start()
+
+        channel = FakeChannel(bot.backend, bot.recorder)
+        waiting = asyncio.create_task(
+            bot.governor.admit(channel, 1, channel.guild.id)
+        )
+        await bot.settle()
+        restarting = asyncio.create_task(restart(first))
+        await bot.settle()
+        assert bot.governor.position(first.user.id) == 2
+
+        lose(second)
+        await bot.settle()
+        assert await waiting
+        assert not restarting.done()
+        assert bot.governor.usage(None).running == 1
+
+        bot.governor.cancel(1)
+        await bot.settle()
+        await restarting
+        assert bot.most_running == 1
+
+    asyncio.run(main())
+
+
+def test_restart_needs_no_wait_with_a_free_slot() -> None:
+    async def main() -> None:
+        bot = Bot()
+        first = await bot.start()
+        lose(first)
+        await restart(first)
+        new = bot.games[first.user.id]
+        assert new is not first and new.game_active
+        # The slot went to the new game and is not held twice.
+        assert bot.governor.usage(None).running == 1
+
+    asyncio.run(main())
+
+
+def test_pressing_restart_twice_starts_one_game() -> None:
+    async def main() -> None:
+        bot = Bot()
+        first = await bot.start()
+        lose(first)
+
+        await asyncio.gather(restart(first), restart(first))
+        await bot.settle()
+        new = bot.games[first.user.id]
+        assert new is not first and new.game_active
+        assert len(bot.governor) == 0
+        assert bot.governor.usage(None).running == 1
+        # The first game's message and the new game's, nothing else.
+        assert bot.recorder.sends == 2
+
+    asyncio.run(main())
+
+
+def test_only_game_edits_stretch_refreshes() -> None:
+    async def send() -> None:
+        pass
+
+    async def main() -> None:
+        outbox = EditQueue()
+        governor = LoadGovernor({}, outbox, stretch_backlog=2)
+        for i in range(4):
+            outbox.submit(("mirror", i), 1, send, Priority.SPECTATOR)
+        assert governor.refresh_scale() == 1.0
+        outbox.submit("refresh", 2, send, Priority.PERIODIC)
+        outbox.submit("press", 3, send)
+        assert governor.refresh_scale() == 2.0
+
+    asyncio.run(main())
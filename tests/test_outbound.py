@@ -0,0 +1,133 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+
+import discord
+
+from game.outbound import EditQueue, Priority
+
+
+def fast_queue(**kwargs: int) -> EditQueue:
+    return EditQueue(channel_rate=1000, global_rate=1000, **kwargs)
+
+
+def sender(sent: list[str], name: str) -> Callable[[], Awaitable[None]]:
+    async def send() -> None:
+        sent.append(name)
+
+    return send
+
+
+def test_edits_to_one_message_are_merged() -> None:
+    sent: list[str] = []
+
+    async def main() -> list[bool]:
+        queue = fast_queue()
+        futures = [
+            queue.submit("message", 1, sender(sent, name))
+            for name in ("first", "second", "third")
+        ]
+        return list(await asyncio.gather(*futures))
+
+    assert asyncio.run(main()) == [False, False, True]
+    assert sent == ["third"]
+
+
+def test_merge_keeps_the_most_urgent_priority() -> None:
+    sent: list[str] = []
+
+    async def main() -> None:
+        queue = fast_queue()
+        other = queue.submit(
+            "other", 1, sender(sent, "other"), Priority.PERIODIC
+        )
+        queue.submit(
+            "message", 1, sender(sent, "spectator"), Priority.SPECTATOR
+        )
+        merged = queue.submit("message", 1, sender(sent, "input"))
+        stats = queue.stats()
+        assert (stats.high, stats.periodic, stats.spectator) == (1, 1, 0)
+        await asyncio.gather(other, merged)
+        assert queue.queued(*Priority) == 0
+
+    asyncio.run(main())
+    assert sent == ["input", "other"]
+
+
+def test_higher_priority_goes_first() -> None:
+    sent: list[str] = []
+
+    async def main() -> None:
+        queue = fast_queue()
+        futures = [
+            queue.submit(
+                "spectator", 1, sender(sent, "spectator"), Priority.SPECTATOR
+            ),
+            queue.submit(
+                "periodic", 1, sender(sent, "periodic"), Priority.PERIODIC
+            ),
+            queue.submit("input", 1, sender(sent, "input")),
+        ]
+        await asyncio.gather(*futures)
+
+    asyncio.run(main())
+    assert sent == ["input", "periodic", "spectator"]
+
+
+def test_periodic_edits_are_dropped_when_backed_up() -> None:
+    sent: list[str] = []
+
+    async def main() -> list[bool]:
+        queue = fast_queue(max_periodic_backlog=2)
+        futures = [
+            queue.submit("a", 1, sender(sent, "a"), Priority.PERIODIC),
+            queue.submit("b", 1, sender(sent, "b"), Priority.PERIODIC),
+            queue.submit("c", 1, sender(sent, "c"), Priority.PERIODIC),
+            queue.submit("d", 1, sender(sent, "d"), Priority.SPECTATOR),
+            # Player input is never dropped.
+            queue.submit("e", 1, sender(sent, "e")),
+        ]
+        stats = queue.stats()
+        assert (stats.high, stats.periodic, stats.spectator) == (1, 2, 0)
+        assert stats.dropped == 2
+        return list(await asyncio.gather(*futures))
+
+    assert asyncio.run(main()) == [True, True, False, False, True]
+    assert sorted(sent) == ["a", "b", "e"]
+
+
+def test_rate_limited_edit_is_retried() -> None:
+    calls: list[str] = []
+
+    async def send() -> None:
+        calls.append("edit")
+        if len(calls) == 1:
+            raise discord.RateLimited(0.01)
+
+    async def main() -> bool:
+        queue = fast_queue()
+        delivered = await queue.submit("message", 1, send)
+        assert queue.stats().rate_limited == 1
+        assert queue.stats().sent == 1
+        return delivered
+
+    assert asyncio.run(main()) is True
+    assert calls == ["edit", "edit"]
+
+
+def test_retry_gives_way_to_a_newer_edit() -> None:
+    sent: list[str] = []
+
+    async def main() -> list[bool]:
+        queue = fast_queue()
+        newer: list[asyncio.Future[bool]] = []
+
+        async def limited() -> None:
+            sent.append("old")
+            newer.append(queue.submit("message", 1, sender(sent, "new")))
+            raise discord.RateLimited(0.01)
+
+        old = await queue.submit("message", 1, limited)
+        return [old, await newer[0]]
+
+    assert asyncio.run(main()) == [False, True]
+    assert sent == ["old", "new"]
@@ -0,0 +1,141 @@
+import asyncio
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+
+from game.core.clock import VirtualClock
+from game.persistence import SnapshotStore, shard_for
+
+
+class FakeGame:
+    def __init__(self, user_id: int, guild_id: int | None = 1) -> None:
+        guild = SimpleNamespace(id=guild_id) if guild_id is not None else None
+        self.channel = SimpleNamespace(id=10, guild=guild)
+        self.game_message: Any = SimpleNamespace(id=100 + user_id)
+        self.clock = VirtualClock()
+        self.state: dict[str, Any] = {"night": 1, "power": 100.0}
+
+    def snapshot(self) -> dict[str, Any]:
+        return dict(self.state)
+
+
+Writes = list[tuple[list[tuple[Any, ...]], list[tuple[int]]]]
+
+
+@pytest.fixture
+def path(tmp_path: Path) -> Path:
+    return tmp_path / "games.db"
+
+
+def spy(store: SnapshotStore, monkeypatch: pytest.MonkeyPatch) -> Writes:
+    writes: Writes = []
+    write = store._write
+
+    def recording(*args: Any) -> None:
+        writes.append((args[0], args[1]))
+        write(*args)
+
+    monkeypatch.setattr(store, "_write", recording)
+    return writes
+
+
+def test_flush_writes_only_changed_games(
+    path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    games: dict[int, Any] = {1: FakeGame(1), 2: FakeGame(2), 3: FakeGame(3)}
+    games[3].game_message = None
+    store = SnapshotStore(path, games)
+    writes = spy(store, monkeypatch)
+
+    async def main() -> None:
+        await store.flush()
+        await store.flush()
+        games[2].state["power"] = 42.0
+        await store.flush()
+        del games[1]
+        await store.flush()
+
+    asyncio.run(main())
+    store.close()
+    # Game 3 has not sent its message yet, so it is not saved.
+    assert [row[0] for row in writes[0][0]] == [1, 2]
+    # Nothing changed, nothing written.
+    assert [[row[0] for row in rows] for rows, _ in writes[1:]] == [[2], []]
+    assert [removed for _, removed in writes] == [[], [], [(1,)]]
+
+
+def test_saved_games_are_loaded_back(
+    path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    games: dict[int, Any] = {1: FakeGame(1), 2: FakeGame(2, guild_id=None)}
+    games[1].state["power"] = 42.0
+    store = SnapshotStore(path, games)
+    asyncio.run(store.flush())
+    store.close()
+
+    restarted = SnapshotStore(path, games)
+    writes = spy(restarted, monkeypatch)
+    snapshots = {snapshot.user_id: snapshot for snapshot in restarted.load()}
+    assert snapshots.keys() == {1, 2}
+    assert snapshots[1].state == {"night": 1, "power": 42.0}
+    assert (snapshots[1].guild_id, snapshots[1].message_id) == (1, 101)
+    assert snapshots[2].guild_id is None
+    # What was loaded counts as written.
+    asyncio.run(restarted.flush())
+    restarted.close()
+    assert writes == []
+
+
+def test_a_game_is_claimed_by_one_shard(path: Path) -> None:
+    games: list[dict[int, Any]] = [{}, {}]
+    shards = [
+        SnapshotStore(path, games[shard], shard_id=shard, shard_count=2)
+        for shard in range(2)
+    ]
+
+    async def main() -> list[bool]:
+        claims = [
+            await shards[0].claim(7),
+            await shards[1].claim(7),
+            await shards[0].claim(7),
+        ]
+        games[0][7] = FakeGame(7)
+        await shards[0].flush()
+        claims.append(await shards[1].claim(7))
+        # The game ended, so the next flush releases the claim.
+        del games[0][7]
+        await shards[0].flush()
+        claims.append(await shards[1].claim(7))
+        return claims
+
+    assert asyncio.run(main()) == [True, False, True, False, True]
+    for store in shards:
+        store.close()
+
+
+def test_each_shard_loads_its_own_guilds(path: Path) -> None:
+    guilds = {1: 2 << 22, 2: 3 << 22, 3: None}
+    assert [shard_for(guild, 2) for guild in guilds.values()] == [0, 1, 0]
+    games: dict[int, Any] = {
+        user_id: FakeGame(user_id, guild) for user_id, guild in guilds.items()
+    }
+    store = SnapshotStore(path, games)
+    asyncio.run(store.flush())
+    store.close()
+
+    shards = [
+        SnapshotStore(path, {}, shard_id=shard, shard_count=2)
+        for shard in range(2)
+    ]
+    loaded = [
+        sorted(snapshot.user_id for snapshot in store.load())
+        for store in shards
+    ]
+    assert loaded == [[1, 3], [2]]
+    # Loading claims the games for the shard that runs them.
+    claims = [asyncio.run(shards[0].claim(2)), asyncio.run(shards[1].claim(2))]
+    assert claims == [False, True]
+    for store in shards:
+        store.close()
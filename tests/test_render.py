@@ -0,0 +1,83 @@
+import asyncio
+
+import discord
+
+from game.outbound import Priority
+from game.render import Frame, RenderPipeline
+
+
+class Display:
+    """A game state to render and a message that takes a while to edit."""
+
+    def __init__(self) -> None:
+        self.state = 0
+        self.rendered = 0
+        self.sent: list[tuple[str | None, Priority]] = []
+        self.release = asyncio.Event()
+        self.pipeline = RenderPipeline(self.render, self.send)
+
+    def render(self) -> Frame:
+        self.rendered += 1
+        return Frame(discord.Embed(title=str(self.state)), "office.png", None)
+
+    async def send(self, frame: Frame, priority: Priority) -> bool:
+        self.sent.append((frame.embed.title, priority))
+        await self.release.wait()
+        self.release.clear()
+        return True
+
+    async def settle(self) -> None:
+        while self.pipeline.busy:
+            self.release.set()
+            await asyncio.sleep(0)
+
+
+def test_requests_during_an_edit_become_one_edit() -> None:
+    async def main() -> Display:
+        display = Display()
+        display.pipeline.request()
+        await asyncio.sleep(0)
+        for state in range(1, 6):
+            display.state = state
+            display.pipeline.request(Priority.PERIODIC)
+        await display.settle()
+        return display
+
+    display = asyncio.run(main())
+    assert display.sent == [("0", Priority.HIGH), ("5", Priority.PERIODIC)]
+    assert display.rendered == 2
+
+
+def test_most_urgent_priority_wins() -> None:
+    async def main() -> Display:
+        display = Display()
+        display.pipeline.request()
+        await asyncio.sleep(0)
+        display.state = 1
+        display.pipeline.request(Priority.PERIODIC)
+        display.pipeline.request(Priority.HIGH)
+        display.pipeline.request(Priority.PERIODIC)
+        await display.settle()
+        return display
+
+    assert asyncio.run(main()).sent == [
+        ("0", Priority.HIGH),
+        ("1", Priority.HIGH),
+    ]
+
+
+def test_unchanged_frame_is_not_sent() -> None:
+    async def main() -> Display:
+        display = Display()
+        display.pipeline.request()
+        await display.settle()
+        display.pipeline.request()
+        await display.settle()
+        display.pipeline.invalidate()
+        display.pipeline.request()
+        await display.settle()
+        return display
+
+    display = asyncio.run(main())
+    assert display.sent == [("0", Priority.HIGH), ("0", Priority.HIGH)]
+    assert display.rendered == 3
@@ -0,0 +1,141 @@
+import asyncio
+import json
+import random
+
+from game.bench import Backend, FakeChannel, FakeMember, Recorder
+from game.core.clock import VirtualClock
+from game.core.replay import replay
+from game.core.rules import FNAFGame
+from game.game import FNAFDiscordGame
+from game.outbound import EditQueue
+from game.scheduler import Tickable, TickScheduler
+
+SEEDS = range(40)
+
+
+class LaggyScheduler(TickScheduler):
+    """Ticks games late by random amounts, like a busy event loop."""
+
+    def __init__(self, clock: VirtualClock, rng: random.Random) -> None:
+        super().__init__(clock)
+        self.rng = rng
+
+    def schedule(self, item: Tickable, deadline: float) -> None:
+        lag = self.rng.choice([0.0, 0.0, 0.0003, 0.7, 2.5])
+        super().schedule(item, deadline + lag)
+
+
+async def player(
+    clock: VirtualClock, game: FNAFGame, rng: random.Random
+) -> None:
+    """Keeps the door shut while an enemy is at it, mostly, and presses
+    other buttons now and then."""
+    while game.game_active:
+        await clock.sleep(rng.uniform(0.05, 0.6))
+        if not game.game_active:
+            return
+        if game.enemy_at_door != game.door_closed and rng.random() < 0.98:
+            game.press("door")
+        elif rng.random() < 0.05:
+            action = rng.choice(["light", "cams", "cam", "exit"])
+            game.press(action, rng.randint(1, 6) if action == "cam" else None)
+
+
+async def play_games() -> list[FNAFDiscordGame]:
+    rng = random.Random(1234)
+    clock = VirtualClock(start=1000.0)
+    scheduler = LaggyScheduler(clock, rng)
+    backend = Backend(latency=0, jitter=0)
+    recorder = Recorder()
+    outbox = EditQueue(global_rate=10**6, channel_rate=10**6)
+    games: dict[int, FNAFDiscordGame] = {}
+    players = []
+    for seed in SEEDS:
+        channel = FakeChannel(backend, recorder)
+        user = FakeMember(channel.guild)
+        game = FNAFDiscordGame(
+            channel, user, games, scheduler, outbox=outbox, seed=seed
+        )
+        games[user.id] = game
+        await game.start_game()
+        players.append(asyncio.create_task(player(clock, game, rng)))
+        await clock.advance(rng.random() * 3)
+    await clock.run(limit=6 * 3600)
+    for task in players:
+        task.cancel()
+    return list(games.values())
+
+
+def test_replay_matches_live_games() -> None:
+    games = asyncio.run(play_games())
+    assert all(game.game_over or game.won for game in games)
+    for game in games:
+        assert replay(game.events).snapshot() == game.snapshot()
+
+
+def without_log(game: FNAFGame) -> dict[str, object]:
+    state = game.snapshot()
+    del state["events"]
+    return state
+
+
+def test_replay_until_matches_the_game_at_that_time() -> None:
+    clock = VirtualClock()
+    rng = random.Random(7)
+    game = FNAFGame(clock, seed=7)
+    game.game_active = True
+    states = []
+    while game.game_active:
+        clock.move_to(clock.now() + rng.expovariate(1 / 3))
+        game.press(rng.choice(["door", "light", "cams", "exit"]))
+        if not game.game_active:
+            break
+        # The press is logged, and applied, at the next millisecond.
+        states.append((game.events.last_ms / 1000, without_log(game)))
+    assert len(states) > 20
+    for at, state in states[:: len(states) // 20]:
+        assert without_log(replay(game.events, at)) == state
+
+
+def test_snapshot_restore_round_trip() -> None:
+    clock = VirtualClock()
+    rng = random.Random(3)
+    game = FNAFGame(clock, seed=3)
+    game.game_active = True
+    for at in range(1, 150, 7):
+        clock.move_to(at)
+        game.press(rng.choice(["door", "light", "cams", "cam", "exit"]), 2)
+    assert game.game_active
+
+    state = json.loads(json.dumps(game.snapshot()))
+    restored = FNAFGame(clock, seed=99)
+    restored.restore(state)
+    restored.game_active = True
+    assert restored.snapshot() == game.snapshot()
+
+    # Both carry on exactly alike, random draws included.
+    for at in range(150, 4000, 11):
+        clock.move_to(at)
+        action = rng.choice(["door", "light", "cams", "exit"])
+        game.press(action)
+        restored.press(action)
+    game.advance(10_000)
+    restored.advance(10_000)
+    assert restored.snapshot() == game.snapshot()
+    assert not game.game_active
+
+
+def test_a_quit_replays_as_a_quit() -> None:
+    clock = VirtualClock()
+    game = FNAFGame(clock, seed=5)
+    game.game_active = True
+    clock.move_to(30)
+    game.press("door")
+    clock.move_to(75)
+    game.press("quit")
+    assert not game.game_active
+
+    replayed = replay(game.events)
+    assert replayed.result == "quit"
+    assert [night.outcome for night in replayed.nights] == ["quit"]
+    assert replayed.snapshot() == game.snapshot()
@@ -0,0 +1,89 @@
+import asyncio
+from collections.abc import Callable
+
+from game.core.clock import VirtualClock
+from game.scheduler import TickScheduler
+
+
+class Item:
+    def __init__(self, name: str, ticks: list[tuple[str, float]]) -> None:
+        self.name = name
+        self.ticks = ticks
+        self.every: float | None = None
+
+    def tick(self, now: float) -> float | None:
+        self.ticks.append((self.name, now))
+        return now + self.every if self.every is not None else None
+
+
+Scheduling = Callable[[TickScheduler, Callable[[str], Item]], None]
+
+
+def run(scheduling: Scheduling) -> list[tuple[str, float]]:
+    ticks: list[tuple[str, float]] = []
+
+    async def main() -> None:
+        clock = VirtualClock()
+        scheduler = TickScheduler(clock)
+        scheduling(scheduler, lambda name: Item(name, ticks))
+        await clock.advance(10)
+
+    asyncio.run(main())
+    return ticks
+
+
+def test_items_tick_in_deadline_order() -> None:
+    def scheduling(
+        scheduler: TickScheduler, item: Callable[[str], Item]
+    ) -> None:
+        scheduler.schedule(item("c"), 3)
+        scheduler.schedule(item("a"), 1)
+        scheduler.schedule(item("b"), 2)
+
+    assert run(scheduling) == [("a", 1), ("b", 2), ("c", 3)]
+
+
+def test_same_deadline_keeps_schedule_order() -> None:
+    def scheduling(
+        scheduler: TickScheduler, item: Callable[[str], Item]
+    ) -> None:
+        for name in "xyz":
+            scheduler.schedule(item(name), 5)
+
+    assert run(scheduling) == [("x", 5), ("y", 5), ("z", 5)]
+
+
+def test_rescheduling_replaces_the_old_deadline() -> None:
+    def scheduling(
+        scheduler: TickScheduler, item: Callable[[str], Item]
+    ) -> None:
+        a = item("a")
+        scheduler.schedule(a, 1)
+        scheduler.schedule(item("b"), 2)
+        scheduler.schedule(a, 4)
+
+    assert run(scheduling) == [("b", 2), ("a", 4)]
+
+
+def test_discarded_items_do_not_tick() -> None:
+    def scheduling(
+        scheduler: TickScheduler, item: Callable[[str], Item]
+    ) -> None:
+        a = item("a")
+        scheduler.schedule(a, 1)
+        scheduler.schedule(item("b"), 2)
+        scheduler.discard(a)
+
+    assert run(scheduling) == [("b", 2)]
+
+
+def test_returned_deadline_reschedules() -> None:
+    def scheduling(
+        scheduler: TickScheduler, item: Callable[[str], Item]
+    ) -> None:
+        a = item("a")
+        a.every = 4
+        scheduler.schedule(a, 1)
+        scheduler.schedule(item("b"), 6)
+
+    assert run(scheduling) == [("a", 1), ("a", 5), ("b", 6), ("a", 9)]
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import statistics
+from collections.abc import Sequence
+from typing import TYPE_CHECKING
+
+import pytest
+
+from game.core.clock import VirtualClock
+from game.core.enemy import CLASSIC, ROSTER, Animatronic
+from game.core.replay import ReplayedGame
+from game.core.rules import HOUR_LENGTH, HOURS_PER_NIGHT
+
+if TYPE_CHECKING:
+    from game.simulate import Controls, Nights
+
+np = pytest.importorskip("numpy")
+markov = pytest.importorskip("game.markov")
+simulate = pytest.importorskip("game.simulate")
+
+NIGHT = HOURS_PER_NIGHT * HOUR_LENGTH
+
+
+def passive_game(seed: int, night: int) -> float | None:
+    """When the enemies get a player who never touches anything on
+    ``night``, if they do."""
+    game = ReplayedGame(VirtualClock(), seed=seed)
+    game.night = night
+    game.enemies.reset(night, 0.0)
+    game.game_active = True
+    game.advance(NIGHT)
+    result = game.nights[0]
+    return result.time if result.outcome == "door_attack" else None
+
+
+@pytest.mark.parametrize("night", [1, 3, 5])
+def test_simulator_matches_the_game(night: int) -> None:
+    deaths = [passive_game(seed, night) for seed in range(1000)]
+    caught = [at for at in deaths if at is not None]
+
+    result = simulate.simulate_night(
+        simulate.passive,
+        20_000,
+        rng=np.random.default_rng(night),
+        night=night,
+    )
+    simulated = result.time_of_death[result.outcome == simulate.DOOR_ATTACK]
+    assert result.rate(simulate.DOOR_ATTACK) == pytest.approx(
+        len(caught) / len(deaths), abs=0.02
+    )
+    assert simulated.mean() == pytest.approx(statistics.mean(caught), abs=8)
+
+
+def enemies_playing(night: int, roster: Sequence[Animatronic]) -> set[int]:
+    seen: set[int] = set()
+
+    def policy(nights: Nights) -> Controls:
+        seen.add(nights.position.shape[1])
+        return simulate.passive(nights)
+
+    rng = np.random.default_rng(0)
+    simulate.simulate_night(policy, 10, rng=rng, night=night, roster=roster)
+    return seen
+
+
+def test_only_the_night_s_enemies_play() -> None:
+    assert [enemies_playing(night, ROSTER) for night in range(1, 6)] == [
+        {1},
+        {1},
+        {2},
+        {2},
+        {3},
+    ]
+    assert enemies_playing(5, CLASSIC) == {1}
+
+
+def test_markov_night_combines_the_enemies() -> None:
+    chains = [markov.analyze_enemy(enemy) for enemy in ROSTER]
+    night = markov.analyze_night(5)
+    missed = 1.0
+    for chain in chains:
+        missed *= 1 - chain.reach_probability
+    assert night.reach_probability == pytest.approx(1 - missed)
+    assert markov.analyze_night(1, CLASSIC).reach_probability == (
+        pytest.approx(chains[0].reach_probability)
+    )
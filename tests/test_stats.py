@@ -0,0 +1,103 @@
+import asyncio
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+from game.bench import Backend, FakeChannel, FakeMember, Recorder
+from game.core.clock import VirtualClock
+from game.game import FNAFDiscordGame
+from game.outbound import EditQueue
+from game.scheduler import TickScheduler
+from game.stats import PlayerStats, StatsStore
+
+USER = 7
+
+
+def play(store: StatsStore, *games: list[str]) -> PlayerStats:
+    """Record ``games``, each the outcome of its nights in order."""
+    for outcomes in games:
+        for night, outcome in enumerate(outcomes, start=1):
+            store.record(USER, outcome, night, 40.0)
+
+    async def main() -> PlayerStats | None:
+        await store.flush()
+        return await store.player(USER)
+
+    stats = asyncio.run(main())
+    assert stats is not None
+    return stats
+
+
+WIN = ["survived"] * 4 + ["won"]
+
+
+@pytest.fixture
+def store(tmp_path: Path) -> Iterator[StatsStore]:
+    store = StatsStore(tmp_path / "stats.db")
+    yield store
+    store.close()
+
+
+def test_wins_in_a_row_build_a_streak(store: StatsStore) -> None:
+    stats = play(store, WIN, WIN, WIN)
+    assert (stats.games, stats.wins) == (3, 3)
+    assert (stats.current_streak, stats.best_streak) == (3, 3)
+    assert stats.nights_survived == 15
+    assert stats.best_night == 5
+
+
+def test_a_loss_resets_the_streak_but_not_the_best(store: StatsStore) -> None:
+    stats = play(store, WIN, WIN, ["survived", "door_attack"], WIN)
+    assert (stats.games, stats.wins) == (4, 3)
+    assert (stats.current_streak, stats.best_streak) == (1, 2)
+    assert stats.deaths == {"door_attack": 1}
+
+
+def test_survived_nights_leave_the_streak_alone(store: StatsStore) -> None:
+    play(store, WIN, WIN)
+    # A game still running: its nights so far count, the game does not.
+    stats = play(store, ["survived", "survived"])
+    assert stats.games == 2
+    assert (stats.current_streak, stats.best_streak) == (2, 2)
+    assert stats.nights_survived == 12
+
+
+def test_streaks_add_up_across_writes(store: StatsStore) -> None:
+    for _ in range(3):
+        play(store, WIN)
+    stats = play(store, ["power_outage"])
+    assert (stats.current_streak, stats.best_streak) == (0, 3)
+    assert stats.best_night == 5
+    assert store.leaderboard() == [stats]
+
+
+def test_a_quit_is_a_lost_game_but_not_a_death(store: StatsStore) -> None:
+    stats = play(store, WIN, WIN, ["survived", "quit"])
+    assert (stats.games, stats.wins) == (3, 2)
+    assert (stats.current_streak, stats.best_streak) == (0, 2)
+    assert stats.nights_survived == 11
+    assert stats.deaths == {}
+
+
+def test_quitting_a_running_game_records_it(store: StatsStore) -> None:
+    async def main() -> PlayerStats | None:
+        channel = FakeChannel(Backend(latency=0, jitter=0), Recorder())
+        game = FNAFDiscordGame(
+            channel,
+            FakeMember(channel.guild),
+            {},
+            TickScheduler(VirtualClock()),
+            outbox=EditQueue(global_rate=10**6, channel_rate=10**6),
+            stats=store,
+        )
+        await game.start_game()
+        # The interaction is only answered by the router.
+        await game.quit_game(None)  # type: ignore[arg-type]
+        await game.quit_game(None)  # type: ignore[arg-type]
+        await store.flush()
+        return await store.player(game.user.id)
+
+    stats = asyncio.run(main())
+    assert stats is not None
+    assert (stats.games, stats.wins, stats.best_night) == (1, 0, 0)
@@ -0,0 +1,63 @@
+import asyncio
+from typing import Any
+
+import discord
+import pytest
+
+from game.view import CUSTOM_ID, FNAFGameView, GameRouter, custom_id
+
+
+def route(custom: str) -> GameRouter:
+    match = CUSTOM_ID.fullmatch(custom)
+    assert match is not None, custom
+    item = discord.ui.Button(custom_id=custom)
+    return asyncio.run(
+        GameRouter.from_custom_id(None, item, match)  # type: ignore[arg-type]
+    )
+
+
+@pytest.mark.parametrize(
+    ("game_id", "action", "arg"),
+    [(42, "door", None), (42, "cam", 3), (1 << 62, "restart", None)],
+)
+def test_custom_id_round_trip(
+    game_id: int, action: str, arg: int | None
+) -> None:
+    router = route(custom_id(game_id, action, arg))
+    assert (router.game_id, router.action, router.arg) == (
+        game_id,
+        action,
+        arg,
+    )
+
+
+@pytest.mark.parametrize(
+    "custom",
+    ["g:42", "g:abc:door", "g:42:Door", "g:42:cam:x", "x:42:door", ""],
+)
+def test_foreign_custom_ids_do_not_match(custom: str) -> None:
+    assert CUSTOM_ID.fullmatch(custom) is None
+
+
+def test_layouts_are_built_once_and_stamped_per_game() -> None:
+    layout = ("cameras", 2)
+
+    async def main() -> list[list[dict[str, Any]]]:
+        FNAFGameView._components.clear()
+        components = [
+            FNAFGameView(game_id, layout).to_components()
+            for game_id in (1, 2, 1)
+        ]
+        assert list(FNAFGameView._components) == [layout]
+        return components
+
+    first, second, again = asyncio.run(main())
+    assert first == again
+    ids = [
+        [button["custom_id"] for button in row["components"]] for row in first
+    ]
+    assert ids == [
+        ["g:1:cam:1", "g:1:cam:2", "g:1:cam:3", "g:1:exit"],
+        ["g:1:cam:4", "g:1:cam:5", "g:1:cam:6"],
+    ]
+    assert str(second).replace("g:2:", "g:1:") == str(first)